@@ -0,0 +1,214 @@
+"""
+Benchmark du service de disponibilités sur des calendriers synthétiques
+
+Mesure get_available_slots, get_user_events_in_range et get_participants_info
+pour plusieurs tailles de base, nombres de participants et longueurs de fenêtre,
+puis écrit les résultats (débit, latences, pic mémoire) dans un fichier JSON.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_availability
+    python -m benchmarks.bench_availability --scales 10:1000,5000:5000000 --output results.json
+    python -m benchmarks.bench_availability --compare benchmarks/results/ancien.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_URL = "sqlite:///" + os.path.join(BENCH_DIR, ".data", "availability_bench.db")
+
+def _db_url_from_argv() -> str:
+    for i, arg in enumerate(sys.argv):
+        if arg.startswith("--db-url="):
+            return arg.split("=", 1)[1]
+        if arg == "--db-url" and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return os.getenv("BENCH_DATABASE_URL", DEFAULT_DB_URL)
+
+
+# La base de test doit être choisie avant l'import des modèles (le moteur est créé à l'import)
+if __name__ == '__main__':
+    os.environ["DATABASE_URL"] = _db_url_from_argv()
+    os.environ["DEBUG"] = "False"
+
+from models.database import SessionLocal, engine
+from services.availability_service import AvailabilityService
+from benchmarks.synthetic_calendar import populate, reset_schema, dataset_size
+
+DEFAULT_SCALES = "10:1000,100:20000,1000:500000,5000:5000000"
+DEFAULT_PARTICIPANTS = "2,5,10,25"
+DEFAULT_WINDOWS = "7,30"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def _measure(func: Callable, repeat: int) -> Dict:
+    """
+    Exécute une fonction plusieurs fois et mesure latences, débit et pic mémoire
+
+    Le pic mémoire est mesuré avec tracemalloc sur une exécution séparée,
+    pour ne pas fausser les latences.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(durations)
+    return {
+        "repeat": repeat,
+        "mean_ms": round(statistics.mean(durations) * 1000, 3),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3),
+        "throughput_per_s": round(repeat / total, 2) if total else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run_scale(users: int, events: int, participants: List[int], windows: List[int],
+              repeat: int, seed: int, reuse: bool) -> List[Dict]:
+    """Génère (ou réutilise) un jeu de données puis mesure chaque combinaison"""
+    db = SessionLocal()
+    try:
+        existing = None
+        if reuse:
+            try:
+                existing = dataset_size(db)
+            except Exception:
+                db.rollback()
+        if existing != {"users": users, "events": events}:
+            reset_schema(engine)
+            start = time.perf_counter()
+            populate(db, users=users, events=events, seed=seed)
+            print(f"  Jeu de données {users} utilisateurs / {events} événements généré "
+                  f"en {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(seed)
+        window_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        results = []
+
+        for count in participants:
+            if count > users:
+                continue
+            participant_ids = rng.sample(range(1, users + 1), count)
+
+            results.append({
+                "users": users, "events": events, "participants": count, "window_days": None,
+                "function": "get_participants_info",
+                **_measure(lambda: AvailabilityService.get_participants_info(db, participant_ids), repeat)
+            })
+
+            for days in windows:
+                window_end = window_start + timedelta(days=days)
+                results.append({
+                    "users": users, "events": events, "participants": count, "window_days": days,
+                    "function": "get_user_events_in_range",
+                    **_measure(lambda: AvailabilityService.get_user_events_in_range(
+                        db, participant_ids[0], window_start, window_end
+                    ), repeat)
+                })
+                results.append({
+                    "users": users, "events": events, "participants": count, "window_days": days,
+                    "function": "get_available_slots",
+                    **_measure(lambda: AvailabilityService.get_available_slots(
+                        db, participant_ids, window_start, window_end
+                    ), repeat)
+                })
+                print(f"  {count} participants, fenêtre {days}j : "
+                      f"slots {results[-1]['median_ms']} ms, events {results[-2]['median_ms']} ms")
+        return results
+    finally:
+        db.close()
+
+
+def compare(previous_path: str, current: Dict):
+    """Affiche l'évolution des médianes par rapport à un fichier de résultats précédent"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+
+    def key(r):
+        return (r["function"], r["users"], r["events"], r["participants"], r["window_days"])
+
+    before = {key(r): r for r in previous["results"]}
+    print(f"\nComparaison avec {previous.get('commit')} :")
+    for result in current["results"]:
+        old = before.get(key(result))
+        if not old or not old["median_ms"]:
+            continue
+        delta = 100 * (result["median_ms"] - old["median_ms"]) / old["median_ms"]
+        flag = "  <-- régression" if delta > 10 else ""
+        print(f"  {result['function']:<26} u={result['users']:<5} e={result['events']:<8} "
+              f"p={result['participants']:<3} w={result['window_days']}: "
+              f"{old['median_ms']} -> {result['median_ms']} ms ({delta:+.1f}%){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du service de disponibilités")
+    parser.add_argument("--db-url", default=None, help="URL de la base de test (SQLite par défaut)")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Liste utilisateurs:événements")
+    parser.add_argument("--participants", default=DEFAULT_PARTICIPANTS, help="Nombres de participants")
+    parser.add_argument("--windows", default=DEFAULT_WINDOWS, help="Longueurs de fenêtre en jours")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre d'exécutions par mesure")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="Réutiliser la base si elle a déjà la bonne taille")
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    parser.add_argument("--compare", default=None, help="Fichier JSON précédent à comparer")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(BENCH_DIR, ".data"), exist_ok=True)
+    participants = [int(p) for p in args.participants.split(",")]
+    windows = [int(w) for w in args.windows.split(",")]
+    commit = _git_commit()
+
+    report = {
+        "benchmark": "availability",
+        "commit": commit,
+        "created_at": datetime.now().isoformat(),
+        "database": engine.url.render_as_string(hide_password=True),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+
+    for scale in args.scales.split(","):
+        users, events = (int(x) for x in scale.split(":"))
+        print(f"Échelle {users} utilisateurs / {events} événements")
+        report["results"].extend(
+            run_scale(users, events, participants, windows, args.repeat, args.seed, args.reuse)
+        )
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"availability-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {output}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == '__main__':
+    main()
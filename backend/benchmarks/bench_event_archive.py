@@ -0,0 +1,168 @@
+"""
+Benchmark de l'archivage des événements passés sur un historique de plusieurs années
+
+Génère un calendrier synthétique couvrant plusieurs années (l'essentiel dans le passé),
+mesure les requêtes de planification (get_user_events_in_range, get_available_slots,
+première page de list_events_page à partir d'aujourd'hui) et le chargement complet des
+événements d'un utilisateur avec tout l'historique dans calendar_events, archive les
+événements passés (EventArchiveService.archive_events), refait les mêmes mesures puis
+écrit les résultats dans un fichier JSON.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_event_archive
+    python -m benchmarks.bench_event_archive --users 2000 --events 2000000 --years 5 --db-url mysql+pymysql://...
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_URL = "sqlite:///" + os.path.join(BENCH_DIR, ".data", "event_archive_bench.db")
+
+
+def _db_url_from_argv() -> str:
+    for i, arg in enumerate(sys.argv):
+        if arg.startswith("--db-url="):
+            return arg.split("=", 1)[1]
+        if arg == "--db-url" and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return os.getenv("BENCH_DATABASE_URL", DEFAULT_DB_URL)
+
+
+# La base de test doit être choisie avant l'import des modèles (le moteur est créé à l'import)
+if __name__ == '__main__':
+    os.environ["DATABASE_URL"] = _db_url_from_argv()
+    os.environ["DEBUG"] = "False"
+
+from sqlalchemy import func
+from models.calendar_event import CalendarEvent
+from models.calendar_event_archive import CalendarEventArchive
+from models.database import SessionLocal, engine
+from services.availability_service import AvailabilityService
+from services.calendar_event_service import CalendarEventService
+from services.event_archive_service import EventArchiveService
+from benchmarks.bench_availability import _git_commit, _measure
+from benchmarks.synthetic_calendar import populate, reset_schema
+
+# Jours d'événements à venir dans le jeu de données (le reste est dans le passé)
+FUTURE_DAYS = 180
+
+
+def _table_sizes(db) -> Dict:
+    return {
+        "calendar_events": db.query(func.count(CalendarEvent.id)).scalar(),
+        "calendar_events_archive": db.query(func.count(CalendarEventArchive.archive_id)).scalar(),
+    }
+
+
+def run_queries(db, tier: str, users: int, participants: List[int], windows: List[int],
+                repeat: int, seed: int) -> List[Dict]:
+    """Mesure les requêtes de planification ; `tier` décrit l'état de la base (hot_only, archived)"""
+    rng = random.Random(seed)
+    window_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    results = []
+
+    results.append({
+        "tier": tier, "function": "list_events_page", "participants": None, "window_days": None,
+        **_measure(lambda: CalendarEventService.list_events_page(db, start=window_start, limit=100), repeat)
+    })
+    for count in participants:
+        if count > users:
+            continue
+        # Utilisateurs chargés (les premiers IDs concentrent 40 % des événements)
+        participant_ids = rng.sample(range(1, max(count, users // 10) + 1), count)
+        # Chargement complet des événements d'un utilisateur (proportionnel à la taille de la table courante)
+        results.append({
+            "tier": tier, "function": "get_events_by_user", "participants": count, "window_days": None,
+            **_measure(lambda: CalendarEventService.get_events_by_user(db, participant_ids[0]), repeat)
+        })
+        for days in windows:
+            window_end = window_start + timedelta(days=days)
+            results.append({
+                "tier": tier, "function": "get_user_events_in_range", "participants": count, "window_days": days,
+                **_measure(lambda: AvailabilityService.get_user_events_in_range(
+                    db, participant_ids[0], window_start, window_end
+                ), repeat)
+            })
+            results.append({
+                "tier": tier, "function": "get_available_slots", "participants": count, "window_days": days,
+                **_measure(lambda: AvailabilityService.get_available_slots(
+                    db, participant_ids, window_start, window_end
+                ), repeat)
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'archivage des événements passés")
+    parser.add_argument("--db-url", default=None, help="URL de la base de test (SQLite par défaut)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=4, help="Années d'historique")
+    parser.add_argument("--participants", default="2,10", help="Nombres de participants")
+    parser.add_argument("--windows", default="7,30", help="Longueurs de fenêtre en jours")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre d'exécutions par mesure")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(BENCH_DIR, ".data"), exist_ok=True)
+    participants = [int(p) for p in args.participants.split(",")]
+    windows = [int(w) for w in args.windows.split(",")]
+    commit = _git_commit()
+    horizon_days = args.years * 365 + FUTURE_DAYS
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    report = {
+        "benchmark": "event_archive",
+        "commit": commit,
+        "created_at": datetime.now().isoformat(),
+        "database": engine.url.render_as_string(hide_password=True),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": {"users": args.users, "events": args.events, "years": args.years, "future_days": FUTURE_DAYS},
+        "results": [],
+    }
+
+    reset_schema(engine)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        populate(db, users=args.users, events=args.events, seed=args.seed,
+                 horizon_days=horizon_days, start=today - timedelta(days=args.years * 365))
+        print(f"Jeu de données {args.users} utilisateurs / {args.events} événements sur {args.years} ans "
+              f"généré en {time.perf_counter() - start:.1f}s")
+
+        report["sizes_before"] = _table_sizes(db)
+        report["results"].extend(run_queries(db, "hot_only", args.users, participants, windows, args.repeat, args.seed))
+
+        report["archive"] = EventArchiveService.archive_events(db)
+        report["sizes_after"] = _table_sizes(db)
+        print(f"Archivage : {report['archive']['archived']} événements en {report['archive']['duration_ms']} ms")
+
+        report["results"].extend(run_queries(db, "archived", args.users, participants, windows, args.repeat, args.seed))
+    finally:
+        db.close()
+
+    before = {(r["function"], r["participants"], r["window_days"]): r for r in report["results"] if r["tier"] == "hot_only"}
+    for result in (r for r in report["results"] if r["tier"] == "archived"):
+        old = before[(result["function"], result["participants"], result["window_days"])]
+        speedup = old["median_ms"] / result["median_ms"] if result["median_ms"] else float("inf")
+        print(f"  {result['function']:<26} p={result['participants']} w={result['window_days']}: "
+              f"{old['median_ms']} -> {result['median_ms']} ms (x{speedup:.1f})")
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"event-archive-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark des écritures d'événements : ligne par ligne contre API groupée
+
+Compare, pour plusieurs tailles de lot (ex. les participants d'une réunion),
+CalendarEventService.create_event / update_event / delete_event appelés pour chaque
+ligne (un commit par ligne) avec bulk_create_events / bulk_update_events /
+bulk_delete_events (une transaction), puis écrit les résultats dans un fichier JSON.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_event_writes
+    python -m benchmarks.bench_event_writes --sizes 20,200 --repeat 10 --db-url mysql+pymysql://...
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_URL = "sqlite:///" + os.path.join(BENCH_DIR, ".data", "event_writes_bench.db")
+
+
+def _db_url_from_argv() -> str:
+    for i, arg in enumerate(sys.argv):
+        if arg.startswith("--db-url="):
+            return arg.split("=", 1)[1]
+        if arg == "--db-url" and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return os.getenv("BENCH_DATABASE_URL", DEFAULT_DB_URL)
+
+
+# La base de test doit être choisie avant l'import des modèles (le moteur est créé à l'import)
+if __name__ == '__main__':
+    os.environ["DATABASE_URL"] = _db_url_from_argv()
+    os.environ["DEBUG"] = "False"
+
+from models.database import SessionLocal, engine
+from services.calendar_event_service import CalendarEventService
+from benchmarks.bench_availability import _git_commit
+from benchmarks.synthetic_calendar import populate, reset_schema
+
+DEFAULT_SIZES = "20,200,2000"
+USERS = 2000
+
+
+def _rows(size: int, offset: int) -> List[Dict]:
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1 + offset)
+    return [
+        {
+            "user_id": i % USERS + 1,
+            "type_id": 1,
+            "title": "Réunion bench",
+            "start_datetime": start,
+            "end_datetime": start + timedelta(hours=1),
+        }
+        for i in range(size)
+    ]
+
+
+def _time(setup: Callable, func: Callable, repeat: int) -> Dict:
+    """Mesure func(setup()) ; la préparation n'est pas chronométrée"""
+    durations = []
+    for _ in range(repeat):
+        prepared = setup()
+        start = time.perf_counter()
+        func(prepared)
+        durations.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "mean_ms": round(statistics.mean(durations) * 1000, 3),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3),
+    }
+
+
+def run_size(db, size: int, repeat: int) -> List[Dict]:
+    """Mesure création, mise à jour et suppression d'un lot de `size` événements"""
+    counter = iter(range(10 ** 9))
+
+    def fresh_rows():
+        return _rows(size, next(counter))
+
+    def fresh_ids():
+        return CalendarEventService.bulk_create_events(db, fresh_rows(), return_ids=True)
+
+    def per_row_create(rows):
+        for row in rows:
+            CalendarEventService.create_event(db, **row)
+
+    def per_row_update(ids):
+        for event_id in ids:
+            CalendarEventService.update_event(db, event_id, title="Réunion déplacée")
+
+    def per_row_delete(ids):
+        for event_id in ids:
+            CalendarEventService.delete_event(db, event_id)
+
+    cases = [
+        ("create", "per_row", fresh_rows, per_row_create),
+        ("create", "bulk", fresh_rows, lambda rows: CalendarEventService.bulk_create_events(db, rows)),
+        # Avec les IDs : une insertion par ligne sur MySQL (pas de RETURNING)
+        ("create", "bulk_ids", fresh_rows,
+         lambda rows: CalendarEventService.bulk_create_events(db, rows, return_ids=True)),
+        ("update", "per_row", fresh_ids, per_row_update),
+        ("update", "bulk", fresh_ids, lambda ids: CalendarEventService.bulk_update_events(
+            db, [{"id": event_id, "title": "Réunion déplacée"} for event_id in ids]
+        )),
+        ("delete", "per_row", fresh_ids, per_row_delete),
+        ("delete", "bulk", fresh_ids, lambda ids: CalendarEventService.bulk_delete_events(db, ids)),
+    ]
+    results = []
+    for operation, mode, setup, func in cases:
+        results.append({"operation": operation, "mode": mode, "size": size, **_time(setup, func, repeat)})
+    for operation in ("create", "update", "delete"):
+        medians = {r["mode"]: r["median_ms"] for r in results if r["operation"] == operation}
+        per_row, bulk = medians["per_row"], medians["bulk"]
+        speedup = per_row / bulk if bulk else float("inf")
+        line = f"  {size} événements, {operation:<6}: ligne par ligne {per_row} ms, groupé {bulk} ms (x{speedup:.1f})"
+        if "bulk_ids" in medians:
+            line += f", groupé avec IDs {medians['bulk_ids']} ms"
+        print(line)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des écritures d'événements")
+    parser.add_argument("--db-url", default=None, help="URL de la base de test (SQLite par défaut)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tailles de lot")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre d'exécutions par mesure")
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(BENCH_DIR, ".data"), exist_ok=True)
+    commit = _git_commit()
+    report = {
+        "benchmark": "event_writes",
+        "commit": commit,
+        "created_at": datetime.now().isoformat(),
+        "database": engine.url.render_as_string(hide_password=True),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+
+    reset_schema(engine)
+    db = SessionLocal()
+    try:
+        populate(db, users=USERS, events=0)
+        for size in (int(s) for s in args.sizes.split(",")):
+            report["results"].extend(run_size(db, size, args.repeat))
+    finally:
+        db.close()
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"event-writes-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {output}")
+
+
+if __name__ == '__main__':
+    main()
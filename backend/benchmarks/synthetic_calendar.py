@@ -0,0 +1,151 @@
+"""
+Génération de calendriers synthétiques pour les benchmarks
+Remplit une base de test (SQLite ou MySQL) avec des utilisateurs et des événements réalistes
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+from sqlalchemy import insert, func
+from sqlalchemy.orm import Session
+from models.database import Base
+from models.user import User
+from models.event_type import EventType
+from models.calendar_event import CalendarEvent
+
+
+FIRST_NAMES = [
+    "Jean", "Marie", "Fatou", "Élodie", "Karim", "Sophie", "Lucas", "Amina", "Hugo", "Chloé",
+    "Mehdi", "Camille", "Thomas", "Inès", "Nicolas", "Léa", "Yanis", "Manon", "Paul", "Sarah"
+]
+LAST_NAMES = [
+    "Dupont", "Martin", "Diallo", "Bernard", "Benali", "Petit", "Durand", "Lefèvre", "Moreau", "Nguyen",
+    "Girard", "Bonnet", "Traoré", "Fontaine", "Rousseau", "Mercier", "Blanc", "Garnier", "Faure", "Chevalier"
+]
+EVENT_TYPES = ["Réunion", "Rendez-vous", "Formation", "Déplacement", "Congé"]
+TITLES = ["Point hebdo", "Revue de projet", "Entretien", "Atelier", "Comité", "Démo", "Déjeuner client"]
+
+# Durées de réunion usuelles (minutes) et leur poids
+DURATIONS = [30, 45, 60, 90, 120]
+DURATION_WEIGHTS = [30, 10, 40, 12, 8]
+
+CHUNK_SIZE = 10_000
+
+
+def reset_schema(engine):
+    """Recrée toutes les tables de la base de test"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _user_rows(count: int) -> Iterator[Dict]:
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "first_name": FIRST_NAMES[i % len(FIRST_NAMES)],
+            "last_name": f"{LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}{'' if i <= 400 else i}",
+            "email": f"user{i}@example.com",
+        }
+
+
+def _event_rows(rng: random.Random, users: int, events: int, start: datetime, horizon_days: int) -> Iterator[Dict]:
+    """
+    Génère des événements pendant les heures de travail, répartis sur l'horizon
+
+    Une partie des utilisateurs est beaucoup plus chargée que les autres,
+    comme dans un vrai annuaire (managers, commerciaux...).
+    """
+    busy_users = max(1, users // 10)
+    for _ in range(events):
+        if rng.random() < 0.4:
+            user_id = rng.randint(1, busy_users)
+        else:
+            user_id = rng.randint(1, users)
+
+        day = start + timedelta(days=rng.randrange(horizon_days))
+        if day.weekday() >= 5 and rng.random() < 0.9:
+            day += timedelta(days=7 - day.weekday())
+
+        begin = day.replace(hour=rng.randint(8, 17), minute=rng.choice((0, 15, 30, 45)), second=0, microsecond=0)
+        duration = rng.choices(DURATIONS, DURATION_WEIGHTS)[0]
+        is_all_day = rng.random() < 0.01
+        if is_all_day:
+            begin = begin.replace(hour=0, minute=0)
+            end = begin + timedelta(days=1)
+        else:
+            end = begin + timedelta(minutes=duration)
+
+        yield {
+            "user_id": user_id,
+            "type_id": rng.randint(1, len(EVENT_TYPES)),
+            "title": rng.choice(TITLES),
+            "start_datetime": begin,
+            "end_datetime": end,
+            "is_all_day": is_all_day,
+        }
+
+
+def _insert_chunked(db: Session, model, rows: Iterator[Dict]) -> int:
+    total = 0
+    chunk: List[Dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            db.execute(insert(model), chunk)
+            db.commit()
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(insert(model), chunk)
+        db.commit()
+        total += len(chunk)
+    return total
+
+
+def populate(db: Session, users: int, events: int, seed: int = 42, horizon_days: int = 365,
+             start: datetime = None) -> Dict:
+    """
+    Remplit la base avec un calendrier synthétique
+
+    Les événements couvrent une période allant de horizon_days/2 jours dans le passé
+    à horizon_days/2 jours dans le futur.
+
+    Args:
+        db: Session de base de données (schéma déjà créé)
+        users: Nombre d'utilisateurs
+        events: Nombre d'événements
+        seed: Graine du générateur aléatoire (résultats reproductibles)
+        horizon_days: Étendue de la période couverte en jours
+        start: Début de la période (par défaut aujourd'hui - horizon_days/2)
+
+    Returns:
+        Statistiques sur les données générées
+    """
+    rng = random.Random(seed)
+    if start is None:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=horizon_days // 2)
+
+    db.execute(insert(EventType), [
+        {"id": i, "name": name, "description": f"Type {name}"}
+        for i, name in enumerate(EVENT_TYPES, 1)
+    ])
+    db.commit()
+
+    inserted_users = _insert_chunked(db, User, _user_rows(users))
+    inserted_events = _insert_chunked(db, CalendarEvent, _event_rows(rng, users, events, start, horizon_days))
+
+    return {
+        "users": inserted_users,
+        "events": inserted_events,
+        "start": start.isoformat(),
+        "horizon_days": horizon_days,
+        "seed": seed,
+    }
+
+
+def dataset_size(db: Session) -> Dict:
+    """Retourne le nombre d'utilisateurs et d'événements présents dans la base"""
+    return {
+        "users": db.query(func.count(User.id)).scalar(),
+        "events": db.query(func.count(CalendarEvent.id)).scalar(),
+    }
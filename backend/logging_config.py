@@ -0,0 +1,139 @@
+# Configuration des logs
+"""
+Logs structurés (JSON) émis via une file d'attente.
+
+Les appels à logger.info(...) sur le chemin des requêtes ne font qu'empiler
+l'enregistrement dans une queue ; l'écriture sur stdout est faite par un
+QueueListener dans un thread dédié.
+"""
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from config import Config
+
+# Identifiant de la requête HTTP en cours (positionné par le middleware de main.py)
+request_id_var: ContextVar = ContextVar("request_id", default=None)
+
+# Attributs standards d'un LogRecord, exclus des champs additionnels
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+def new_request_id() -> str:
+    """Génère un identifiant de requête court"""
+    return uuid.uuid4().hex[:16]
+
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute l'identifiant de requête courant à chaque enregistrement"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Échantillonne les logs de succès à fort volume
+
+    Seuls les enregistrements marqués avec extra={"sampled": True} sont concernés ;
+    les avertissements et erreurs sont toujours conservés.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and record.levelno < logging.WARNING:
+            return random.random() < self.rate
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    QueueHandler qui conserve les champs structurés
+
+    Le QueueHandler standard formate le message (traceback compris) dans record.msg ;
+    ici on fige seulement le message et le texte de l'exception pour que le
+    formateur JSON puisse les placer dans des champs séparés.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Formate un enregistrement en une ligne JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "stage": getattr(record, "stage", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in payload and key not in ("sampled",):
+                payload[key] = value
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def setup_logging():
+    """
+    Configure les logs de l'application (idempotent)
+
+    Le logger racine reçoit un ContextQueueHandler ; un QueueListener écrit
+    ensuite les enregistrements sur stdout depuis son propre thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.Queue(-1)
+
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter(Config.LOG_SUCCESS_SAMPLE_RATE))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if Config.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+        ))
+
+    root = logging.getLogger()
+    root.setLevel(Config.LOG_LEVEL)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Vide la file d'attente et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
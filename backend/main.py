@@ -1,14 +1,69 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from routes import meeting_orchestrator
+from routes import meeting_orchestrator, google_notifications, calendar_events, users
+from models.database import engine, read_engine, Base
+from models.async_database import dispose_async_engines
+from services.profiling_service import ProfilingService
+from services.email_outbox_worker import EmailOutboxWorker
+from services.calendar_sync_service import CalendarSyncWorker
+from services.calendar_reconciler import CalendarReconcilerWorker
+from services.calendar_watch_service import CalendarWatchWorker
+from services.user_directory import UserDirectoryWorker
+from services.event_archive_service import EventArchiveWorker
+from config import Config
+from logging_config import setup_logging, shutdown_logging, request_id_var, new_request_id
 import os
 
+setup_logging()
+
 app = FastAPI(
     title="Planificateur de Réunions",
     version="2.0.0",
     description="API de planification de réunions avec agents LLM"
 )
 
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Associe un identifiant à chaque requête pour le retrouver dans les logs"""
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Créer les tables manquantes (ex: email_outbox)
+    Base.metadata.create_all(bind=engine)
+    if Config.USER_DIRECTORY_WORKER_ENABLED:
+        UserDirectoryWorker.start()
+    if Config.EMAIL_OUTBOX_ENABLED and Config.EMAIL_OUTBOX_WORKER_ENABLED:
+        EmailOutboxWorker.start()
+    if Config.GOOGLE_SYNC_ENABLED:
+        CalendarSyncWorker.start()
+    if Config.RECONCILER_ENABLED:
+        CalendarReconcilerWorker.start()
+    if Config.GOOGLE_WATCH_ENABLED:
+        CalendarWatchWorker.start()
+    if Config.EVENT_ARCHIVE_ENABLED:
+        EventArchiveWorker.start()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    EmailOutboxWorker.stop()
+    CalendarSyncWorker.stop()
+    CalendarReconcilerWorker.stop()
+    CalendarWatchWorker.stop()
+    EventArchiveWorker.stop()
+    UserDirectoryWorker.stop()
+    dispose_async_engines()
+    shutdown_logging()
+
 # Créer le répertoire temp_audio s'il n'existe pas
 temp_audio_dir = os.path.join(os.path.dirname(__file__), 'temp_audio')
 os.makedirs(temp_audio_dir, exist_ok=True)
@@ -16,8 +71,16 @@ os.makedirs(temp_audio_dir, exist_ok=True)
 # Servir les fichiers audio statiques
 app.mount("/audio", StaticFiles(directory=temp_audio_dir), name="audio")
 
+# Mesurer le temps SQL des requêtes profilées
+if Config.PROFILING_ENABLED:
+    ProfilingService.instrument_engine(engine)
+    ProfilingService.instrument_engine(read_engine)
+
 # Inclure les nouvelles routes pour l'orchestration multi-agent
 app.include_router(meeting_orchestrator.router, prefix="/api/orchestrator", tags=["orchestrator"])
+app.include_router(google_notifications.router, prefix="/api/google", tags=["google"])
+app.include_router(calendar_events.router, prefix="/api/events", tags=["events"])
+app.include_router(users.router, prefix="/api/users", tags=["users"])
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,7 @@
+-- Synchronisation Google Calendar -> calendar_events
+-- Les nouvelles tables (calendar_sync_states) sont créées au démarrage par SQLAlchemy ;
+-- ce script ajoute les colonnes aux tables existantes.
+
+ALTER TABLE calendar_events
+    ADD COLUMN google_event_id VARCHAR(255) NULL,
+    ADD CONSTRAINT uq_calendar_events_user_google UNIQUE (user_id, google_event_id);
@@ -0,0 +1,5 @@
+-- Notifications Google Calendar : synchronisation à la demande
+-- La table calendar_watch_channels est créée au démarrage par SQLAlchemy.
+
+ALTER TABLE calendar_sync_states
+    ADD COLUMN needs_sync BOOLEAN NOT NULL DEFAULT FALSE;
@@ -0,0 +1,8 @@
+-- Réunions : une ligne par réunion (meetings) et une par participant (meeting_attendees)
+-- Les nouvelles tables sont créées au démarrage par SQLAlchemy ;
+-- ce script relie les liens Google existants aux réunions.
+
+ALTER TABLE google_event_links
+    ADD COLUMN meeting_id INTEGER NULL,
+    ADD CONSTRAINT fk_google_event_links_meeting FOREIGN KEY (meeting_id) REFERENCES meetings (id) ON DELETE SET NULL,
+    ADD INDEX ix_google_event_links_meeting_id (meeting_id);
@@ -0,0 +1,7 @@
+-- Recherche des participants par nom normalisé (minuscules, sans accents)
+-- Après ce script, remplir la colonne pour les utilisateurs existants :
+--     python -m services.name_index --backfill
+
+ALTER TABLE users
+    ADD COLUMN search_name VARCHAR(255) NULL,
+    ADD INDEX ix_users_search_name (search_name);
@@ -0,0 +1,5 @@
+-- Annuaire des utilisateurs en mémoire : détection des modifications par date
+
+ALTER TABLE users
+    ADD COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ADD INDEX ix_users_updated_at (updated_at);
@@ -0,0 +1,5 @@
+-- Pagination keyset des événements : index dans l'ordre du tri (start_datetime, id)
+
+CREATE INDEX ix_calendar_events_user_start ON calendar_events (user_id, start_datetime, id);
+CREATE INDEX ix_calendar_events_type_start ON calendar_events (type_id, start_datetime, id);
+CREATE INDEX ix_calendar_events_start ON calendar_events (start_datetime, id);
@@ -0,0 +1,21 @@
+-- Archive des événements passés (calendar_events_archive)
+-- La table est créée au démarrage par SQLAlchemy ; ce script la crée à l'avance sur une
+-- base existante. Déplacer ensuite l'historique par lots :
+--     python -m services.event_archive_service
+
+CREATE TABLE IF NOT EXISTS calendar_events_archive (
+    archive_id INTEGER NOT NULL AUTO_INCREMENT,
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    type_id INTEGER NOT NULL,
+    title VARCHAR(200),
+    start_datetime DATETIME NOT NULL,
+    end_datetime DATETIME NOT NULL,
+    is_all_day BOOL,
+    google_event_id VARCHAR(255),
+    archived_at DATETIME NOT NULL,
+    PRIMARY KEY (archive_id),
+    INDEX ix_calendar_events_archive_user_start (user_id, start_datetime, id),
+    INDEX ix_calendar_events_archive_start (start_datetime, id),
+    INDEX ix_calendar_events_archive_google (user_id, google_event_id)
+);
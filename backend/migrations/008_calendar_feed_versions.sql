@@ -0,0 +1,11 @@
+-- Version du calendrier de chaque utilisateur (ETag de l'export ICS)
+-- La table est créée au démarrage par SQLAlchemy ; ce script la crée à l'avance sur une
+-- base existante. Une ligne absente vaut la version 0.
+
+CREATE TABLE IF NOT EXISTS calendar_feed_versions (
+    user_id INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id),
+    CONSTRAINT fk_calendar_feed_versions_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
@@ -0,0 +1,10 @@
+-- Identifiant des événements importés d'un fichier ICS/CSV (import idempotent)
+-- UID ICS ou empreinte (titre, début, fin) : réimporter le même fichier ne crée pas de doublons.
+
+ALTER TABLE calendar_events
+    ADD COLUMN external_uid VARCHAR(255) NULL,
+    ADD CONSTRAINT uq_calendar_events_user_external UNIQUE (user_id, external_uid);
+
+ALTER TABLE calendar_events_archive
+    ADD COLUMN external_uid VARCHAR(255) NULL,
+    ADD INDEX ix_calendar_events_archive_external (user_id, external_uid);
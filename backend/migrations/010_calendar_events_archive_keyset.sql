@@ -0,0 +1,7 @@
+-- Pagination keyset de l'archive sur (start_datetime, archive_id)
+-- L'ID d'origine (id) peut être réattribué après archivage : seul archive_id est unique.
+
+DROP INDEX ix_calendar_events_archive_user_start ON calendar_events_archive;
+DROP INDEX ix_calendar_events_archive_start ON calendar_events_archive;
+CREATE INDEX ix_calendar_events_archive_user_start ON calendar_events_archive (user_id, start_datetime, archive_id);
+CREATE INDEX ix_calendar_events_archive_start ON calendar_events_archive (start_datetime, archive_id);
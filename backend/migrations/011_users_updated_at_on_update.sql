@@ -0,0 +1,6 @@
+-- users.updated_at mis à jour par MySQL pour toute modification, y compris hors de l'ORM
+-- (SQL brut, administration, autres services) : sans cela, l'annuaire en mémoire des
+-- autres processus ne voit pas ces modifications. Pour les bases où 005 a déjà été appliqué.
+
+ALTER TABLE users
+    MODIFY COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
@@ -0,0 +1,112 @@
+"""
+Couche asynchrone SQLAlchemy (AsyncEngine / AsyncSession)
+
+Les moteurs asynchrones utilisent le pilote async correspondant à DATABASE_URL et
+DATABASE_READ_URL (mysql+pymysql -> mysql+aiomysql, sqlite -> sqlite+aiosqlite,
+postgresql -> postgresql+asyncpg), ou ASYNC_DATABASE_URL si elle est renseignée.
+Ils sont créés au premier usage, avec les mêmes réglages de pool et de timeouts que les
+moteurs synchrones.
+
+Le code synchrone (routes `def`, workers) exécute ses coroutines avec run_async, sur une
+boucle d'événements unique par processus : les connexions du pool restent attachées à
+cette boucle et plusieurs requêtes peuvent y être lancées en parallèle (asyncio.gather).
+"""
+import asyncio
+import threading
+from typing import Awaitable, Dict, Optional, TypeVar
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from config import Config
+from models.database import DATABASE_URL, DATABASE_READ_URL, _configure_session, _engine_options, instrument_slow_queries
+
+T = TypeVar("T")
+
+# Pilote asynchrone par dialecte
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+_lock = threading.Lock()
+_engines: Dict[bool, AsyncEngine] = {}
+_sessionmakers: Dict[bool, async_sessionmaker] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def to_async_url(url: str) -> str:
+    """
+    Remplace le pilote synchrone d'une URL par son équivalent asynchrone
+
+    Raises:
+        ValueError: Si aucun pilote asynchrone n'est connu pour ce dialecte
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Pas de pilote asynchrone pour {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _build_async_engine(url: str, read_only: bool) -> AsyncEngine:
+    options = _engine_options(url)
+    if make_url(url).get_backend_name() == "mysql":
+        # aiomysql ne connaît que connect_timeout
+        options["connect_args"] = {"connect_timeout": Config.DB_CONNECT_TIMEOUT_SECONDS}
+    new_engine = create_async_engine(url, **options)
+    _configure_session(new_engine.sync_engine, read_only=read_only)
+    instrument_slow_queries(new_engine.sync_engine)
+    return new_engine
+
+
+def get_async_engine(read: bool = False) -> AsyncEngine:
+    """Moteur asynchrone principal, ou de la réplique de lecture (read=True)"""
+    with _lock:
+        if False not in _engines:
+            _engines[False] = _build_async_engine(
+                Config.ASYNC_DATABASE_URL or to_async_url(DATABASE_URL), read_only=False
+            )
+        if True not in _engines:
+            _engines[True] = _build_async_engine(
+                to_async_url(DATABASE_READ_URL), read_only=True
+            ) if DATABASE_READ_URL != DATABASE_URL else _engines[False]
+        return _engines[read]
+
+
+def async_session(read: bool = False) -> AsyncSession:
+    """
+    Nouvelle session asynchrone (à utiliser avec `async with`)
+
+    Une session ne doit servir qu'à une tâche à la fois : ouvrir une session par
+    requête lancée en parallèle.
+    """
+    engine = get_async_engine(read)
+    with _lock:
+        if read not in _sessionmakers:
+            _sessionmakers[read] = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+        return _sessionmakers[read]()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-db-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    Exécute une coroutine sur la boucle de la couche asynchrone et attend son résultat
+
+    À appeler depuis du code synchrone (jamais depuis la boucle elle-même).
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+
+def dispose_async_engines():
+    """Ferme les connexions des moteurs asynchrones (arrêt de l'application)"""
+    with _lock:
+        engines = {id(engine): engine for engine in _engines.values()}.values()
+        _engines.clear()
+        _sessionmakers.clear()
+    if _loop is not None:
+        for engine in engines:
+            run_async(engine.dispose())
@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from models.database import Base
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
+    __table_args__ = (
+        # Un événement Google n'est importé qu'une fois par utilisateur
+        UniqueConstraint("user_id", "google_event_id", name="uq_calendar_events_user_google"),
+        # Un événement importé d'un fichier (UID ICS ou empreinte CSV) n'est créé qu'une fois
+        UniqueConstraint("user_id", "external_uid", name="uq_calendar_events_user_external"),
+        # Pagination keyset et filtres par période : (start_datetime, id) dans l'ordre du tri
+        Index("ix_calendar_events_user_start", "user_id", "start_datetime", "id"),
+        Index("ix_calendar_events_type_start", "type_id", "start_datetime", "id"),
+        Index("ix_calendar_events_start", "start_datetime", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -12,7 +22,11 @@ class CalendarEvent(Base):
     start_datetime = Column(DateTime, nullable=False)
     end_datetime = Column(DateTime, nullable=False)
     is_all_day = Column(Boolean, default=False)
+    # Renseigné pour les événements importés depuis Google Calendar (NULL sinon)
+    google_event_id = Column(String(255), nullable=True)
+    # Renseigné pour les événements importés d'un fichier ICS/CSV (NULL sinon)
+    external_uid = Column(String(255), nullable=True)
 
     # Relations
     user = relationship("User", back_populates="calendar_events")
-    event_type = relationship("EventType", back_populates="calendar_events")
\ No newline at end of file
+    event_type = relationship("EventType", back_populates="calendar_events")
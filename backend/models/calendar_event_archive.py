@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index
+from datetime import datetime
+from models.database import Base
+
+class CalendarEventArchive(Base):
+    """Événements passés déplacés hors de calendar_events (voir EventArchiveService)"""
+    __tablename__ = "calendar_events_archive"
+    __table_args__ = (
+        # Pagination keyset sur (start_datetime, archive_id) : `id` n'est pas unique dans l'archive
+        Index("ix_calendar_events_archive_user_start", "user_id", "start_datetime", "archive_id"),
+        Index("ix_calendar_events_archive_start", "start_datetime", "archive_id"),
+        Index("ix_calendar_events_archive_google", "user_id", "google_event_id"),
+        Index("ix_calendar_events_archive_external", "user_id", "external_uid"),
+    )
+
+    # Clé propre à l'archive : un ID de calendar_events peut être réattribué après archivage
+    archive_id = Column(Integer, primary_key=True)
+    # Mêmes colonnes que calendar_events (id d'origine conservé)
+    id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    type_id = Column(Integer, nullable=False)
+    title = Column(String(200))
+    start_datetime = Column(DateTime, nullable=False)
+    end_datetime = Column(DateTime, nullable=False)
+    is_all_day = Column(Boolean, default=False)
+    google_event_id = Column(String(255), nullable=True)
+    external_uid = Column(String(255), nullable=True)
+
+    archived_at = Column(DateTime, nullable=False, default=datetime.now)
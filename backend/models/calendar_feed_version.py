@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from datetime import datetime
+from models.database import Base
+
+class CalendarFeedVersion(Base):
+    """Version du calendrier d'un utilisateur, incrémentée à chaque modification (ETag de l'export ICS)"""
+    __tablename__ = "calendar_feed_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from models.database import Base
+
+class CalendarSyncState(Base):
+    __tablename__ = "calendar_sync_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    google_calendar_id = Column(String(255), nullable=False)
+    # Jeton de synchronisation incrémentale renvoyé par events.list (NULL = import complet à faire)
+    sync_token = Column(Text)
+    last_full_sync_at = Column(DateTime)
+    last_synced_at = Column(DateTime)
+    last_error = Column(Text)
+    # Positionné par une notification Google : synchronisation à faire au plus tôt
+    needs_sync = Column(Boolean, nullable=False, default=False)
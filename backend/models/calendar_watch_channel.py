@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from models.database import Base
+
+class CalendarWatchChannel(Base):
+    __tablename__ = "calendar_watch_channels"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    google_calendar_id = Column(String(255), nullable=False)
+    # Identifiants du canal de notifications (events.watch)
+    channel_id = Column(String(64), unique=True, nullable=False)
+    resource_id = Column(String(255))
+    # Secret renvoyé par Google dans X-Goog-Channel-Token
+    token = Column(String(64), nullable=False)
+    expiration = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -3,17 +3,123 @@
 """
 Configuration de la connexion à la base de données MySQL.
 Utilise SQLAlchemy pour l'ORM.
+
+Deux moteurs : `engine` (primaire, lectures et écritures) et `read_engine` (réplique en
+lecture seule si DATABASE_READ_URL est renseignée, sinon le primaire). Les paramètres de
+pool, les timeouts et les logs SQL sont réglés par Config (DB_*, SQL_*).
 """
 
-from sqlalchemy import create_engine
+import logging
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = Config.DATABASE_URL
+DATABASE_READ_URL = Config.DATABASE_READ_URL or DATABASE_URL
+
+
+def _engine_options(url: str) -> dict:
+    """Options de create_engine selon le dialecte (pool, pre-ping, timeouts)"""
+    backend = make_url(url).get_backend_name()
+    options = {"echo": False, "pool_pre_ping": Config.DB_POOL_PRE_PING}
+    if backend == "sqlite":
+        # Pool par défaut de SQLite (fichier local) : pas de taille ni de recyclage
+        return options
+
+    options.update(
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT_SECONDS,
+        # Sous wait_timeout de MySQL : une connexion inactive est remplacée avant d'être coupée par le serveur
+        pool_recycle=Config.DB_POOL_RECYCLE_SECONDS,
+    )
+    if backend == "mysql":
+        options["connect_args"] = {
+            "connect_timeout": Config.DB_CONNECT_TIMEOUT_SECONDS,
+            "read_timeout": Config.DB_READ_TIMEOUT_SECONDS or None,
+        }
+    elif backend == "postgresql":
+        options["connect_args"] = {"connect_timeout": Config.DB_CONNECT_TIMEOUT_SECONDS}
+    return options
+
+
+def _configure_session(engine: Engine, read_only: bool = False):
+    """Timeout des requêtes (et lecture seule pour la réplique) à chaque nouvelle connexion"""
+    backend = engine.dialect.name
+    if backend not in ("mysql", "postgresql"):
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if backend == "mysql":
+                if Config.DB_STATEMENT_TIMEOUT_MS:
+                    # Ne s'applique qu'aux SELECT (max_execution_time)
+                    cursor.execute(f"SET SESSION max_execution_time = {int(Config.DB_STATEMENT_TIMEOUT_MS)}")
+                if read_only:
+                    cursor.execute("SET SESSION TRANSACTION READ ONLY")
+            else:
+                if Config.DB_STATEMENT_TIMEOUT_MS:
+                    cursor.execute(f"SET statement_timeout = {int(Config.DB_STATEMENT_TIMEOUT_MS)}")
+                if read_only:
+                    cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+        finally:
+            cursor.close()
+        if backend == "postgresql":
+            dbapi_connection.commit()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("slow_query_start")
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+    if duration_ms >= Config.SQL_SLOW_QUERY_MS:
+        logger.warning(
+            "Requête SQL lente",
+            extra={"stage": "sql", "duration_ms": round(duration_ms, 1), "statement": statement[:1000],
+                   "executemany": executemany, "database": conn.engine.url.database}
+        )
+
+
+def instrument_slow_queries(engine: Engine):
+    """Journalise les requêtes plus longues que SQL_SLOW_QUERY_MS (désactivé si 0)"""
+    if Config.SQL_SLOW_QUERY_MS > 0 and not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def build_engine(url: str, read_only: bool = False) -> Engine:
+    """Crée un moteur configuré (pool, timeouts, log des requêtes lentes)"""
+    new_engine = create_engine(url, **_engine_options(url))
+    _configure_session(new_engine, read_only=read_only)
+    instrument_slow_queries(new_engine)
+    return new_engine
+
+
+# Log de chaque requête (SQL_ECHO) : passe par le logging de l'application (QueueHandler),
+# indépendamment de DEBUG
+if Config.SQL_ECHO:
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+engine = build_engine(DATABASE_URL)
+read_engine = build_engine(DATABASE_READ_URL, read_only=True) if DATABASE_READ_URL != DATABASE_URL else engine
 
-engine = create_engine(DATABASE_URL, echo=Config.DEBUG)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions de lecture (réplique) : les données peuvent avoir quelques secondes de retard
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 # Dependency pour FastAPI
@@ -24,5 +130,22 @@ def get_db():
     finally:
         db.close()
 
+# Dependency pour FastAPI (lectures seules, routées vers la réplique)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@contextmanager
+def read_session():
+    """Session de lecture (réplique) hors des dépendances FastAPI"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 # Importer les modèles pour qu'ils soient enregistrés avec Base
-from . import user, event_type, calendar_event
+from . import user, event_type, calendar_event, email_outbox, calendar_sync_state, google_event_link, calendar_watch_channel, meeting, meeting_attendee, calendar_event_archive, calendar_feed_version
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from datetime import datetime
+from models.database import Base
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Empêche d'enregistrer deux fois le même email (ex: invitation d'un participant à une réunion)
+    idempotency_key = Column(String(191), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    to_email = Column(String(150), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+
+    # pending -> sending -> sent | failed | unknown (envoi non confirmé ou bail expiré, pas renvoyé)
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text)
+    message_id = Column(String(100))
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    sent_at = Column(DateTime)
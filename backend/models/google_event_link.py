@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from models.database import Base
+
+class GoogleEventLink(Base):
+    __tablename__ = "google_event_links"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Événement local d'un participant (NULL s'il a été supprimé localement)
+    calendar_event_id = Column(
+        Integer, ForeignKey("calendar_events.id", ondelete="SET NULL"), unique=True, nullable=True
+    )
+    # Réunion locale (une ligne par participant, NULL si la réunion a été supprimée)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="SET NULL"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Événement Google partagé par tous les participants d'une réunion
+    google_event_id = Column(String(255), nullable=False, index=True)
+    google_calendar_id = Column(String(255), nullable=False, default="primary")
+
+    # synced | remote_deleted
+    status = Column(String(20), nullable=False, default="synced")
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_reconciled_at = Column(DateTime)
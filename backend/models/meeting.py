@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from models.database import Base
+
+class Meeting(Base):
+    __tablename__ = "meetings"
+    __table_args__ = (
+        Index("ix_meetings_start_end", "start_datetime", "end_datetime"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    type_id = Column(Integer, ForeignKey("event_types.id"), nullable=False)
+    title = Column(String(200))
+    start_datetime = Column(DateTime, nullable=False)
+    end_datetime = Column(DateTime, nullable=False)
+    is_all_day = Column(Boolean, default=False)
+    # Événement Google partagé par tous les participants (NULL si non créé)
+    google_event_id = Column(String(255), nullable=True, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+    # Relations
+    attendees = relationship(
+        "MeetingAttendee", back_populates="meeting", cascade="all, delete-orphan", passive_deletes=True
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.orm import relationship
+from models.database import Base
+
+class MeetingAttendee(Base):
+    __tablename__ = "meeting_attendees"
+    __table_args__ = (
+        UniqueConstraint("meeting_id", "user_id", name="uq_meeting_attendees_meeting_user"),
+        # Disponibilités : réunions d'un ensemble d'utilisateurs
+        Index("ix_meeting_attendees_user_meeting", "user_id", "meeting_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # invited | accepted | tentative | declined (un refus libère le créneau)
+    status = Column(String(20), nullable=False, default="invited")
+    responded_at = Column(DateTime)
+
+    # Relations
+    meeting = relationship("Meeting", back_populates="attendees")
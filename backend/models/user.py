@@ -1,7 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
-from sqlalchemy.orm import relationship
+import re
+import unicodedata
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, DDL, event
+from sqlalchemy.orm import relationship, validates
 from models.database import Base
 
+
+def normalize_name(value: Optional[str]) -> str:
+    """Clé de recherche d'un nom : minuscules, sans accents ni ponctuation, espaces réduits"""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[\W_]+", " ", without_accents.casefold()).split())
+
+
+def _search_name_default(context) -> str:
+    # Insertions sans passer par l'ORM (ex: insert(User) groupé)
+    params = context.get_current_parameters()
+    return normalize_name(f"{params.get('first_name') or ''} {params.get('last_name') or ''}")
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -9,6 +27,29 @@ class User(Base):
     first_name = Column(String(100))
     last_name = Column(String(100))
     email = Column(String(150), unique=True, index=True, nullable=False)
+    # "prénom nom" normalisé (voir normalize_name), tenu à jour à chaque modification du nom
+    search_name = Column(String(255), index=True, default=_search_name_default)
+    # Détection des modifications par l'annuaire en mémoire (voir UserDirectory)
+    updated_at = Column(DateTime, nullable=False, index=True, default=datetime.now, onupdate=datetime.now)
 
     # Relation avec calendar_events
-    calendar_events = relationship("CalendarEvent", back_populates="user")
\ No newline at end of file
+    calendar_events = relationship("CalendarEvent", back_populates="user")
+
+    @validates("first_name", "last_name")
+    def _update_search_name(self, key, value):
+        first_name = value if key == "first_name" else self.first_name
+        last_name = value if key == "last_name" else self.last_name
+        self.search_name = normalize_name(f"{first_name or ''} {last_name or ''}")
+        return value
+
+
+# MySQL met aussi updated_at à jour pour les modifications faites hors de l'ORM (SQL brut,
+# administration, autres services) : l'annuaire des autres processus les détecte
+event.listen(
+    User.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE users MODIFY updated_at DATETIME NOT NULL "
+        "DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+    ).execute_if(dialect="mysql")
+)
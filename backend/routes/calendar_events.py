@@ -0,0 +1,79 @@
+"""
+Consultation des événements de calendrier, paginée par curseur, et import ICS/CSV
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.orm import Session
+from models.calendar_event import CalendarEvent
+from models.database import get_db, get_read_db
+from services.calendar_event_service import CalendarEventService
+from services.event_import_service import EventImportService
+from datetime import datetime
+import io
+from typing import Dict, Optional
+
+router = APIRouter()
+
+
+def serialize_event(event: CalendarEvent) -> Dict:
+    return {
+        "id": event.id,
+        "user_id": event.user_id,
+        "type_id": event.type_id,
+        "title": event.title,
+        "start_datetime": event.start_datetime.isoformat(),
+        "end_datetime": event.end_datetime.isoformat(),
+        "is_all_day": event.is_all_day,
+        "google_event_id": event.google_event_id,
+        "external_uid": event.external_uid,
+    }
+
+
+@router.get("")
+def list_events(
+    db: Session = Depends(get_read_db),
+    user_id: Optional[int] = Query(None),
+    type_id: Optional[int] = Query(None),
+    start: Optional[datetime] = Query(None, description="Événements commençant à partir de cette date"),
+    end: Optional[datetime] = Query(None, description="Événements finissant au plus tard à cette date"),
+    cursor: Optional[str] = Query(None, description="Valeur next_cursor de la page précédente"),
+    limit: int = Query(100, ge=1, le=1000),
+    archived: bool = Query(False, description="Lire les événements passés archivés")
+):
+    """
+    Liste les événements triés par date de début, page par page
+    
+    Pagination keyset : passer `next_cursor` de la réponse dans `cursor` pour obtenir la
+    page suivante (None sur la dernière page). Le coût d'une page ne dépend pas de sa position.
+    Les événements terminés depuis plus de EVENT_ARCHIVE_AFTER_DAYS jours sont lus avec archived=true.
+    """
+    try:
+        events, next_cursor = CalendarEventService.list_events_page(
+            db, user_id=user_id, type_id=type_id, start=start, end=end, cursor=cursor, limit=limit,
+            archived=archived
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": [serialize_event(event) for event in events], "next_cursor": next_cursor}
+
+
+@router.post("/import")
+def import_events(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="ics ou csv (déduit de l'extension par défaut)"),
+    email: Optional[str] = Query(None, description="Attribuer tous les événements à cet utilisateur"),
+    type_id: int = Query(1),
+    db: Session = Depends(get_db)
+):
+    """
+    Importe un fichier ICS ou CSV d'événements
+
+    Le fichier est lu ligne par ligne et inséré par lots (EVENT_IMPORT_BATCH_SIZE
+    événements par transaction). La réponse contient les statistiques de l'import,
+    dont le débit (rows_per_second) et les premières lignes en erreur.
+    """
+    try:
+        fmt = format or EventImportService.detect_format(file.filename)
+        lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        return EventImportService.import_events(db, lines, fmt, owner_email=email, type_id=type_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
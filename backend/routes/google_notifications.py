@@ -0,0 +1,39 @@
+"""
+Webhook des notifications Google Calendar (events.watch)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from sqlalchemy.orm import Session
+from models.database import get_db
+from services.calendar_watch_service import CalendarWatchService
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.post("/notifications")
+def google_calendar_notification(
+    db: Session = Depends(get_db),
+    x_goog_channel_id: str = Header(...),
+    x_goog_resource_state: str = Header(...),
+    x_goog_channel_token: Optional[str] = Header(None),
+    x_goog_resource_id: Optional[str] = Header(None)
+):
+    """
+    Reçoit une notification de modification d'un calendrier
+    
+    Google n'envoie pas de corps : le calendrier concerné est identifié par le canal
+    (X-Goog-Channel-ID) et authentifié par son jeton (X-Goog-Channel-Token). Seules les
+    données en cache de l'utilisateur concerné sont invalidées ; la réponse est immédiate.
+    """
+    try:
+        CalendarWatchService.handle_notification(
+            db,
+            channel_id=x_goog_channel_id,
+            token=x_goog_channel_token,
+            resource_state=x_goog_resource_state,
+            resource_id=x_goog_resource_id
+        )
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    # Toujours 200 pour un canal inconnu : sinon Google renvoie la notification
+    return Response(status_code=200)
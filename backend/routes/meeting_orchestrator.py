@@ -1,13 +1,16 @@
 """
 Routes pour l'orchestration de réunions avec agents LLM
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header, Query, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from models.database import get_db
 from services.meeting_orchestrator import MeetingOrchestrator
+from services.profiling_service import ProfilingService, track
 from services.s2t import s2t
+from config import Config
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime
 from dateutil import parser as date_parser
 import os
@@ -53,6 +56,55 @@ def parse_flexible_date(date_string: str) -> datetime:
                         f"Français (15/12/2025), etc.")
 
 
+def profiling_requested(profile: bool, x_profile: Optional[str]) -> bool:
+    """
+    Indique si le profilage est demandé pour la requête courante
+
+    Le profilage s'active avec l'en-tête X-Profile: 1 ou le paramètre ?profile=true,
+    et uniquement si PROFILING_ENABLED est activé dans la configuration.
+
+    Args:
+        profile: Valeur du paramètre de requête "profile"
+        x_profile: Valeur de l'en-tête X-Profile
+
+    Returns:
+        True si la requête doit être profilée
+    """
+    requested = profile or (x_profile or "").lower() in ("1", "true", "yes")
+    if requested and not Config.PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Le profilage n'est pas activé sur ce serveur")
+    return requested
+
+
+def profile_headers(profile_id: str) -> Dict[str, str]:
+    """En-têtes désignant le profil d'une requête (renvoyés aussi avec les erreurs)"""
+    return {"X-Profile-Id": profile_id, "X-Profile-Url": f"/api/orchestrator/profiles/{profile_id}"}
+
+
+def run_plan_meeting(func, profiling: bool, headers: Dict[str, str]) -> dict:
+    """
+    Exécute la planification, sous profilage si demandé
+
+    Args:
+        func: Fonction sans argument qui effectue la planification
+        profiling: True pour profiler l'exécution
+        headers: En-têtes de la réponse, complétés par X-Profile-Id et X-Profile-Url avant
+            l'exécution si profilé : à renvoyer aussi en cas d'échec ou d'exception
+
+    Returns:
+        Résultat de la planification (avec la clé "profile" si profilé)
+    """
+    if not profiling:
+        return func()
+
+    profile_id = ProfilingService.new_id()
+    headers.update(profile_headers(profile_id))
+    result, summary = ProfilingService.run(func, profile_id=profile_id)
+    summary["pstats_url"] = f"/api/orchestrator/profiles/{summary['id']}/pstats" if summary["pstats_available"] else None
+    result["profile"] = summary
+    return result
+
+
 class MeetingPlanRequest(BaseModel):
     """Modèle de requête pour planifier une réunion via texte naturel"""
     text: str
@@ -68,7 +120,10 @@ class MeetingRescheduleRequest(BaseModel):
 @router.post("/plan-meeting")
 def plan_meeting(
     request: MeetingPlanRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: Session = Depends(get_db),
+    profile: bool = Query(False),
+    x_profile: Optional[str] = Header(None)
 ):
     """
     Planifie une réunion en utilisant l'orchestrateur multi-agent
@@ -81,37 +136,49 @@ def plan_meeting(
     
     Args:
         request: Détails de la réunion à planifier
+        response: Réponse (en-têtes X-Profile-Id et X-Profile-Url si profilé)
         db: Session de base de données
+        profile: Active le profilage de la requête (si autorisé)
+        x_profile: En-tête alternatif pour activer le profilage
         
     Returns:
         Détails complets de la réunion planifiée avec invitation
     """
+    profiling = profiling_requested(profile, x_profile)
+    headers: Dict[str, str] = {}
     try:
         # Initialiser l'orchestrateur
         orchestrator = MeetingOrchestrator()
         
         # Planifier la réunion
-        result = orchestrator.plan_meeting(
-            db=db,
-            request_text=request.text
+        result = run_plan_meeting(
+            lambda: orchestrator.plan_meeting(db=db, request_text=request.text),
+            profiling,
+            headers
         )
         
         if not result.get("success"):
-            raise HTTPException(status_code=400, detail=result.get("error", "Erreur de planification"))
+            raise HTTPException(status_code=400, detail=result.get("error", "Erreur de planification"), headers=headers)
         
         # Retourner directement le résultat de l'orchestrateur
+        response.headers.update(headers)
         return result
         
+    except HTTPException:
+        raise
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Format de date invalide: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Format de date invalide: {str(e)}", headers=headers)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors de la planification: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la planification: {str(e)}", headers=headers)
 
 
 @router.post("/meeting/text")
 def meeting_from_text(
     request: MeetingPlanRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: Session = Depends(get_db),
+    profile: bool = Query(False),
+    x_profile: Optional[str] = Header(None)
 ):
     """
     Endpoint pour traiter une requête texte directement.
@@ -119,45 +186,62 @@ def meeting_from_text(
     
     Args:
         request: Contient le texte de la demande de réunion
+        response: Réponse (en-têtes X-Profile-Id et X-Profile-Url si profilé)
         db: Session de base de données
+        profile: Active le profilage de la requête (si autorisé)
+        x_profile: En-tête alternatif pour activer le profilage
         
     Returns:
         Résultat de la planification avec texte et audio
     """
+    profiling = profiling_requested(profile, x_profile)
+    headers: Dict[str, str] = {}
     try:
         orchestrator = MeetingOrchestrator()
         
         # Planifier la réunion avec le texte
-        result = orchestrator.plan_meeting(
-            db=db,
-            request_text=request.text
+        result = run_plan_meeting(
+            lambda: orchestrator.plan_meeting(db=db, request_text=request.text),
+            profiling,
+            headers
         )
         
         if not result.get("success"):
-            raise HTTPException(status_code=400, detail=result.get("error", "Erreur de planification"))
+            raise HTTPException(status_code=400, detail=result.get("error", "Erreur de planification"), headers=headers)
         
+        response.headers.update(headers)
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement: {str(e)}", headers=headers)
 
 
 @router.post("/meeting/audio")
 async def meeting_from_audio(
+    response: Response,
     audio: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    profile: bool = Query(False),
+    x_profile: Optional[str] = Header(None)
 ):
     """
     Endpoint pour traiter une requête audio.
     Convertit l'audio en texte avec s2t, puis appelle l'orchestrateur.
     
     Args:
+        response: Réponse (en-têtes X-Profile-Id et X-Profile-Url si profilé)
         audio: Fichier audio uploadé
         db: Session de base de données
+        profile: Active le profilage de la requête (si autorisé)
+        x_profile: En-tête alternatif pour activer le profilage
         
     Returns:
         Résultat de la planification avec texte et audio
     """
+    profiling = profiling_requested(profile, x_profile)
+    headers: Dict[str, str] = {}
     try:
         # Créer un répertoire temporaire pour l'audio
         temp_dir = os.path.join(os.path.dirname(__file__), '..', 'temp_audio')
@@ -189,34 +273,40 @@ async def meeting_from_audio(
         audio_path = os.path.join(temp_dir, audio_filename)
         sf.write(audio_path, data, samplerate, format='WAV')
         
-        # Convertir l'audio en texte avec s2t
-        transcribed_text = s2t(audio_path)
-        
-        # Nettoyer les guillemets JSON si présents
-        if transcribed_text.startswith('"') and transcribed_text.endswith('"'):
-            transcribed_text = transcribed_text[1:-1]
-        
-        # Supprimer le fichier temporaire
-        try:
-            os.remove(audio_path)
-        except:
-            pass
+        def transcribe_and_plan():
+            # Convertir l'audio en texte avec s2t
+            with track("groq_audio"):
+                transcribed_text = s2t(audio_path)
+            
+            # Nettoyer les guillemets JSON si présents
+            if transcribed_text.startswith('"') and transcribed_text.endswith('"'):
+                transcribed_text = transcribed_text[1:-1]
+            
+            # Supprimer le fichier temporaire
+            try:
+                os.remove(audio_path)
+            except:
+                pass
+            
+            # Planifier la réunion avec le texte transcrit
+            orchestrator = MeetingOrchestrator()
+            result = orchestrator.plan_meeting(
+                db=db,
+                request_text=transcribed_text
+            )
+            result["transcribed_text"] = transcribed_text
+            return result
         
-        # Planifier la réunion avec le texte transcrit
-        orchestrator = MeetingOrchestrator()
-        result = orchestrator.plan_meeting(
-            db=db,
-            request_text=transcribed_text
-        )
+        result = run_plan_meeting(transcribe_and_plan, profiling, headers)
         
         if not result.get("success"):
-            raise HTTPException(status_code=400, detail=result.get("error", "Erreur de planification"))
-        
-        # Ajouter le texte transcrit dans la réponse
-        result["transcribed_text"] = transcribed_text
+            raise HTTPException(status_code=400, detail=result.get("error", "Erreur de planification"), headers=headers)
         
+        response.headers.update(headers)
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Nettoyer le fichier en cas d'erreur
         try:
@@ -224,4 +314,42 @@ async def meeting_from_audio(
                 os.remove(audio_path)
         except:
             pass
-        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement audio: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement audio: {str(e)}", headers=headers)
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """
+    Récupère le résumé d'un profil (ventilation base de données / APIs externes / reste, temps CPU)
+    
+    Args:
+        profile_id: Identifiant retourné dans l'en-tête X-Profile-Id (et la clé "profile" en cas de succès)
+        
+    Returns:
+        Résumé du profil
+    """
+    if not Config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    summary = ProfilingService.get_summary(profile_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    return summary
+
+
+@router.get("/profiles/{profile_id}/pstats")
+def get_profile_pstats(profile_id: str):
+    """
+    Télécharge le fichier pstats d'un profil (lisible avec pstats, snakeviz ou flameprof)
+    
+    Args:
+        profile_id: Identifiant du profil
+        
+    Returns:
+        Fichier pstats brut
+    """
+    if not Config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    path = ProfilingService.get_pstats_path(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
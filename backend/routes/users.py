@@ -0,0 +1,44 @@
+"""
+Routes des utilisateurs : export iCalendar de leur calendrier
+"""
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+from models.database import get_read_db
+from services.calendar_export_service import CalendarExportService
+from services.user_directory import UserDirectory
+from datetime import datetime
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/{user_id}/calendar.ics")
+def export_calendar(
+    user_id: int,
+    start: Optional[datetime] = Query(None, description="Événements commençant à partir de cette date"),
+    end: Optional[datetime] = Query(None, description="Événements finissant au plus tard à cette date"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Calendrier d'un utilisateur au format iCalendar (abonnement depuis un client de calendrier)
+
+    Par défaut, le flux commence CALENDAR_FEED_PAST_DAYS jours avant aujourd'hui. Il est
+    envoyé au fil de la lecture (mémoire constante). Si If-None-Match correspond à l'ETag
+    courant, la réponse est un 304 sans lecture des événements.
+    """
+    if UserDirectory.get(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="Utilisateur introuvable")
+
+    etag = CalendarExportService.etag(db, user_id, start, end)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if CalendarExportService.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = f'inline; filename="calendar-{user_id}.ics"'
+    return StreamingResponse(
+        CalendarExportService.iter_ics(user_id, start, end),
+        media_type="text/calendar",
+        headers=headers
+    )
@@ -2,11 +2,17 @@
 Service de disponibilités
 Récupère les disponibilités des participants via les endpoints existants
 """
+import asyncio
 from sqlalchemy.orm import Session
-from services.calendar_event_service import CalendarEventService
-from services.user_service import UserService
+from models.async_database import async_session
+from models.database import read_session
+from services.calendar_event_service import CalendarEventService, AsyncCalendarEventService
+from services.meeting_service import MeetingService, AsyncMeetingService
+from services.user_directory import UserDirectory
+from services.freebusy_cache import FreeBusyCache
+from config import Config
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 
 class AvailabilityService:
@@ -20,7 +26,7 @@ class AvailabilityService:
         end_date: datetime
     ) -> List:
         """
-        Récupère tous les événements d'un utilisateur dans une période donnée
+        Récupère tous les événements d'un utilisateur chevauchant une période donnée
         
         Args:
             db: Session de base de données
@@ -31,15 +37,11 @@ class AvailabilityService:
         Returns:
             Liste des événements du calendrier
         """
-        events = CalendarEventService.get_events_by_user(db, user_id)
-        
-        # Filtrer les événements dans la période
-        filtered_events = [
-            event for event in events
-            if event.start_datetime >= start_date and event.end_datetime <= end_date
-        ]
-        
-        return filtered_events
+        # Période filtrée par la base (index user_id, start_datetime) ; un événement commencé
+        # avant start_date ou fini après end_date occupe quand même une partie de la période
+        return list(CalendarEventService.iter_events(
+            db, user_id=user_id, start=start_date, end=end_date, overlapping=True
+        ))
     
     @staticmethod
     def get_available_slots(
@@ -48,7 +50,9 @@ class AvailabilityService:
         start_date: datetime,
         end_date: datetime,
         meeting_duration_minutes: int = 60,
-        work_hours: Tuple[int, int] = (9, 18)  # 9h-18h par défaut
+        work_hours: Tuple[int, int] = (9, 18),  # 9h-18h par défaut
+        use_google_freebusy: Optional[bool] = None,
+        max_staleness_seconds: Optional[float] = None
     ) -> List[Dict]:
         """
         Trouve les créneaux disponibles pour tous les participants
@@ -60,6 +64,8 @@ class AvailabilityService:
             end_date: Date de fin de recherche
             meeting_duration_minutes: Durée de la réunion en minutes
             work_hours: Tuple (heure_debut, heure_fin) des heures de travail
+            use_google_freebusy: Ajouter les plages occupées Google Calendar (FREEBUSY_ENABLED par défaut)
+            max_staleness_seconds: Âge maximum des plages Google en cache (FREEBUSY_STALENESS_SECONDS par défaut)
             
         Returns:
             Liste des créneaux disponibles avec score de disponibilité
@@ -76,6 +82,39 @@ class AvailabilityService:
                 for event in user_events
             ])
         
+        # Réunions planifiées (une ligne par réunion, quel que soit le nombre de participants)
+        all_busy_slots.extend(MeetingService.get_busy_slots(db, participant_ids, start_date, end_date))
+        
+        if Config.FREEBUSY_ENABLED if use_google_freebusy is None else use_google_freebusy:
+            all_busy_slots.extend(AvailabilityService.get_google_busy_slots(
+                db, participant_ids, start_date, end_date, max_staleness_seconds
+            ))
+        
+        return AvailabilityService.find_free_slots(
+            all_busy_slots, start_date, end_date, meeting_duration_minutes, work_hours
+        )
+    
+    @staticmethod
+    def find_free_slots(
+        all_busy_slots: List[Tuple[datetime, datetime]],
+        start_date: datetime,
+        end_date: datetime,
+        meeting_duration_minutes: int = 60,
+        work_hours: Tuple[int, int] = (9, 18)
+    ) -> List[Dict]:
+        """
+        Génère les créneaux libres à partir des plages occupées de tous les participants
+        
+        Args:
+            all_busy_slots: Plages occupées (début, fin)
+            start_date: Date de début de recherche
+            end_date: Date de fin de recherche
+            meeting_duration_minutes: Durée de la réunion en minutes
+            work_hours: Tuple (heure_debut, heure_fin) des heures de travail
+            
+        Returns:
+            Liste des créneaux disponibles avec score de disponibilité
+        """
         # Générer les créneaux possibles
         available_slots = []
         current_date = start_date.replace(hour=work_hours[0], minute=0, second=0, microsecond=0)
@@ -125,6 +164,31 @@ class AvailabilityService:
         
         return available_slots
     
+    @staticmethod
+    def get_google_busy_slots(
+        db: Session,
+        participant_ids: List[int],
+        start_date: datetime,
+        end_date: datetime,
+        max_staleness_seconds: Optional[float] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Récupère les plages occupées Google Calendar des participants (via le cache freebusy)
+        
+        Args:
+            db: Session de base de données
+            participant_ids: Liste des IDs des participants
+            start_date: Date de début
+            end_date: Date de fin
+            max_staleness_seconds: Âge maximum accepté pour les plages en cache
+            
+        Returns:
+            Liste de (début, fin) ; vide pour les calendriers inaccessibles
+        """
+        emails = [record.email for record in UserDirectory.get_many(db, participant_ids)]
+        busy = FreeBusyCache.get_busy_blocks(emails, start_date, end_date, max_staleness_seconds)
+        return [block for blocks in busy.values() for block in blocks]
+    
     @staticmethod
     def format_slots_for_llm(slots: List[Dict]) -> str:
         """
@@ -150,7 +214,7 @@ class AvailabilityService:
     @staticmethod
     def get_participants_info(db: Session, participant_ids: List[int]) -> List[Dict]:
         """
-        Récupère les informations des participants
+        Récupère les informations des participants (depuis l'annuaire en mémoire, sans requête)
         
         Args:
             db: Session de base de données
@@ -159,14 +223,86 @@ class AvailabilityService:
         Returns:
             Liste des informations des participants
         """
-        participants = []
-        for user_id in participant_ids:
-            user = UserService.get_user_by_id(db, user_id)
-            if user:
-                participants.append({
-                    "id": user.id,
-                    "name": f"{user.first_name or ''} {user.last_name or ''}".strip() or f"User {user.id}",
-                    "email": user.email
-                })
+        return [
+            {"id": user.id, "name": user.display_name, "email": user.email}
+            for user in UserDirectory.get_many(db, participant_ids)
+        ]
+
+
+class AsyncAvailabilityService:
+    """Disponibilités calculées avec la couche asynchrone : requêtes lancées en parallèle"""
+    
+    @staticmethod
+    async def _user_busy_slots(user_id: int, start_date: datetime, end_date: datetime) -> List[Tuple[datetime, datetime]]:
+        async with async_session(read=True) as session:
+            events = await AsyncCalendarEventService.get_events_in_range(session, user_id, start_date, end_date)
+        return [(event.start_datetime, event.end_datetime) for event in events]
+    
+    @staticmethod
+    async def _meeting_busy_slots(participant_ids: List[int], start_date: datetime, end_date: datetime):
+        async with async_session(read=True) as session:
+            return await AsyncMeetingService.get_busy_slots(session, participant_ids, start_date, end_date)
+    
+    @staticmethod
+    def _google_busy_slots(participant_ids: List[int], start_date: datetime, end_date: datetime,
+                           max_staleness_seconds: Optional[float]):
+        # Cache freebusy et annuaire synchrones : exécutés dans un thread
+        with read_session() as db:
+            return AvailabilityService.get_google_busy_slots(
+                db, participant_ids, start_date, end_date, max_staleness_seconds
+            )
+    
+    @staticmethod
+    async def get_busy_slots(
+        participant_ids: List[int],
+        start_date: datetime,
+        end_date: datetime,
+        use_google_freebusy: Optional[bool] = None,
+        max_staleness_seconds: Optional[float] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Récupère en parallèle les plages occupées de tous les participants
+        
+        Une requête par participant (chacune sur sa session, donc sa connexion), une pour
+        les réunions et, si activé, l'appel freebusy Google, tous lancés en même temps.
         
-        return participants
+        Args:
+            participant_ids: Liste des IDs des participants
+            start_date: Date de début
+            end_date: Date de fin
+            use_google_freebusy: Ajouter les plages occupées Google Calendar (FREEBUSY_ENABLED par défaut)
+            max_staleness_seconds: Âge maximum des plages Google en cache
+            
+        Returns:
+            Liste de (début, fin)
+        """
+        tasks = [
+            AsyncAvailabilityService._user_busy_slots(user_id, start_date, end_date)
+            for user_id in participant_ids
+        ]
+        tasks.append(AsyncAvailabilityService._meeting_busy_slots(participant_ids, start_date, end_date))
+        if Config.FREEBUSY_ENABLED if use_google_freebusy is None else use_google_freebusy:
+            tasks.append(asyncio.to_thread(
+                AsyncAvailabilityService._google_busy_slots,
+                participant_ids, start_date, end_date, max_staleness_seconds
+            ))
+        results = await asyncio.gather(*tasks)
+        return [slot for slots in results for slot in slots]
+    
+    @staticmethod
+    async def get_available_slots(
+        participant_ids: List[int],
+        start_date: datetime,
+        end_date: datetime,
+        meeting_duration_minutes: int = 60,
+        work_hours: Tuple[int, int] = (9, 18),
+        use_google_freebusy: Optional[bool] = None,
+        max_staleness_seconds: Optional[float] = None
+    ) -> List[Dict]:
+        """Version asynchrone de AvailabilityService.get_available_slots (lectures sur la réplique)"""
+        busy_slots = await AsyncAvailabilityService.get_busy_slots(
+            participant_ids, start_date, end_date, use_google_freebusy, max_staleness_seconds
+        )
+        return AvailabilityService.find_free_slots(
+            busy_slots, start_date, end_date, meeting_duration_minutes, work_hours
+        )
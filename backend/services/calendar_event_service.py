@@ -1,6 +1,29 @@
+import base64
+import json
+from sqlalchemy import Select, and_, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.calendar_event import CalendarEvent
+from models.calendar_event_archive import CalendarEventArchive
+from services.calendar_feed_service import CalendarFeedService
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Nombre de lignes par requête pour les opérations groupées
+BULK_CHUNK_SIZE = 1000
+
+# Colonnes acceptées par bulk_create_events / bulk_update_events
+EVENT_FIELDS = (
+    "user_id", "type_id", "title", "start_datetime", "end_datetime", "is_all_day", "google_event_id", "external_uid"
+)
+
+
+def _event_rows(events: List[Dict]) -> List[Dict]:
+    """Lignes homogènes pour une insertion groupée (colonnes facultatives complétées)"""
+    return [
+        {field: event.get(field, False if field == "is_all_day" else None) for field in EVENT_FIELDS}
+        for event in events
+    ]
 
 class CalendarEventService:
     @staticmethod
@@ -12,7 +35,7 @@ class CalendarEventService:
         return db.query(CalendarEvent).filter(CalendarEvent.id == event_id).first()
 
     @staticmethod
-    def create_event(db: Session, user_id: int, type_id: int, title: str, start_datetime: datetime, end_datetime: datetime, is_all_day: bool = False):
+    def create_event(db: Session, user_id: int, type_id: int, title: str, start_datetime: datetime, end_datetime: datetime, is_all_day: bool = False, commit: bool = True):
         new_event = CalendarEvent(
             user_id=user_id,
             type_id=type_id,
@@ -22,6 +45,11 @@ class CalendarEventService:
             is_all_day=is_all_day
         )
         db.add(new_event)
+        CalendarFeedService.touch(db, [user_id])
+        if not commit:
+            # L'appelant valide la transaction lui-même ; flush pour obtenir l'id
+            db.flush()
+            return new_event
         db.commit()
         db.refresh(new_event)
         return new_event
@@ -30,9 +58,11 @@ class CalendarEventService:
     def update_event(db: Session, event_id: int, **kwargs):
         event = db.query(CalendarEvent).filter(CalendarEvent.id == event_id).first()
         if event:
+            user_ids = {event.user_id}
             for key, value in kwargs.items():
                 if hasattr(event, key):
                     setattr(event, key, value)
+            CalendarFeedService.touch(db, user_ids | {event.user_id})
             db.commit()
             db.refresh(event)
         return event
@@ -41,15 +71,332 @@ class CalendarEventService:
     def delete_event(db: Session, event_id: int):
         event = db.query(CalendarEvent).filter(CalendarEvent.id == event_id).first()
         if event:
+            CalendarFeedService.touch(db, [event.user_id])
             db.delete(event)
             db.commit()
             return True
         return False
 
+    @staticmethod
+    def _user_ids_of(db: Session, event_ids: List[int]) -> set:
+        """Propriétaires d'un ensemble d'événements (pour incrémenter la version de leur calendrier)"""
+        user_ids = set()
+        for start in range(0, len(event_ids), BULK_CHUNK_SIZE):
+            user_ids.update(db.scalars(
+                select(CalendarEvent.user_id).where(CalendarEvent.id.in_(event_ids[start:start + BULK_CHUNK_SIZE])).distinct()
+            ))
+        return user_ids
+
+    @staticmethod
+    def bulk_create_events(
+        db: Session,
+        events: List[Dict],
+        commit: bool = True,
+        touch_feeds: bool = True,
+        return_ids: bool = False
+    ) -> List[int]:
+        """
+        Crée plusieurs événements en insertions groupées, dans une seule transaction
+
+        Args:
+            db: Session de base de données
+            events: Dictionnaires user_id, type_id, title, start_datetime, end_datetime
+                (is_all_day, google_event_id et external_uid facultatifs)
+            commit: Valider la transaction (False : l'appelant la valide)
+            touch_feeds: Incrémenter la version des calendriers concernés (False : l'appelant
+                s'en charge, ex. une seule fois en fin d'import)
+            return_ids: Renvoyer les IDs créés. Par défaut, une insertion groupée par lot sur
+                tous les dialectes. Avec True, PostgreSQL, SQLite et MariaDB gardent une requête
+                par lot (RETURNING) mais MySQL, sans RETURNING, fait une insertion par ligne :
+                à réserver aux appelants qui ont besoin des IDs
+
+        Returns:
+            IDs des événements créés, dans l'ordre de `events` (liste vide si return_ids est False)
+        """
+        rows = _event_rows(events)
+        if touch_feeds:
+            CalendarFeedService.touch(db, {row["user_id"] for row in rows})
+        dialect = db.get_bind().dialect
+        ids = []
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_CHUNK_SIZE]
+            if dialect.insert_executemany_returning_sort_by_parameter_order:
+                # PostgreSQL, SQLite récent, MariaDB : insertion groupée, IDs renvoyés par
+                # l'insertion elle-même si demandés
+                if return_ids:
+                    result = db.execute(
+                        insert(CalendarEvent).returning(CalendarEvent.id, sort_by_parameter_order=True), chunk
+                    )
+                    ids.extend(result.scalars().all())
+                else:
+                    db.execute(insert(CalendarEvent), chunk)
+            elif not return_ids:
+                # MySQL : un seul INSERT ... VALUES (...), (...). Ses IDs ne sont pas déduits
+                # de LAST_INSERT_ID() : ils ne sont pas forcément consécutifs
+                # (auto_increment_increment > 1, innodb_autoinc_lock_mode = 2)
+                db.execute(insert(CalendarEvent).values(chunk))
+            else:
+                # MySQL avec IDs : insertions ORM, chaque ID est lu après son insertion
+                new_events = [CalendarEvent(**row) for row in chunk]
+                db.add_all(new_events)
+                db.flush()
+                ids.extend(event.id for event in new_events)
+        if commit:
+            db.commit()
+        return ids
+
+    @staticmethod
+    def bulk_update_events(db: Session, updates: List[Dict], commit: bool = True) -> int:
+        """
+        Met à jour plusieurs événements par clé primaire (executemany), dans une seule transaction
+
+        Args:
+            db: Session de base de données
+            updates: Dictionnaires avec "id" et les colonnes à modifier
+            commit: Valider la transaction (False : l'appelant la valide)
+
+        Returns:
+            Nombre d'événements mis à jour
+        """
+        # Les lignes d'un même executemany doivent avoir les mêmes colonnes
+        groups: Dict[tuple, List[Dict]] = {}
+        for values in updates:
+            columns = tuple(sorted(key for key in values if key in EVENT_FIELDS))
+            if columns:
+                groups.setdefault(columns, []).append(
+                    {"id": values["id"], **{key: values[key] for key in columns}}
+                )
+        if groups:
+            user_ids = CalendarEventService._user_ids_of(db, [values["id"] for values in updates])
+            user_ids.update(values["user_id"] for values in updates if "user_id" in values)
+            CalendarFeedService.touch(db, user_ids)
+        for rows in groups.values():
+            for start in range(0, len(rows), BULK_CHUNK_SIZE):
+                db.execute(update(CalendarEvent), rows[start:start + BULK_CHUNK_SIZE])
+        if commit:
+            db.commit()
+        return sum(len(rows) for rows in groups.values())
+
+    @staticmethod
+    def bulk_delete_events(db: Session, event_ids: List[int], commit: bool = True) -> int:
+        """
+        Supprime plusieurs événements (DELETE ... WHERE id IN, par lots), dans une seule transaction
+
+        Args:
+            db: Session de base de données
+            event_ids: IDs des événements à supprimer
+            commit: Valider la transaction (False : l'appelant la valide)
+
+        Returns:
+            Nombre d'événements supprimés
+        """
+        event_ids = list(event_ids)
+        CalendarFeedService.touch(db, CalendarEventService._user_ids_of(db, event_ids))
+        deleted = 0
+        for start in range(0, len(event_ids), BULK_CHUNK_SIZE):
+            result = db.execute(
+                delete(CalendarEvent).where(
+                    CalendarEvent.id.in_(event_ids[start:start + BULK_CHUNK_SIZE])
+                ).execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount or 0
+        if commit:
+            db.commit()
+        return deleted
+
     @staticmethod
     def get_events_by_user(db: Session, user_id: int):
         return db.query(CalendarEvent).filter(CalendarEvent.user_id == user_id).all()
 
     @staticmethod
     def get_events_by_type(db: Session, type_id: int):
-        return db.query(CalendarEvent).filter(CalendarEvent.type_id == type_id).all()
\ No newline at end of file
+        return db.query(CalendarEvent).filter(CalendarEvent.type_id == type_id).all()
+
+    @staticmethod
+    def _keyset(archived: bool):
+        """Table lue et colonne départageant les événements de même début (clé primaire)"""
+        # Dans l'archive, `id` (ID d'origine) peut être réattribué : archive_id est unique
+        if archived:
+            return CalendarEventArchive, CalendarEventArchive.archive_id
+        return CalendarEvent, CalendarEvent.id
+
+    @staticmethod
+    def events_query(
+        user_id: Optional[int] = None,
+        type_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        archived: bool = False,
+        overlapping: bool = False
+    ) -> Select:
+        """
+        Requête des événements filtrés, triés par (start_datetime, id) ((start_datetime, archive_id) dans l'archive)
+
+        Args:
+            user_id: Événements d'un utilisateur
+            type_id: Événements d'un type
+            start: Événements commençant à partir de cette date
+            end: Événements finissant au plus tard à cette date
+            archived: Lire les événements archivés (calendar_events_archive) au lieu des événements courants
+            overlapping: Événements chevauchant [start, end] (finissant après start, commençant
+                avant end) au lieu de ceux contenus dans la période, comme
+                MeetingService.busy_slots_query
+        """
+        model, tiebreaker = CalendarEventService._keyset(archived)
+        query = select(model)
+        if user_id is not None:
+            query = query.where(model.user_id == user_id)
+        if type_id is not None:
+            query = query.where(model.type_id == type_id)
+        if overlapping:
+            if start is not None:
+                query = query.where(model.end_datetime > start)
+            if end is not None:
+                query = query.where(model.start_datetime < end)
+        else:
+            if start is not None:
+                query = query.where(model.start_datetime >= start)
+            if end is not None:
+                query = query.where(model.end_datetime <= end)
+        return query.order_by(model.start_datetime, tiebreaker)
+
+    @staticmethod
+    def encode_cursor(event: CalendarEvent) -> str:
+        """Curseur opaque désignant la position juste après `event` (courant ou archivé)"""
+        key = event.archive_id if isinstance(event, CalendarEventArchive) else event.id
+        payload = json.dumps([event.start_datetime.isoformat(), key])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """
+        Position (start_datetime, id) encodée dans un curseur
+
+        Raises:
+            ValueError: Si le curseur est invalide
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            start, event_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return datetime.fromisoformat(start), int(event_id)
+        except Exception as e:
+            raise ValueError(f"Curseur invalide: {cursor}") from e
+
+    @staticmethod
+    def list_events_page(
+        db: Session,
+        user_id: Optional[int] = None,
+        type_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        archived: bool = False
+    ) -> Tuple[List[CalendarEvent], Optional[str]]:
+        """
+        Page d'événements par pagination keyset (coût constant quelle que soit la page)
+
+        Args:
+            db: Session de base de données
+            user_id, type_id, start, end: Filtres (voir events_query)
+            cursor: Curseur renvoyé par la page précédente (None pour la première page)
+            limit: Nombre maximum d'événements
+            archived: Paginer les événements archivés
+
+        Returns:
+            Tuple (événements, curseur de la page suivante ou None si c'est la dernière)
+
+        Raises:
+            ValueError: Si le curseur est invalide
+        """
+        model, tiebreaker = CalendarEventService._keyset(archived)
+        query = CalendarEventService.events_query(user_id, type_id, start, end, archived)
+        if cursor:
+            after_start, after_id = CalendarEventService.decode_cursor(cursor)
+            query = query.where(or_(
+                model.start_datetime > after_start,
+                and_(model.start_datetime == after_start, tiebreaker > after_id)
+            ))
+        events = db.execute(query.limit(limit + 1)).scalars().all()
+        if len(events) > limit:
+            return events[:limit], CalendarEventService.encode_cursor(events[limit - 1])
+        return events, None
+
+    @staticmethod
+    def iter_events(
+        db: Session,
+        user_id: Optional[int] = None,
+        type_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+        overlapping: bool = False,
+        archived: bool = False
+    ) -> Iterator[CalendarEvent]:
+        """
+        Parcourt les événements filtrés en mémoire constante (yield_per, curseur serveur)
+
+        Les lignes sont lues par lots de `batch_size` ; ne pas garder de référence aux
+        événements déjà traités pour que la mémoire reste bornée. Voir events_query pour
+        `overlapping` et `archived`.
+        """
+        query = CalendarEventService.events_query(
+            user_id, type_id, start, end, archived=archived, overlapping=overlapping
+        )
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        for event in result.scalars():
+            yield event
+
+
+class AsyncCalendarEventService:
+    """Versions asynchrones (AsyncSession) de CalendarEventService"""
+
+    @staticmethod
+    async def get_event_by_id(session: AsyncSession, event_id: int):
+        return await session.get(CalendarEvent, event_id)
+
+    @staticmethod
+    async def get_events_by_user(session: AsyncSession, user_id: int):
+        result = await session.execute(select(CalendarEvent).where(CalendarEvent.user_id == user_id))
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_events_in_range(session: AsyncSession, user_id: int, start_date: datetime, end_date: datetime):
+        """Événements d'un utilisateur chevauchant [start_date, end_date] (filtrés par la base)"""
+        result = await session.execute(
+            CalendarEventService.events_query(user_id=user_id, start=start_date, end=end_date, overlapping=True)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def bulk_create_events(
+        session: AsyncSession,
+        events: List[Dict],
+        commit: bool = True,
+        return_ids: bool = False
+    ) -> List[int]:
+        """Voir CalendarEventService.bulk_create_events"""
+        rows = _event_rows(events)
+        await CalendarFeedService.touch_async(session, {row["user_id"] for row in rows})
+        dialect = session.bind.dialect
+        ids = []
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_CHUNK_SIZE]
+            if dialect.insert_executemany_returning_sort_by_parameter_order:
+                if return_ids:
+                    result = await session.execute(
+                        insert(CalendarEvent).returning(CalendarEvent.id, sort_by_parameter_order=True), chunk
+                    )
+                    ids.extend(result.scalars().all())
+                else:
+                    await session.execute(insert(CalendarEvent), chunk)
+            elif not return_ids:
+                await session.execute(insert(CalendarEvent).values(chunk))
+            else:
+                new_events = [CalendarEvent(**row) for row in chunk]
+                session.add_all(new_events)
+                await session.flush()
+                ids.extend(event.id for event in new_events)
+        if commit:
+            await session.commit()
+        return ids
@@ -0,0 +1,163 @@
+"""
+Export du calendrier d'un utilisateur au format iCalendar (RFC 5545)
+
+Le flux est produit par un générateur : événements (calendar_events_archive si la période
+commence avant la date d'archivage, puis calendar_events) puis réunions de l'utilisateur,
+lus par lots sur un curseur serveur (yield_per) et envoyés par blocs, en mémoire constante
+quelle que soit la taille du calendrier.
+
+L'ETag dépend de la version du calendrier (calendar_feed_versions) et de la période
+demandée : le vérifier ne lit qu'une ligne, sans toucher aux événements.
+"""
+import hashlib
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from config import Config
+from models.database import read_session
+from services.calendar_event_service import CalendarEventService
+from services.calendar_feed_service import CalendarFeedService
+from services.event_archive_service import EventArchiveService
+from services.meeting_service import MeetingService
+
+PRODID = "-//Meeting Planner//Calendar export//FR"
+UID_DOMAIN = "meeting-planner"
+# À incrémenter quand le contenu produit change (invalide les ETags existants)
+FEED_FORMAT_VERSION = 1
+# Taille approximative des blocs envoyés au client (octets)
+CHUNK_SIZE = 64 * 1024
+# DTSTAMP d'un calendrier qui n'a jamais été modifié
+EPOCH_STAMP = "19700101T000000Z"
+
+
+def _escape(value: str) -> str:
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Ligne de contenu repliée à 75 octets (continuation : CRLF + espace)"""
+    if len(line.encode("utf-8")) <= 75:
+        return line + "\r\n"
+    parts, current, size = [], [], 0
+    for char in line:
+        length = len(char.encode("utf-8"))
+        if size + length > (75 if not parts else 74):
+            parts.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += length
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc(value: datetime) -> str:
+    """Datetime local naïf (CALENDAR_TIMEZONE) en DATE-TIME UTC"""
+    aware = value.replace(tzinfo=ZoneInfo(Config.CALENDAR_TIMEZONE))
+    return aware.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _vevent(uid: str, title: str, start: datetime, end: datetime, is_all_day: bool, dtstamp: str) -> str:
+    if is_all_day:
+        # DTEND exclusif : au moins le lendemain du début
+        end_day = max(end.date(), start.date() + timedelta(days=1))
+        dates = [f"DTSTART;VALUE=DATE:{start:%Y%m%d}", f"DTEND;VALUE=DATE:{end_day:%Y%m%d}"]
+    else:
+        dates = [f"DTSTART:{_utc(start)}", f"DTEND:{_utc(end)}"]
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{dtstamp}", *dates, f"SUMMARY:{_escape(title)}", "END:VEVENT"]
+    return "".join(_fold(line) for line in lines)
+
+
+class CalendarExportService:
+    @staticmethod
+    def window(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, Optional[datetime]]:
+        """Période exportée (par défaut depuis CALENDAR_FEED_PAST_DAYS jours, sans limite de fin)"""
+        if start is None:
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            start = today - timedelta(days=Config.CALENDAR_FEED_PAST_DAYS)
+        return start, end
+
+    @staticmethod
+    def etag(db: Session, user_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> str:
+        """
+        ETag du flux d'un utilisateur pour une période (une requête sur calendar_feed_versions)
+
+        Args:
+            db: Session de base de données
+            user_id: ID de l'utilisateur
+            start, end: Période demandée (voir window)
+
+        Returns:
+            ETag fort, entre guillemets
+        """
+        start, end = CalendarExportService.window(start, end)
+        version, updated_at = CalendarFeedService.get_version(db, user_id)
+        key = f"{FEED_FORMAT_VERSION}|{user_id}|{version}|{updated_at}|{start.isoformat()}|{end.isoformat() if end else ''}"
+        return f'"cal-{user_id}-{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """Vrai si l'en-tête If-None-Match désigne `etag` (comparaison faible, RFC 9110)"""
+        if not if_none_match:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+    @staticmethod
+    def iter_ics(
+        user_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[str]:
+        """
+        Flux iCalendar du calendrier d'un utilisateur, par blocs d'environ CHUNK_SIZE octets
+
+        Ouvre sa propre session de lecture (réplique) : le générateur est consommé pendant
+        l'envoi de la réponse, après la fin de la route.
+
+        Args:
+            user_id: ID de l'utilisateur
+            start, end: Période exportée (voir window)
+            batch_size: Lignes lues par lot sur le curseur serveur
+        """
+        start, end = CalendarExportService.window(start, end)
+        with read_session() as db:
+            # DTSTAMP stable d'une version à l'autre : même contenu pour un même ETag
+            _, updated_at = CalendarFeedService.get_version(db, user_id)
+            dtstamp = _utc(updated_at) if updated_at else EPOCH_STAMP
+
+            # Événements archivés d'abord (les plus anciens) ; l'UID garde l'id d'origine pour
+            # qu'un événement ne change pas d'identité chez le client quand il est archivé
+            sources = [True, False] if start < EventArchiveService.cutoff() else [False]
+            blocks = itertools.chain(
+                (
+                    _vevent(f"event-{event.id}@{UID_DOMAIN}", event.title, event.start_datetime,
+                            event.end_datetime, event.is_all_day, dtstamp)
+                    for archived in sources
+                    for event in CalendarEventService.iter_events(
+                        db, user_id=user_id, start=start, end=end, batch_size=batch_size, archived=archived
+                    )
+                ),
+                (
+                    _vevent(f"meeting-{meeting.id}@{UID_DOMAIN}", meeting.title, meeting.start_datetime,
+                            meeting.end_datetime, meeting.is_all_day, dtstamp)
+                    for meeting in MeetingService.iter_user_meetings(
+                        db, user_id, start=start, end=end, batch_size=batch_size
+                    )
+                ),
+            )
+            buffer = [
+                "BEGIN:VCALENDAR\r\n", "VERSION:2.0\r\n", _fold(f"PRODID:{PRODID}"),
+                "CALSCALE:GREGORIAN\r\n", "METHOD:PUBLISH\r\n", _fold(f"X-WR-CALNAME:Calendrier {user_id}"),
+            ]
+            size = 0
+            for block in blocks:
+                buffer.append(block)
+                size += len(block)
+                if size >= CHUNK_SIZE:
+                    yield "".join(buffer)
+                    buffer, size = [], 0
+            buffer.append("END:VCALENDAR\r\n")
+            yield "".join(buffer)
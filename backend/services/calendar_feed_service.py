@@ -0,0 +1,92 @@
+"""
+Versions des calendriers des utilisateurs
+
+Chaque écriture sur les événements (calendar_events) ou les réunions d'un utilisateur
+incrémente sa ligne de calendar_feed_versions, dans la même transaction. L'export ICS
+en déduit son ETag en lisant une seule ligne : un flux inchangé est servi en 304 sans
+lire les événements.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.calendar_feed_version import CalendarFeedVersion
+
+# Utilisateurs par requête d'incrémentation
+TOUCH_CHUNK_SIZE = 1000
+
+
+def _touch_statements(dialect_name: str, user_ids: List[int]) -> List:
+    """INSERT ... ON CONFLICT/ON DUPLICATE KEY qui crée ou incrémente les versions"""
+    now = datetime.now()
+    statements = []
+    for start in range(0, len(user_ids), TOUCH_CHUNK_SIZE):
+        rows = [{"user_id": user_id, "version": 1, "updated_at": now} for user_id in user_ids[start:start + TOUCH_CHUNK_SIZE]]
+        if dialect_name == "mysql":
+            statement = mysql.insert(CalendarFeedVersion).values(rows)
+            statements.append(statement.on_duplicate_key_update(
+                version=CalendarFeedVersion.version + 1, updated_at=statement.inserted.updated_at
+            ))
+        else:
+            dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+            statement = dialect_insert(CalendarFeedVersion).values(rows)
+            statements.append(statement.on_conflict_do_update(
+                index_elements=[CalendarFeedVersion.user_id],
+                set_={"version": CalendarFeedVersion.version + 1, "updated_at": statement.excluded.updated_at}
+            ))
+    return statements
+
+
+class CalendarFeedService:
+    @staticmethod
+    def touch(db: Session, user_ids: Iterable[int]):
+        """
+        Signale la modification du calendrier de plusieurs utilisateurs
+
+        Ne valide pas la transaction : à appeler dans celle qui modifie les événements. Les
+        lignes sont verrouillées dans l'ordre des IDs pour éviter les interblocages.
+        """
+        user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not user_ids:
+            return
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name not in ("mysql", "postgresql", "sqlite"):
+            CalendarFeedService._touch_generic(db, user_ids)
+            return
+        for statement in _touch_statements(dialect_name, user_ids):
+            db.execute(statement)
+
+    @staticmethod
+    def _touch_generic(db: Session, user_ids: List[int]):
+        now = datetime.now()
+        existing = set(db.scalars(select(CalendarFeedVersion.user_id).where(CalendarFeedVersion.user_id.in_(user_ids))))
+        if existing:
+            db.execute(
+                update(CalendarFeedVersion).where(CalendarFeedVersion.user_id.in_(existing)).values(
+                    version=CalendarFeedVersion.version + 1, updated_at=now
+                ).execution_options(synchronize_session=False)
+            )
+        db.add_all(
+            CalendarFeedVersion(user_id=user_id, version=1, updated_at=now)
+            for user_id in user_ids if user_id not in existing
+        )
+        db.flush()
+
+    @staticmethod
+    async def touch_async(session: AsyncSession, user_ids: Iterable[int]):
+        """Voir touch (MySQL, PostgreSQL et SQLite)"""
+        user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+        for statement in _touch_statements(session.bind.dialect.name, user_ids) if user_ids else []:
+            await session.execute(statement)
+
+    @staticmethod
+    def get_version(db: Session, user_id: int) -> Tuple[int, Optional[datetime]]:
+        """Version du calendrier d'un utilisateur et date de sa dernière modification ((0, None) s'il n'a jamais changé)"""
+        row = db.execute(
+            select(CalendarFeedVersion.version, CalendarFeedVersion.updated_at).where(
+                CalendarFeedVersion.user_id == user_id
+            )
+        ).first()
+        return (row[0], row[1]) if row else (0, None)
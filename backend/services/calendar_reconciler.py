@@ -0,0 +1,217 @@
+"""
+Réconciliation des réunions locales avec leurs événements Google Calendar
+
+Compare l'état local (réunion et participants, ou anciens événements par participant,
+liés par google_event_links) avec
+l'état Google, récupéré par requêtes batch events.get en réponse partielle, puis corrige
+les écarts par des events.patch groupés. La base locale fait foi :
+- titre ou horaires différents : Google est remis à jour ;
+- participant retiré de la réunion (ou dont l'événement local a été supprimé) : retiré des invités Google ;
+- réunion supprimée localement pour tous : l'événement Google est annulé ;
+- événement supprimé côté Google : le lien est marqué "remote_deleted" (rien n'est recréé).
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from config import Config
+from models.calendar_event import CalendarEvent
+from models.database import SessionLocal
+from models.google_event_link import GoogleEventLink
+from models.meeting import Meeting
+from models.meeting_attendee import MeetingAttendee
+from models.user import User
+from services.google_calendar_service import GoogleCalendarService
+from services.google_client_factory import build_calendar_service
+
+logger = logging.getLogger(__name__)
+
+
+class CalendarReconciler:
+    """Détecte et corrige les écarts entre réunions locales et événements Google"""
+
+    @staticmethod
+    def _same_time(remote: Dict, local: datetime) -> bool:
+        value = remote.get('dateTime') if remote else None
+        if not value:
+            return False
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(ZoneInfo(Config.CALENDAR_TIMEZONE)).replace(tzinfo=None)
+        return parsed == local
+
+    @staticmethod
+    def _expected_patch(remote: Dict, event: Union[Meeting, CalendarEvent], emails: List[str]) -> Dict:
+        """Champs Google à corriger pour refléter l'état local (vide si aucun écart)"""
+        patch = {}
+        if (remote.get('summary') or '') != (event.title or ''):
+            patch['summary'] = event.title
+        if not CalendarReconciler._same_time(remote.get('start'), event.start_datetime):
+            patch['start'] = {'dateTime': event.start_datetime.isoformat(), 'timeZone': Config.CALENDAR_TIMEZONE}
+        if not CalendarReconciler._same_time(remote.get('end'), event.end_datetime):
+            patch['end'] = {'dateTime': event.end_datetime.isoformat(), 'timeZone': Config.CALENDAR_TIMEZONE}
+        remote_emails = {attendee.get('email', '').lower() for attendee in remote.get('attendees', [])}
+        if remote_emails != {email.lower() for email in emails}:
+            patch['attendees'] = [{'email': email} for email in emails]
+        return patch
+
+    @staticmethod
+    def reconcile(
+        db: Session,
+        google_event_ids: Optional[List[str]] = None,
+        calendar_service: Optional[GoogleCalendarService] = None
+    ) -> Dict[str, int]:
+        """
+        Réconcilie les réunions liées à Google Calendar
+
+        Args:
+            db: Session de base de données
+            google_event_ids: Réunions à vérifier (toutes celles non supprimées côté Google par défaut)
+            calendar_service: Service Google Calendar (celui du mode de simulation par défaut)
+
+        Returns:
+            Statistiques : réunions vérifiées, corrigées, annulées, supprimées côté Google, en erreur
+        """
+        calendar_service = calendar_service or build_calendar_service()
+        query = db.query(GoogleEventLink).filter(GoogleEventLink.status == "synced")
+        if google_event_ids is not None:
+            query = query.filter(GoogleEventLink.google_event_id.in_(google_event_ids))
+        links = query.order_by(GoogleEventLink.id).all()
+
+        stats = {"checked": 0, "patched": 0, "cancelled": 0, "remote_deleted": 0, "errors": 0}
+        if not links:
+            return stats
+
+        # Une réunion = un événement Google et les événements locaux de ses participants
+        by_calendar = defaultdict(lambda: defaultdict(list))
+        for link in links:
+            by_calendar[link.google_calendar_id][link.google_event_id].append(link)
+
+        local_ids = [link.calendar_event_id for link in links if link.calendar_event_id is not None]
+        local_events = {
+            event.id: event
+            for event in db.query(CalendarEvent).filter(CalendarEvent.id.in_(local_ids))
+        } if local_ids else {}
+        meeting_ids = {link.meeting_id for link in links if link.meeting_id is not None}
+        meetings_by_id = {
+            meeting.id: meeting
+            for meeting in db.query(Meeting).filter(Meeting.id.in_(meeting_ids))
+        } if meeting_ids else {}
+        attendees = set(
+            db.query(MeetingAttendee.meeting_id, MeetingAttendee.user_id).filter(
+                MeetingAttendee.meeting_id.in_(meeting_ids)
+            ).all()
+        ) if meeting_ids else set()
+        emails = dict(db.query(User.id, User.email).filter(User.id.in_({link.user_id for link in links})).all())
+
+        now = datetime.now()
+        for calendar_id, meetings in by_calendar.items():
+            remote_events = calendar_service.batch_get_events(list(meetings), calendar_id)
+            patches = {}
+            etags = {}
+            for google_event_id, meeting_links in meetings.items():
+                stats["checked"] += 1
+                if google_event_id not in remote_events:
+                    stats["errors"] += 1
+                    continue
+
+                remote = remote_events[google_event_id]
+                if remote is None or remote.get('status') == 'cancelled':
+                    for link in meeting_links:
+                        link.status = "remote_deleted"
+                        link.last_reconciled_at = now
+                    stats["remote_deleted"] += 1
+                    logger.warning(
+                        "Réunion supprimée côté Google", extra={"stage": "reconcile", "google_event_id": google_event_id}
+                    )
+                    continue
+
+                alive = [
+                    link for link in meeting_links
+                    if link.calendar_event_id in local_events
+                    or (link.meeting_id in meetings_by_id and (link.meeting_id, link.user_id) in attendees)
+                ]
+                if not alive:
+                    patches[google_event_id] = {'status': 'cancelled'}
+                    continue
+
+                if alive[0].meeting_id in meetings_by_id:
+                    reference = meetings_by_id[alive[0].meeting_id]
+                else:
+                    reference = local_events[alive[0].calendar_event_id]
+                patch = CalendarReconciler._expected_patch(
+                    remote, reference, [emails[link.user_id] for link in alive if link.user_id in emails]
+                )
+                if patch:
+                    patches[google_event_id] = patch
+                    # Ne pas écraser une modification faite dans Google depuis la lecture
+                    etags[google_event_id] = remote.get('etag')
+                else:
+                    for link in meeting_links:
+                        link.last_reconciled_at = now
+
+            if patches:
+                results = calendar_service.batch_patch_events(patches, calendar_id, etags)
+                for google_event_id, ok in results.items():
+                    if not ok:
+                        stats["errors"] += 1
+                        continue
+                    cancelled = patches[google_event_id].get('status') == 'cancelled'
+                    stats["cancelled" if cancelled else "patched"] += 1
+                    for link in meetings[google_event_id]:
+                        link.last_reconciled_at = now
+                        if cancelled:
+                            link.status = "remote_deleted"
+
+        db.commit()
+        logger.info("Réconciliation terminée", extra=dict(stats, stage="reconcile"))
+        return stats
+
+
+class CalendarReconcilerWorker:
+    """Thread de fond qui lance périodiquement la réconciliation"""
+
+    _instance: Optional["CalendarReconcilerWorker"] = None
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="calendar-reconciler", daemon=True)
+
+    @classmethod
+    def start(cls):
+        """Démarre le worker du processus (sans effet s'il tourne déjà)"""
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance._thread.start()
+            logger.info("Worker de réconciliation démarré", extra={"stage": "reconcile"})
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0):
+        """Arrête le worker après la réconciliation en cours"""
+        if cls._instance is not None:
+            cls._instance._stop.set()
+            cls._instance._thread.join(timeout)
+            cls._instance = None
+
+    def _run(self):
+        while not self._stop.wait(Config.RECONCILER_INTERVAL_SECONDS):
+            db = SessionLocal()
+            try:
+                CalendarReconciler.reconcile(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Erreur du worker de réconciliation", extra={"stage": "reconcile"})
+            finally:
+                db.close()
+
+
+if __name__ == '__main__':
+    # Réconciliation ponctuelle (ex: tâche cron) : python -m services.calendar_reconciler
+    session = SessionLocal()
+    try:
+        print(CalendarReconciler.reconcile(session))
+    finally:
+        session.close()
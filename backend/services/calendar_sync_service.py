@@ -0,0 +1,350 @@
+"""
+Synchronisation incrémentale Google Calendar -> calendar_events
+
+Pour chaque utilisateur, un premier import complet puis des appels events.list avec
+syncToken : seuls les événements modifiés depuis la synchronisation précédente sont
+récupérés, puis appliqués en masse page par page (insertions, mises à jour, suppressions).
+Les événements Google des réunions créées par l'application ne sont pas importés : ils
+sont déjà dans meetings (une copie par participant doublerait la réunion).
+Les disponibilités restent calculées sur la base locale, sans appel à Google.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, date
+from typing import Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from googleapiclient.errors import HttpError
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from config import Config
+from models.calendar_event import CalendarEvent
+from models.calendar_sync_state import CalendarSyncState
+from models.database import SessionLocal
+from models.google_event_link import GoogleEventLink
+from models.meeting import Meeting
+from models.user import User
+from services.calendar_event_service import CalendarEventService
+from services.calendar_feed_service import CalendarFeedService
+from services.event_archive_service import EventArchiveService
+from services.google_calendar_service import GoogleCalendarService
+from services.google_client_factory import build_calendar_service
+
+logger = logging.getLogger(__name__)
+
+# Taille des lots pour les requêtes IN (...)
+CHUNK_SIZE = 500
+
+
+class CalendarSyncService:
+    """Service pour importer les événements Google Calendar des utilisateurs"""
+
+    @staticmethod
+    def _to_local(value: Dict) -> Tuple[datetime, bool]:
+        """Convertit un champ start/end de l'API en datetime local naïf (et indique s'il s'agit d'un jour entier)"""
+        if 'dateTime' in value:
+            parsed = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(ZoneInfo(Config.CALENDAR_TIMEZONE)).replace(tzinfo=None)
+            return parsed, False
+        day = date.fromisoformat(value['date'])
+        return datetime(day.year, day.month, day.day), True
+
+    @staticmethod
+    def _is_busy(item: Dict) -> bool:
+        """Vrai si l'événement occupe réellement le créneau de l'utilisateur"""
+        if item.get('status') == 'cancelled' or item.get('transparency') == 'transparent':
+            return False
+        for attendee in item.get('attendees', []):
+            if attendee.get('self') and attendee.get('responseStatus') == 'declined':
+                return False
+        return 'start' in item and 'end' in item
+
+    @staticmethod
+    def get_calendar_id(user: User) -> str:
+        """Calendrier Google d'un utilisateur (son email, partagé avec le compte authentifié)"""
+        return user.email
+
+    @staticmethod
+    def apply_changes(db: Session, user_id: int, items: List[Dict], seen: Optional[Set[str]] = None) -> Dict[str, int]:
+        """
+        Applique en masse une page de changements Google sur les événements d'un utilisateur
+
+        Ne valide pas la transaction : l'appelant enregistre le jeton dans la même transaction.
+
+        Args:
+            db: Session de base de données
+            user_id: ID de l'utilisateur
+            items: Événements bruts d'une page de events.list
+            seen: Import complet : reçoit les IDs Google des événements présents dans la page
+                (voir delete_missing)
+
+        Returns:
+            Nombre d'événements insérés, mis à jour et supprimés
+        """
+        upserts = {}
+        removed = set()
+        # Événements terminés avant la date d'archivage : gérés dans l'archive, pas réimportés
+        archive_cutoff = EventArchiveService.cutoff()
+        archived = set()
+        # Événements Google créés par l'application pour ses réunions : déjà dans meetings
+        own = CalendarSyncService._own_event_ids(db, [item['id'] for item in items])
+        for item in items:
+            if CalendarSyncService._is_busy(item) and item['id'] not in own:
+                start, is_all_day = CalendarSyncService._to_local(item['start'])
+                end, _ = CalendarSyncService._to_local(item['end'])
+                if end < archive_cutoff:
+                    archived.add(item['id'])
+                    removed.discard(item['id'])
+                    upserts.pop(item['id'], None)
+                    continue
+                archived.discard(item['id'])
+                upserts[item['id']] = {
+                    "title": (item.get('summary') or 'Occupé')[:200],
+                    "start_datetime": start,
+                    "end_datetime": end,
+                    "is_all_day": is_all_day,
+                }
+                removed.discard(item['id'])
+            else:
+                removed.add(item['id'])
+                upserts.pop(item['id'], None)
+                archived.discard(item['id'])
+        if seen is not None:
+            seen.update(upserts)
+            seen.update(archived)
+
+        existing = {}
+        ids = list(upserts)
+        for start in range(0, len(ids), CHUNK_SIZE):
+            existing.update({
+                event.google_event_id: event
+                for event in db.query(CalendarEvent).filter(
+                    CalendarEvent.user_id == user_id,
+                    CalendarEvent.google_event_id.in_(ids[start:start + CHUNK_SIZE])
+                )
+            })
+
+        # Mises à jour : seulement les lignes dont le contenu a changé
+        updated = CalendarEventService.bulk_update_events(db, [
+            dict(values, id=existing[google_id].id)
+            for google_id, values in upserts.items()
+            if google_id in existing
+            and any(getattr(existing[google_id], key) != value for key, value in values.items())
+        ], commit=False)
+
+        new_rows = [
+            dict(values, user_id=user_id, type_id=Config.GOOGLE_SYNC_EVENT_TYPE_ID, google_event_id=google_id)
+            for google_id, values in upserts.items() if google_id not in existing
+        ]
+        CalendarEventService.bulk_create_events(db, new_rows, commit=False)
+
+        deleted = CalendarSyncService._delete_google_events(db, user_id, list(removed), archive=True)
+        return {"inserted": len(new_rows), "updated": updated, "deleted": deleted}
+
+    @staticmethod
+    def _own_event_ids(db: Session, google_event_ids: List[str]) -> Set[str]:
+        """IDs Google qui sont ceux de réunions de l'application (meetings, google_event_links)"""
+        own = set()
+        for start in range(0, len(google_event_ids), CHUNK_SIZE):
+            chunk = google_event_ids[start:start + CHUNK_SIZE]
+            own.update(db.scalars(select(Meeting.google_event_id).where(Meeting.google_event_id.in_(chunk))))
+            own.update(db.scalars(
+                select(GoogleEventLink.google_event_id).where(GoogleEventLink.google_event_id.in_(chunk)).distinct()
+            ))
+        return own
+
+    @staticmethod
+    def delete_missing(db: Session, user_id: int, seen: Set[str]) -> int:
+        """
+        Fin d'un import complet : supprime les événements importés absents de Google
+
+        Args:
+            db: Session de base de données
+            user_id: ID de l'utilisateur
+            seen: IDs Google collectés par apply_changes sur toutes les pages
+
+        Returns:
+            Nombre d'événements supprimés
+        """
+        known = db.scalars(
+            select(CalendarEvent.google_event_id).where(
+                CalendarEvent.user_id == user_id,
+                CalendarEvent.google_event_id.isnot(None)
+            )
+        ).all()
+        return CalendarSyncService._delete_google_events(
+            db, user_id, [google_id for google_id in known if google_id not in seen], archive=False
+        )
+
+    @staticmethod
+    def _delete_google_events(db: Session, user_id: int, google_event_ids: List[str], archive: bool) -> int:
+        """Supprime par lots des événements importés (et de l'archive si `archive`)"""
+        deleted = 0
+        for start in range(0, len(google_event_ids), CHUNK_SIZE):
+            chunk = google_event_ids[start:start + CHUNK_SIZE]
+            result = db.execute(
+                delete(CalendarEvent).where(
+                    CalendarEvent.user_id == user_id,
+                    CalendarEvent.google_event_id.in_(chunk)
+                ).execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount or 0
+            if archive:
+                deleted += EventArchiveService.delete_archived_google_events(db, user_id, chunk)
+        if deleted:
+            CalendarFeedService.touch(db, [user_id])
+        return deleted
+
+    @staticmethod
+    def _apply_pages(db: Session, user_id: int, pages, full_sync: bool) -> Tuple[Dict[str, int], Optional[str]]:
+        """Applique les pages de iter_event_changes au fil de l'eau ; renvoie les statistiques et le jeton final"""
+        stats = {"inserted": 0, "updated": 0, "deleted": 0, "changes": 0}
+        seen: Optional[Set[str]] = set() if full_sync else None
+        next_token = None
+        for items, page_token in pages:
+            for key, value in CalendarSyncService.apply_changes(db, user_id, items, seen=seen).items():
+                stats[key] += value
+            stats["changes"] += len(items)
+            next_token = page_token or next_token
+        if full_sync:
+            stats["deleted"] += CalendarSyncService.delete_missing(db, user_id, seen)
+        return stats, next_token
+
+    @staticmethod
+    def sync_user(db: Session, user: User, calendar_service: Optional[GoogleCalendarService] = None) -> Dict:
+        """
+        Synchronise le calendrier Google d'un utilisateur
+
+        Utilise le jeton de synchronisation enregistré s'il existe ; sinon (ou si Google
+        l'a invalidé, HTTP 410) fait un import complet depuis GOOGLE_SYNC_PAST_DAYS.
+
+        Args:
+            db: Session de base de données
+            user: Utilisateur à synchroniser
+            calendar_service: Service Google Calendar (celui du mode de simulation par défaut)
+
+        Returns:
+            Statistiques de la synchronisation
+        """
+        calendar_service = calendar_service or build_calendar_service()
+        state = db.query(CalendarSyncState).filter(CalendarSyncState.user_id == user.id).first()
+        if state is None:
+            state = CalendarSyncState(user_id=user.id, google_calendar_id=CalendarSyncService.get_calendar_id(user))
+            db.add(state)
+
+        time_min = datetime.now() - timedelta(days=Config.GOOGLE_SYNC_PAST_DAYS)
+        full_sync = not state.sync_token
+        try:
+            try:
+                stats, next_token = CalendarSyncService._apply_pages(db, user.id, calendar_service.iter_event_changes(
+                    state.google_calendar_id, sync_token=state.sync_token, time_min=time_min
+                ), full_sync)
+            except HttpError as error:
+                if error.resp.status != 410 or full_sync:
+                    raise
+                # Jeton expiré : Google impose un nouvel import complet
+                logger.info("Jeton de synchronisation expiré", extra={"stage": "calendar_sync", "user_id": user.id})
+                db.rollback()
+                full_sync = True
+                stats, next_token = CalendarSyncService._apply_pages(db, user.id, calendar_service.iter_event_changes(
+                    state.google_calendar_id, time_min=time_min
+                ), full_sync)
+
+            now = datetime.now()
+            state.sync_token = next_token
+            state.last_synced_at = now
+            state.last_error = None
+            state.needs_sync = False
+            if full_sync:
+                state.last_full_sync_at = now
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(
+                "Erreur de synchronisation Google Calendar: %s", str(e),
+                extra={"stage": "calendar_sync", "user_id": user.id}
+            )
+            state = db.query(CalendarSyncState).filter(CalendarSyncState.user_id == user.id).first()
+            if state is not None:
+                state.last_error = str(e)
+                db.commit()
+            return {"user_id": user.id, "error": str(e)}
+
+        stats.update(user_id=user.id, full_sync=full_sync)
+        logger.info(
+            "Calendrier synchronisé", extra=dict(stats, stage="calendar_sync", sampled=True)
+        )
+        return stats
+
+    @staticmethod
+    def sync_all(db: Session, calendar_service: Optional[GoogleCalendarService] = None) -> List[Dict]:
+        """Synchronise le calendrier de tous les utilisateurs"""
+        calendar_service = calendar_service or build_calendar_service()
+        return [
+            CalendarSyncService.sync_user(db, user, calendar_service)
+            for user in db.query(User).order_by(User.id).all()
+        ]
+
+    @staticmethod
+    def sync_pending(db: Session, calendar_service: Optional[GoogleCalendarService] = None) -> List[Dict]:
+        """Synchronise uniquement les utilisateurs signalés par une notification Google"""
+        calendar_service = calendar_service or build_calendar_service()
+        users = db.query(User).join(CalendarSyncState, CalendarSyncState.user_id == User.id).filter(
+            CalendarSyncState.needs_sync.is_(True)
+        ).order_by(User.id).all()
+        return [CalendarSyncService.sync_user(db, user, calendar_service) for user in users]
+
+
+class CalendarSyncWorker:
+    """Thread de fond qui synchronise périodiquement les calendriers Google"""
+
+    _instance: Optional["CalendarSyncWorker"] = None
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="calendar-sync-worker", daemon=True)
+
+    @classmethod
+    def start(cls):
+        """Démarre le worker du processus (sans effet s'il tourne déjà)"""
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance._thread.start()
+            logger.info("Worker de synchronisation Google Calendar démarré", extra={"stage": "calendar_sync"})
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0):
+        """Arrête le worker après la synchronisation en cours"""
+        if cls._instance is not None:
+            cls._instance._stop.set()
+            cls._instance._thread.join(timeout)
+            cls._instance = None
+
+    def _run(self):
+        # Synchronisation complète à intervalle régulier ; entre deux, seuls les
+        # utilisateurs signalés par une notification Google sont synchronisés
+        next_full_sync = 0.0
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                if time.monotonic() >= next_full_sync:
+                    CalendarSyncService.sync_all(db)
+                    next_full_sync = time.monotonic() + Config.GOOGLE_SYNC_INTERVAL_SECONDS
+                else:
+                    CalendarSyncService.sync_pending(db)
+            except Exception:
+                logger.exception("Erreur du worker de synchronisation", extra={"stage": "calendar_sync"})
+            finally:
+                db.close()
+            self._stop.wait(Config.GOOGLE_SYNC_PENDING_POLL_SECONDS)
+
+
+if __name__ == '__main__':
+    # Synchronisation ponctuelle (ex: tâche cron) : python -m services.calendar_sync_service
+    session = SessionLocal()
+    try:
+        for result in CalendarSyncService.sync_all(session):
+            print(result)
+    finally:
+        session.close()
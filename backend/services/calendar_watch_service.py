@@ -0,0 +1,176 @@
+"""
+Notifications Google Calendar (events.watch)
+
+Un canal de notifications est ouvert pour le calendrier de chaque utilisateur et renouvelé
+avant son expiration. Quand Google signale une modification, seules les données de cet
+utilisateur sont invalidées : plages freebusy en cache et état de synchronisation
+(needs_sync), repris par le worker de synchronisation sans attendre le prochain passage complet.
+"""
+import logging
+import secrets
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from config import Config
+from models.calendar_sync_state import CalendarSyncState
+from models.calendar_watch_channel import CalendarWatchChannel
+from models.database import SessionLocal
+from models.user import User
+from services.calendar_sync_service import CalendarSyncService
+from services.freebusy_cache import FreeBusyCache
+from services.google_calendar_service import GoogleCalendarService
+from services.google_client_factory import build_calendar_service
+
+logger = logging.getLogger(__name__)
+
+
+class CalendarWatchService:
+    """Service pour gérer les canaux de notifications et traiter les notifications reçues"""
+
+    @staticmethod
+    def ensure_channels(db: Session, calendar_service: Optional[GoogleCalendarService] = None) -> Dict[str, int]:
+        """
+        Ouvre les canaux manquants et renouvelle ceux qui expirent bientôt
+
+        Un canal est remplacé GOOGLE_WATCH_RENEW_MARGIN_SECONDS avant son expiration :
+        le nouveau canal est ouvert avant de fermer l'ancien pour ne perdre aucune notification.
+
+        Args:
+            db: Session de base de données
+            calendar_service: Service Google Calendar (celui du mode de simulation par défaut)
+
+        Returns:
+            Nombre de canaux ouverts, renouvelés et en erreur
+        """
+        calendar_service = calendar_service or build_calendar_service()
+        renew_before = datetime.now() + timedelta(seconds=Config.GOOGLE_WATCH_RENEW_MARGIN_SECONDS)
+        channels = {}
+        for channel in db.query(CalendarWatchChannel).order_by(CalendarWatchChannel.expiration):
+            channels[channel.user_id] = channel
+
+        stats = {"opened": 0, "renewed": 0, "errors": 0}
+        for user in db.query(User).order_by(User.id).all():
+            current = channels.get(user.id)
+            if current is not None and current.expiration > renew_before:
+                continue
+
+            calendar_id = CalendarSyncService.get_calendar_id(user)
+            channel_id = uuid.uuid4().hex
+            token = secrets.token_hex(16)
+            opened = calendar_service.watch_events(
+                calendar_id, channel_id, Config.GOOGLE_WATCH_ADDRESS, token, Config.GOOGLE_WATCH_TTL_SECONDS
+            )
+            if opened is None:
+                stats["errors"] += 1
+                continue
+
+            db.add(CalendarWatchChannel(
+                user_id=user.id,
+                google_calendar_id=calendar_id,
+                channel_id=channel_id,
+                resource_id=opened['resource_id'],
+                token=token,
+                expiration=opened['expiration']
+            ))
+            if current is not None:
+                calendar_service.stop_channel(current.channel_id, current.resource_id)
+                db.delete(current)
+                stats["renewed"] += 1
+            else:
+                stats["opened"] += 1
+            db.commit()
+
+        # Canaux d'anciens utilisateurs ou doublons déjà expirés
+        db.query(CalendarWatchChannel).filter(
+            CalendarWatchChannel.expiration < datetime.now()
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        logger.info("Canaux de notifications vérifiés", extra=dict(stats, stage="calendar_watch"))
+        return stats
+
+    @staticmethod
+    def handle_notification(
+        db: Session,
+        channel_id: str,
+        token: Optional[str],
+        resource_state: str,
+        resource_id: Optional[str] = None
+    ) -> Optional[int]:
+        """
+        Traite une notification Google (en-têtes X-Goog-*)
+
+        Args:
+            db: Session de base de données
+            channel_id: X-Goog-Channel-ID
+            token: X-Goog-Channel-Token
+            resource_state: X-Goog-Resource-State ("sync" à l'ouverture, "exists" ou "not_exists" ensuite)
+            resource_id: X-Goog-Resource-ID
+
+        Returns:
+            ID de l'utilisateur invalidé, ou None pour un canal inconnu ou un message "sync"
+
+        Raises:
+            PermissionError: Si le jeton ne correspond pas au canal
+        """
+        channel = db.query(CalendarWatchChannel).filter(CalendarWatchChannel.channel_id == channel_id).first()
+        if channel is None:
+            logger.warning("Notification d'un canal inconnu", extra={"stage": "calendar_watch", "channel_id": channel_id})
+            return None
+        if not token or not secrets.compare_digest(token, channel.token):
+            raise PermissionError("Jeton de canal invalide")
+        if resource_id and channel.resource_id and resource_id != channel.resource_id:
+            raise PermissionError("Ressource inattendue pour ce canal")
+        if resource_state == "sync":
+            return None
+
+        FreeBusyCache.invalidate(channel.google_calendar_id)
+        db.query(CalendarSyncState).filter(CalendarSyncState.user_id == channel.user_id).update(
+            {CalendarSyncState.needs_sync: True}, synchronize_session=False
+        )
+        db.commit()
+        logger.info(
+            "Calendrier modifié côté Google",
+            extra={"stage": "calendar_watch", "user_id": channel.user_id, "sampled": True}
+        )
+        return channel.user_id
+
+
+class CalendarWatchWorker:
+    """Thread de fond qui ouvre et renouvelle les canaux de notifications"""
+
+    _instance: Optional["CalendarWatchWorker"] = None
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="calendar-watch-worker", daemon=True)
+
+    @classmethod
+    def start(cls):
+        """Démarre le worker du processus (sans effet s'il tourne déjà)"""
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance._thread.start()
+            logger.info("Worker des canaux de notifications démarré", extra={"stage": "calendar_watch"})
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0):
+        """Arrête le worker après la vérification en cours"""
+        if cls._instance is not None:
+            cls._instance._stop.set()
+            cls._instance._thread.join(timeout)
+            cls._instance = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                CalendarWatchService.ensure_channels(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Erreur du worker des canaux de notifications", extra={"stage": "calendar_watch"})
+            finally:
+                db.close()
+            self._stop.wait(Config.GOOGLE_WATCH_CHECK_INTERVAL_SECONDS)
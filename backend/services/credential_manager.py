@@ -0,0 +1,160 @@
+"""
+Cache des credentials OAuth2 Google (Gmail, Google Calendar)
+
+Les credentials sont gardés en mémoire et rafraîchis avant leur expiration, par un seul
+appelant à la fois : les autres threads attendent le résultat au lieu de lancer chacun
+leur propre refresh. Entre processus, un verrou de fichier protège la relecture,
+le refresh et l'écriture du fichier token.
+"""
+import logging
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from google.auth.transport.requests import Request
+from google_auth_oauthlib.flow import InstalledAppFlow
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Verrou exclusif entre processus sur `path` (bloquant)"""
+    with open(path, 'a+b') as handle:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class _CredentialEntry:
+    """Credentials d'un fichier token et verrou de refresh associé"""
+
+    def __init__(self, name: str, credentials_path: str, token_path: str, scopes: List[str]):
+        self.name = name
+        self.credentials_path = credentials_path
+        self.token_path = token_path
+        self.scopes = scopes
+        self.creds = None
+        self.lock = threading.Lock()
+
+
+class CredentialManager:
+    """Credentials Google partagés par le processus, rafraîchis en single-flight"""
+
+    _entries: Dict[str, _CredentialEntry] = {}
+    _entries_lock = threading.Lock()
+
+    @staticmethod
+    def _is_fresh(creds) -> bool:
+        """Vrai si les credentials sont valides pour encore au moins la marge de refresh"""
+        if not creds or not creds.valid:
+            return False
+        if creds.expiry is None:
+            return True
+        # google-auth compare des dates UTC naïves
+        margin = timedelta(seconds=Config.CREDENTIALS_REFRESH_MARGIN_SECONDS)
+        return creds.expiry - margin > datetime.utcnow()
+
+    @classmethod
+    def get(cls, name: str, credentials_path: str, token_path: str, scopes: List[str],
+            setup_hint: str = "") -> Optional[object]:
+        """
+        Retourne des credentials valides pour le fichier token donné
+
+        Args:
+            name: Nom du service pour les logs ("gmail", "calendar")
+            credentials_path: Fichier JSON du client OAuth2
+            token_path: Fichier pickle du token
+            scopes: Scopes OAuth2 demandés
+            setup_hint: Explication ajoutée au log si le fichier credentials manque
+
+        Returns:
+            Credentials google-auth, ou None si l'authentification est impossible
+        """
+        entry = cls._entries.get(token_path)
+        if entry is None:
+            with cls._entries_lock:
+                entry = cls._entries.setdefault(
+                    token_path, _CredentialEntry(name, credentials_path, token_path, scopes)
+                )
+
+        if cls._is_fresh(entry.creds):
+            return entry.creds
+
+        # Single-flight : un seul thread rafraîchit, les autres attendent puis réutilisent le résultat
+        with entry.lock:
+            if cls._is_fresh(entry.creds):
+                return entry.creds
+            with _file_lock(token_path + '.lock'):
+                entry.creds = cls._load_or_refresh(entry, setup_hint)
+            return entry.creds
+
+    @classmethod
+    def _load_or_refresh(cls, entry: _CredentialEntry, setup_hint: str):
+        """Relit le token sur disque, le rafraîchit ou lance le flux OAuth2 (sous verrou)"""
+        stage = f"{entry.name}_auth"
+
+        # Un autre processus a peut-être déjà rafraîchi le token
+        creds = entry.creds
+        if os.path.exists(entry.token_path):
+            try:
+                with open(entry.token_path, 'rb') as token:
+                    on_disk = pickle.load(token)
+                if creds is None or cls._is_fresh(on_disk):
+                    creds = on_disk
+            except Exception as e:
+                logger.warning("Token illisible: %s", str(e), extra={"stage": stage, "path": entry.token_path})
+        if cls._is_fresh(creds):
+            return creds
+
+        if creds and creds.refresh_token:
+            try:
+                creds.refresh(Request())
+                logger.info("Token rafraîchi", extra={"stage": stage})
+            except Exception as e:
+                logger.error("Erreur lors du refresh du token: %s", str(e), extra={"stage": stage})
+                # Encore utilisable jusqu'à son expiration : le prochain appel retentera
+                return creds if creds.valid else None
+        else:
+            if not os.path.exists(entry.credentials_path):
+                logger.error(
+                    "Fichier credentials manquant: %s %s", entry.credentials_path, setup_hint,
+                    extra={"stage": stage}
+                )
+                return None
+            try:
+                flow = InstalledAppFlow.from_client_secrets_file(entry.credentials_path, entry.scopes)
+                creds = flow.run_local_server(port=0)
+            except Exception as e:
+                logger.error("Erreur lors de l'authentification: %s", str(e), extra={"stage": stage})
+                return None
+
+        cls._save(entry.token_path, creds)
+        return creds
+
+    @staticmethod
+    def _save(token_path: str, creds):
+        """Écrit le token de façon atomique (fichier temporaire puis renommage)"""
+        tmp_path = f"{token_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as token:
+            pickle.dump(creds, token)
+        os.replace(tmp_path, token_path)
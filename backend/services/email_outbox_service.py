@@ -0,0 +1,213 @@
+"""
+Service de la boîte d'envoi des emails
+Les emails sont enregistrés en base dans la transaction de la requête,
+puis envoyés par le worker (services/email_outbox_worker.py)
+
+Un email dont l'envoi n'est pas confirmé (bail expiré, lot Gmail sans réponse) passe à
+l'état "unknown" et n'est jamais renvoyé automatiquement. Après vérification :
+    python -m services.email_outbox_service                  # nombre d'emails par état
+    python -m services.email_outbox_service --requeue 12 13  # renvoyer ces emails
+    python -m services.email_outbox_service --requeue-unknown
+"""
+import argparse
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from models.database import SessionLocal
+from models.email_outbox import EmailOutbox
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from config import Config
+
+
+class EmailOutboxService:
+    """Service pour mettre en file et suivre les emails à envoyer"""
+
+    @staticmethod
+    def enqueue_many(db: Session, emails: List[Dict]) -> List[EmailOutbox]:
+        """
+        Ajoute des emails à la boîte d'envoi sans valider la transaction
+
+        Les emails dont la clé d'idempotence existe déjà sont ignorés. L'appelant
+        valide la transaction (db.commit()) avec le reste de ses écritures.
+
+        Args:
+            db: Session de base de données
+            emails: Liste de dictionnaires {"idempotency_key", "to_email", "subject", "body", "user_id"}
+
+        Returns:
+            Liste des entrées ajoutées
+        """
+        keys = [email["idempotency_key"] for email in emails]
+        existing = {
+            key for (key,) in db.query(EmailOutbox.idempotency_key)
+            .filter(EmailOutbox.idempotency_key.in_(keys)).all()
+        } if keys else set()
+
+        entries = []
+        for email in emails:
+            if email["idempotency_key"] in existing:
+                continue
+            entry = EmailOutbox(
+                idempotency_key=email["idempotency_key"],
+                user_id=email.get("user_id"),
+                to_email=email["to_email"],
+                subject=email["subject"],
+                body=email["body"],
+                status="pending",
+                attempts=0,
+                next_attempt_at=datetime.now()
+            )
+            db.add(entry)
+            entries.append(entry)
+            existing.add(email["idempotency_key"])
+
+        db.flush()
+        return entries
+
+    @staticmethod
+    def claim_batch(db: Session, limit: int) -> List[EmailOutbox]:
+        """
+        Réserve un lot d'emails à envoyer
+
+        Les entrées sont verrouillées (SKIP LOCKED sur MySQL) puis passées à l'état
+        "sending" avec un bail. Si le processus meurt pendant l'envoi, Gmail a pu accepter
+        les messages : à l'expiration du bail, les entrées passent à l'état "unknown"
+        (voir expire_leases) au lieu d'être renvoyées.
+
+        Args:
+            db: Session de base de données
+            limit: Nombre maximum d'emails à réserver
+
+        Returns:
+            Liste des entrées réservées
+        """
+        now = datetime.now()
+        EmailOutboxService.expire_leases(db, now)
+        entries = db.query(EmailOutbox).filter(
+            EmailOutbox.status == "pending",
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.id).limit(limit).with_for_update(skip_locked=True).all()
+
+        lease = now + timedelta(seconds=Config.EMAIL_OUTBOX_LEASE_SECONDS)
+        for entry in entries:
+            entry.status = "sending"
+            entry.locked_until = lease
+            entry.attempts += 1
+        db.commit()
+        return entries
+
+    @staticmethod
+    def expire_leases(db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Passe à l'état "unknown" les emails "sending" dont le bail a expiré
+
+        Ne valide pas la transaction.
+
+        Returns:
+            Nombre d'emails concernés
+        """
+        result = db.execute(
+            update(EmailOutbox).where(
+                EmailOutbox.status == "sending",
+                EmailOutbox.locked_until <= (now or datetime.now())
+            ).values(
+                status="unknown",
+                locked_until=None,
+                last_error="Bail expiré pendant l'envoi : envoi non confirmé"
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+
+    @staticmethod
+    def requeue(db: Session, entry_ids: Optional[List[int]] = None, status: str = "unknown") -> int:
+        """
+        Remet en file des emails "unknown" ou "failed" (renvoi manuel après vérification)
+
+        Args:
+            db: Session de base de données
+            entry_ids: IDs des emails (tous ceux de l'état `status` si None)
+            status: État des emails à remettre en file
+
+        Returns:
+            Nombre d'emails remis en file
+        """
+        query = update(EmailOutbox).where(EmailOutbox.status == status)
+        if entry_ids is not None:
+            query = query.where(EmailOutbox.id.in_(entry_ids))
+        result = db.execute(
+            query.values(status="pending", attempts=0, next_attempt_at=datetime.now(), locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount or 0
+
+    @staticmethod
+    def mark_sent(db: Session, entry: EmailOutbox, message_id: str = None):
+        """Marque un email comme envoyé"""
+        entry.status = "sent"
+        entry.message_id = message_id
+        entry.sent_at = datetime.now()
+        entry.locked_until = None
+        entry.last_error = None
+
+    @staticmethod
+    def mark_failed(db: Session, entry: EmailOutbox, error: str):
+        """
+        Replanifie un email en échec avec un délai exponentiel
+
+        Après EMAIL_OUTBOX_MAX_ATTEMPTS tentatives, l'email passe à l'état "failed".
+        """
+        entry.last_error = error
+        entry.locked_until = None
+        if entry.attempts >= Config.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            entry.status = "failed"
+            return
+        delay = min(
+            Config.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** (entry.attempts - 1),
+            Config.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS
+        )
+        entry.status = "pending"
+        entry.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+
+    @staticmethod
+    def mark_unknown(db: Session, entry: EmailOutbox, error: str):
+        """
+        Marque un email dont l'envoi a pu avoir lieu sans confirmation (état "unknown")
+
+        L'email n'est pas renvoyé automatiquement : un renvoi risquerait un doublon chez
+        le destinataire. Il est à vérifier (et à remettre en "pending" si besoin) à la main.
+        """
+        entry.status = "unknown"
+        entry.last_error = error
+        entry.locked_until = None
+
+    @staticmethod
+    def get_status_counts(db: Session) -> Dict[str, int]:
+        """Retourne le nombre d'emails par état"""
+        return dict(
+            db.query(EmailOutbox.status, func.count(EmailOutbox.id))
+            .group_by(EmailOutbox.status).all()
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Boîte d'envoi des emails")
+    parser.add_argument("--requeue", type=int, nargs="+", default=None, metavar="ID",
+                        help="Remettre en file ces emails (état unknown ou failed)")
+    parser.add_argument("--requeue-unknown", action="store_true", help="Remettre en file tous les emails unknown")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.requeue:
+            requeued = sum(EmailOutboxService.requeue(db, args.requeue, status) for status in ("unknown", "failed"))
+            print(f"{requeued} email(s) remis en file")
+        elif args.requeue_unknown:
+            print(f"{EmailOutboxService.requeue(db)} email(s) remis en file")
+        print(EmailOutboxService.get_status_counts(db))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
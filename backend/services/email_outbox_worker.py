@@ -0,0 +1,103 @@
+"""
+Worker d'envoi de la boîte d'envoi des emails
+Vide la table email_outbox par lots, au débit configuré, via l'envoi batch Gmail
+"""
+import logging
+import threading
+from typing import Optional
+from config import Config
+from models.database import SessionLocal
+from services.email_outbox_service import EmailOutboxService
+from services.google_client_factory import build_gmail_service
+from services.quota_manager import QuotaManager
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxWorker:
+    """Thread de fond qui envoie les emails en attente"""
+
+    _instance: Optional["EmailOutboxWorker"] = None
+
+    def __init__(self):
+        self.gmail_service = build_gmail_service()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="email-outbox-worker", daemon=True)
+        # Débit d'envoi : un jeton par email, partagé par les workers de tous les processus
+        QuotaManager.register(
+            "email_outbox",
+            Config.EMAIL_OUTBOX_BATCH_SIZE,
+            Config.EMAIL_OUTBOX_BATCH_SIZE * 60.0 / Config.EMAIL_OUTBOX_RATE_PER_MINUTE
+        )
+
+    @classmethod
+    def start(cls):
+        """Démarre le worker du processus (sans effet s'il tourne déjà)"""
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance._thread.start()
+            logger.info("Worker de la boîte d'envoi démarré", extra={"stage": "email_outbox"})
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0):
+        """Arrête le worker après le lot en cours"""
+        if cls._instance is not None:
+            cls._instance._stop.set()
+            cls._instance._thread.join(timeout)
+            cls._instance = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.process_batch()
+            except Exception:
+                logger.exception("Erreur du worker de la boîte d'envoi", extra={"stage": "email_outbox"})
+                processed = 0
+            if processed == 0:
+                self._stop.wait(Config.EMAIL_OUTBOX_POLL_SECONDS)
+
+    def process_batch(self) -> int:
+        """
+        Réserve et envoie un lot d'emails
+
+        Returns:
+            Nombre d'emails traités (0 si rien à envoyer ou débit épuisé)
+        """
+        limit = QuotaManager.try_acquire("email_outbox", Config.EMAIL_OUTBOX_BATCH_SIZE)
+        if limit <= 0:
+            return 0
+
+        # Les entrées réservées restent utilisables après le commit de claim_batch
+        db = SessionLocal(expire_on_commit=False)
+        used = 0
+        try:
+            entries = EmailOutboxService.claim_batch(db, limit)
+            # Un jeton par email réservé : les autres sont rendus au seau (finally)
+            used = len(entries)
+            if not entries:
+                return 0
+
+            results = self.gmail_service.send_batch([
+                {"key": str(entry.id), "to": entry.to_email, "subject": entry.subject, "message": entry.body}
+                for entry in entries
+            ])
+
+            for entry in entries:
+                result = results.get(str(entry.id), {"sent": False, "error": "Résultat manquant"})
+                if result["sent"]:
+                    EmailOutboxService.mark_sent(db, entry, result.get("message_id"))
+                elif result.get("unknown"):
+                    EmailOutboxService.mark_unknown(db, entry, result.get("error") or "Envoi non confirmé")
+                else:
+                    EmailOutboxService.mark_failed(db, entry, result.get("error") or "Erreur inconnue")
+            db.commit()
+
+            sent = sum(1 for result in results.values() if result["sent"])
+            logger.info(
+                "Lot de la boîte d'envoi traité: %d/%d envoyés", sent, len(entries),
+                extra={"stage": "email_outbox", "sent": sent, "total": len(entries), "sampled": True}
+            )
+            return len(entries)
+        finally:
+            QuotaManager.release("email_outbox", limit - used)
+            db.close()
@@ -0,0 +1,187 @@
+"""
+Archivage des événements passés : calendar_events -> calendar_events_archive
+
+Les calculs de disponibilités ne portent que sur l'avenir, mais calendar_events grossit
+avec les réunions passées. Les événements terminés depuis plus de EVENT_ARCHIVE_AFTER_DAYS
+jours sont déplacés par lots dans calendar_events_archive (INSERT ... SELECT puis DELETE,
+dans une transaction par lot) : la table courante et ses index ne contiennent plus que
+les événements récents et à venir.
+
+Les événements encore référencés par google_event_links (anciennes invitations par
+participant) restent dans calendar_events : la réconciliation les considérerait supprimés.
+
+Archivage ponctuel (depuis backend/) :
+    python -m services.event_archive_service
+    python -m services.event_archive_service --before 2024-01-01
+"""
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, exists, insert, literal, select
+from sqlalchemy.orm import Session
+from config import Config
+from models.calendar_event import CalendarEvent
+from models.calendar_event_archive import CalendarEventArchive
+from models.database import SessionLocal
+from models.google_event_link import GoogleEventLink
+from services.calendar_feed_service import CalendarFeedService
+
+logger = logging.getLogger(__name__)
+
+# Colonnes copiées telles quelles dans l'archive
+ARCHIVED_COLUMNS = (
+    "id", "user_id", "type_id", "title", "start_datetime", "end_datetime", "is_all_day", "google_event_id", "external_uid"
+)
+
+
+class EventArchiveService:
+    @staticmethod
+    def cutoff(now: Optional[datetime] = None) -> datetime:
+        """Date avant laquelle un événement terminé appartient à l'archive"""
+        return (now or datetime.now()) - timedelta(days=Config.EVENT_ARCHIVE_AFTER_DAYS)
+
+    @staticmethod
+    def archive_batch(db: Session, before: datetime, batch_size: int) -> int:
+        """
+        Déplace un lot d'événements terminés avant `before` dans l'archive
+
+        Les lignes sont verrouillées (FOR UPDATE SKIP LOCKED) : plusieurs processus peuvent
+        archiver en même temps sans déplacer deux fois le même événement.
+
+        Returns:
+            Nombre d'événements archivés
+        """
+        rows = db.query(CalendarEvent.id, CalendarEvent.user_id).filter(
+            # start_datetime <= end_datetime : le filtre sur start_datetime utilise l'index
+            CalendarEvent.start_datetime < before,
+            CalendarEvent.end_datetime < before,
+            ~exists().where(GoogleEventLink.calendar_event_id == CalendarEvent.id)
+        ).order_by(CalendarEvent.start_datetime, CalendarEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not rows:
+            db.rollback()
+            return 0
+
+        ids = [event_id for event_id, _ in rows]
+        source = select(
+            *(getattr(CalendarEvent, column) for column in ARCHIVED_COLUMNS),
+            literal(datetime.now()).label("archived_at")
+        ).where(CalendarEvent.id.in_(ids))
+        db.execute(insert(CalendarEventArchive).from_select([*ARCHIVED_COLUMNS, "archived_at"], source))
+        db.execute(
+            delete(CalendarEvent).where(CalendarEvent.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        # L'export ICS ne lit que calendar_events : les calendriers concernés changent
+        CalendarFeedService.touch(db, {user_id for _, user_id in rows})
+        db.commit()
+        return len(ids)
+
+    @staticmethod
+    def archive_events(db: Session, before: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict:
+        """
+        Archive tous les événements terminés avant `before`, lot par lot
+
+        Args:
+            db: Session de base de données
+            before: Date limite (maintenant - EVENT_ARCHIVE_AFTER_DAYS par défaut)
+            batch_size: Événements par transaction (EVENT_ARCHIVE_BATCH_SIZE par défaut)
+
+        Returns:
+            Statistiques : événements archivés, lots, durée
+        """
+        before = before or EventArchiveService.cutoff()
+        batch_size = batch_size or Config.EVENT_ARCHIVE_BATCH_SIZE
+        started = time.perf_counter()
+        archived, batches = 0, 0
+        while True:
+            count = EventArchiveService.archive_batch(db, before, batch_size)
+            archived += count
+            batches += 1 if count else 0
+            if count < batch_size:
+                break
+        stats = {
+            "archived": archived,
+            "batches": batches,
+            "before": before.isoformat(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if archived:
+            logger.info("Événements archivés", extra=dict(stats, stage="event_archive"))
+        return stats
+
+    @staticmethod
+    def delete_archived_google_events(db: Session, user_id: int, google_event_ids: List[str]) -> int:
+        """
+        Supprime de l'archive des événements importés de Google
+
+        Ne valide pas la transaction (appelé par la synchronisation Google).
+
+        Returns:
+            Nombre d'événements supprimés
+        """
+        if not google_event_ids:
+            return 0
+        result = db.execute(
+            delete(CalendarEventArchive).where(
+                CalendarEventArchive.user_id == user_id,
+                CalendarEventArchive.google_event_id.in_(google_event_ids)
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+
+
+class EventArchiveWorker:
+    """Thread de fond qui archive périodiquement les événements passés"""
+
+    _instance: Optional["EventArchiveWorker"] = None
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-archive-worker", daemon=True)
+
+    @classmethod
+    def start(cls):
+        """Démarre le worker du processus (sans effet s'il tourne déjà)"""
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance._thread.start()
+            logger.info("Worker d'archivage des événements démarré", extra={"stage": "event_archive"})
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0):
+        """Arrête le worker après le lot en cours"""
+        if cls._instance is not None:
+            cls._instance._stop.set()
+            cls._instance._thread.join(timeout)
+            cls._instance = None
+
+    def _run(self):
+        while not self._stop.wait(Config.EVENT_ARCHIVE_INTERVAL_SECONDS):
+            db = SessionLocal()
+            try:
+                EventArchiveService.archive_events(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Erreur du worker d'archivage", extra={"stage": "event_archive"})
+            finally:
+                db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivage des événements passés")
+    parser.add_argument("--before", type=datetime.fromisoformat, default=None,
+                        help="Archiver les événements terminés avant cette date (ISO 8601)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Événements par transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(EventArchiveService.archive_events(db, before=args.before, batch_size=args.batch_size))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,477 @@
+"""
+Import en masse d'événements de calendrier depuis des fichiers ICS ou CSV
+
+Les fichiers sont lus ligne par ligne (jamais chargés en entier) ; les événements sont
+regroupés par lots de EVENT_IMPORT_BATCH_SIZE : les emails d'un lot sont résolus en une
+requête (les emails déjà vus ne sont pas redemandés) et le lot est inséré par
+CalendarEventService.bulk_create_events dans une transaction. Les versions des calendriers
+(export ICS), les statistiques de la table (ANALYZE) et l'archivage des événements passés
+ne sont mis à jour qu'une fois, en fin d'import.
+
+ICS : un VEVENT par événement (SUMMARY, DTSTART, DTEND ou DURATION). L'événement est
+attribué à l'utilisateur `owner_email` s'il est donné, sinon à l'organisateur et aux
+participants connus (sauf ceux qui l'ont refusé). Les événements annulés ou transparents
+sont ignorés ; les récurrences (RRULE) ne sont pas développées, seule la première
+occurrence est importée.
+
+CSV : en-tête avec les colonnes email, title, start, end et, facultatives, is_all_day,
+type_id et uid (dates ISO 8601 ou format français JJ/MM/AAAA HH:MM).
+
+L'import est idempotent : chaque événement est identifié par son UID (ICS, colonne uid
+du CSV) ou à défaut par une empreinte de son titre et de ses dates (colonne
+external_uid). Un événement déjà importé pour un utilisateur, dans calendar_events ou
+dans l'archive, est ignoré : relancer un import interrompu ne crée pas de doublons.
+
+Usage (depuis backend/) :
+    python -m services.event_import_service agenda.ics --email jean.dupont@example.com
+    python -m services.event_import_service evenements.csv --batch-size 10000
+"""
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from dateutil import parser as date_parser
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from config import Config
+from models.calendar_event import CalendarEvent
+from models.calendar_event_archive import CalendarEventArchive
+from models.database import SessionLocal
+from services.calendar_event_service import BULK_CHUNK_SIZE, CalendarEventService
+from services.calendar_feed_service import CalendarFeedService
+from services.event_archive_service import EventArchiveService
+from services.event_type_service import EventTypeService
+from services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+FORMATS_BY_EXTENSION = {".ics": "ics", ".ical": "ics", ".ifb": "ics", ".csv": "csv"}
+# Nombre d'erreurs détaillées renvoyées dans les statistiques
+MAX_REPORTED_ERRORS = 20
+TRUE_VALUES = ("1", "true", "yes", "oui", "vrai", "x")
+
+_DURATION = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+def _to_local(value: datetime) -> datetime:
+    """Datetime local naïf (CALENDAR_TIMEZONE), comme les événements importés de Google"""
+    if value.tzinfo is not None:
+        return value.astimezone(ZoneInfo(Config.CALENDAR_TIMEZONE)).replace(tzinfo=None)
+    return value
+
+
+def _parse_datetime(value: str) -> datetime:
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = date_parser.parse(value, dayfirst=True)
+    return _to_local(parsed)
+
+
+def _parse_duration(value: str) -> timedelta:
+    match = _DURATION.match(value.strip())
+    if not match:
+        raise ValueError(f"Durée invalide: {value}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -duration if sign == "-" else duration
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Lignes logiques d'un fichier ICS (les lignes de continuation commencent par un espace)"""
+    current, current_number = None, 0
+    for number, raw in enumerate(lines, 1):
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current_number, current
+        current, current_number = line, number
+    if current:
+        yield current_number, current
+
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Nom, paramètres et valeur d'une propriété ICS (NOM;PARAM=x:valeur)"""
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        return line.upper(), {}, ""
+    name, *params = head.split(";")
+    return name.upper(), {
+        key.upper(): param_value.strip('"') for key, _, param_value in (param.partition("=") for param in params)
+    }, value
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _ics_datetime(value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+    """Date ICS (DATE, DATE-TIME UTC, avec TZID ou flottante) en datetime local et indicateur jour entier"""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value[:8], "%Y%m%d"), True
+    parsed = datetime.strptime(value.rstrip("Zz")[:15], "%Y%m%dT%H%M%S")
+    if value[-1:] in ("Z", "z"):
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    elif "TZID" in params:
+        try:
+            parsed = parsed.replace(tzinfo=ZoneInfo(params["TZID"]))
+        except (ZoneInfoNotFoundError, ValueError):
+            # Fuseau non IANA (ex: noms Windows) : heure gardée telle quelle
+            pass
+    return _to_local(parsed), False
+
+
+def _mailto(value: str) -> Optional[str]:
+    value = value.strip()
+    if value.lower().startswith("mailto:"):
+        value = value[7:]
+    return value.lower() if "@" in value else None
+
+
+def iter_ics_events(lines: Iterable[str], type_id: int) -> Iterator[Dict]:
+    """
+    Événements d'un flux ICS, lus au fil de l'eau
+
+    Renvoie des dictionnaires {"line", "uid", "emails", "title", "start_datetime", "end_datetime",
+    "is_all_day", "type_id"}, {"line", "skipped"} pour un événement ignoré ou
+    {"line", "error"} pour un événement invalide.
+    """
+    components: List[str] = []
+    props: Dict[str, Tuple[Dict[str, str], str]] = {}
+    emails: List[str] = []
+    start_line = 0
+    for number, line in _unfold(lines):
+        name, params, value = _split_property(line)
+        if name == "BEGIN":
+            components.append(value.strip().upper())
+            if components[-1] == "VEVENT":
+                props, emails, start_line = {}, [], number
+            continue
+        if name == "END":
+            component = components.pop() if components else None
+            if component == "VEVENT":
+                yield _ics_event(start_line, props, emails, type_id)
+            continue
+        if not components or components[-1] != "VEVENT":
+            continue
+        if name in ("ORGANIZER", "ATTENDEE"):
+            email = _mailto(value)
+            if email and params.get("PARTSTAT", "").upper() != "DECLINED":
+                emails.append(email)
+        else:
+            props.setdefault(name, (params, value))
+
+
+def _ics_event(line: int, props: Dict[str, Tuple[Dict[str, str], str]], emails: List[str], type_id: int) -> Dict:
+    if props.get("STATUS", ({}, ""))[1].strip().upper() == "CANCELLED" \
+            or props.get("TRANSP", ({}, ""))[1].strip().upper() == "TRANSPARENT":
+        return {"line": line, "skipped": True}
+    if "DTSTART" not in props:
+        return {"line": line, "error": "DTSTART manquant"}
+    try:
+        start, is_all_day = _ics_datetime(props["DTSTART"][1], props["DTSTART"][0])
+        if "DTEND" in props:
+            end, _ = _ics_datetime(props["DTEND"][1], props["DTEND"][0])
+        elif "DURATION" in props:
+            end = start + _parse_duration(props["DURATION"][1])
+        else:
+            end = start + timedelta(days=1) if is_all_day else start
+    except ValueError as e:
+        return {"line": line, "error": str(e)}
+    uid = props.get("UID", ({}, ""))[1].strip()
+    if uid and "RECURRENCE-ID" in props:
+        # Occurrence modifiée d'une série : même UID que la série
+        uid = f"{uid}#{props['RECURRENCE-ID'][1].strip()}"
+    return {
+        "line": line,
+        "uid": uid or None,
+        "emails": emails,
+        "title": _unescape(props.get("SUMMARY", ({}, ""))[1])[:200] or "Occupé",
+        "start_datetime": start,
+        "end_datetime": end,
+        "is_all_day": is_all_day,
+        "type_id": type_id,
+    }
+
+
+def iter_csv_events(lines: Iterable[str], type_id: int) -> Iterator[Dict]:
+    """Événements d'un flux CSV (mêmes dictionnaires que iter_ics_events)"""
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [field.strip().lower() for field in reader.fieldnames]
+    missing = {"start", "end"} - set(reader.fieldnames)
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le CSV: {', '.join(sorted(missing))}")
+    for row in reader:
+        line = reader.line_num
+        try:
+            start = _parse_datetime(row.get("start") or "")
+            end = _parse_datetime(row.get("end") or "")
+            row_type_id = int(row["type_id"]) if (row.get("type_id") or "").strip() else type_id
+        except (ValueError, OverflowError) as e:
+            yield {"line": line, "error": str(e)}
+            continue
+        email = (row.get("email") or "").strip().lower()
+        yield {
+            "line": line,
+            "uid": (row.get("uid") or "").strip() or None,
+            "emails": [email] if email else [],
+            "title": (row.get("title") or "").strip()[:200] or "Occupé",
+            "start_datetime": start,
+            "end_datetime": end,
+            "is_all_day": (row.get("is_all_day") or "").strip().lower() in TRUE_VALUES,
+            "type_id": row_type_id,
+        }
+
+
+def _external_uid(event: Dict) -> str:
+    """Identifiant d'un événement importé : son UID, ou une empreinte du titre et des dates"""
+    uid = event.get("uid")
+    if uid and len(uid) <= 255:
+        return uid
+    source = uid or f"{event['title']}|{event['start_datetime'].isoformat()}|{event['end_datetime'].isoformat()}"
+    return "sha1:" + hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+class EventImportService:
+    @staticmethod
+    def detect_format(filename: str) -> str:
+        """
+        Format d'import (ics ou csv) déduit de l'extension du fichier
+
+        Raises:
+            ValueError: Si l'extension n'est pas reconnue
+        """
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension not in FORMATS_BY_EXTENSION:
+            raise ValueError(f"Format de fichier non reconnu: {filename} (attendu: .ics ou .csv)")
+        return FORMATS_BY_EXTENSION[extension]
+
+    @staticmethod
+    def import_events(
+        db: Session,
+        lines: Iterable[str],
+        fmt: str,
+        owner_email: Optional[str] = None,
+        type_id: int = 1,
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Importe les événements d'un flux ICS ou CSV par lots
+
+        Chaque lot est validé dans sa propre transaction : en cas d'erreur, les lots
+        précédents restent importés.
+
+        Args:
+            db: Session de base de données
+            lines: Lignes du fichier (fichier texte ouvert, flux d'upload...)
+            fmt: "ics" ou "csv"
+            owner_email: Utilisateur auquel attribuer tous les événements (sinon emails du fichier)
+            type_id: Type des événements (si le fichier ne le précise pas)
+            batch_size: Événements par transaction (EVENT_IMPORT_BATCH_SIZE par défaut)
+
+        Returns:
+            Statistiques : lignes lues, événements créés, ignorés, déjà importés (duplicates),
+            invalides, débit (rows_per_second)
+
+        Raises:
+            ValueError: Si le format ou le type est inconnu, si le CSV n'a pas les colonnes
+                requises ou si le fichier n'est pas en UTF-8
+        """
+        if fmt not in ("ics", "csv"):
+            raise ValueError(f"Format d'import inconnu: {fmt}")
+        # Vérifié avant tout lot : un type inconnu ferait échouer l'insertion (clé étrangère)
+        known_types = {event_type.id for event_type in EventTypeService.get_all_event_types(db)}
+        if type_id not in known_types:
+            raise ValueError(f"Type d'événement inconnu: {type_id}")
+        batch_size = batch_size or Config.EVENT_IMPORT_BATCH_SIZE
+        parse = iter_ics_events if fmt == "ics" else iter_csv_events
+        owner = owner_email.strip().lower() if owner_email else None
+
+        stats = {"format": fmt, "events_read": 0, "inserted": 0, "skipped": 0, "duplicates": 0, "invalid": 0,
+                 "unknown_email": 0, "batches": 0, "errors": []}
+        user_ids: Dict[str, Optional[int]] = {}
+        touched = set()
+        started = time.perf_counter()
+
+        def report(line: int, message: str):
+            if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                stats["errors"].append({"line": line, "error": message})
+
+        def flush(batch: List[Dict]):
+            new_emails = {email for event in batch for email in event["emails"]} - user_ids.keys()
+            found = UserService.get_user_ids_by_emails(db, new_emails)
+            user_ids.update({email: found.get(email) for email in new_emails})
+
+            rows = []
+            for event in batch:
+                owners = sorted({user_ids[email] for email in event["emails"] if user_ids.get(email)})
+                if not owners:
+                    stats["unknown_email"] += 1
+                    report(event["line"], f"Aucun utilisateur connu: {', '.join(event['emails']) or '(sans email)'}")
+                    continue
+                rows.extend(
+                    {"user_id": user_id, "type_id": event["type_id"], "title": event["title"],
+                     "start_datetime": event["start_datetime"], "end_datetime": event["end_datetime"],
+                     "is_all_day": event["is_all_day"], "external_uid": event["external_uid"]}
+                    for user_id in owners
+                )
+            # Événements déjà importés (lot précédent, import antérieur) ou en double dans le lot
+            seen = EventImportService._imported_keys(
+                db, {row["user_id"] for row in rows}, {row["external_uid"] for row in rows}
+            )
+            unique_rows = []
+            for row in rows:
+                key = (row["user_id"], row["external_uid"])
+                if key in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(key)
+                unique_rows.append(row)
+            rows = unique_rows
+            try:
+                CalendarEventService.bulk_create_events(db, rows, commit=False, touch_feeds=False)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            stats["inserted"] += len(rows)
+            stats["batches"] += 1
+            touched.update(row["user_id"] for row in rows)
+
+        batch: List[Dict] = []
+        for event in parse(lines, type_id):
+            stats["events_read"] += 1
+            if event.get("skipped"):
+                stats["skipped"] += 1
+                continue
+            if "error" in event:
+                stats["invalid"] += 1
+                report(event["line"], event["error"])
+                continue
+            if event["end_datetime"] < event["start_datetime"]:
+                stats["invalid"] += 1
+                report(event["line"], "La fin précède le début")
+                continue
+            if event["type_id"] not in known_types:
+                stats["invalid"] += 1
+                report(event["line"], f"Type d'événement inconnu: {event['type_id']}")
+                continue
+            event["external_uid"] = _external_uid(event)
+            if owner:
+                event["emails"] = [owner]
+            batch.append(event)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+        duration = time.perf_counter() - started
+        if stats["inserted"]:
+            stats.update(EventImportService._finalize(db, touched))
+        stats["duration_s"] = round(duration, 3)
+        stats["rows_per_second"] = round(stats["inserted"] / duration, 1) if duration else None
+        logger.info(
+            "Import d'événements terminé",
+            extra={"stage": "event_import", **{key: value for key, value in stats.items() if key != "errors"}}
+        )
+        return stats
+
+    @staticmethod
+    def _imported_keys(db: Session, user_ids: Set[int], external_uids: Set[str]) -> Set[Tuple[int, str]]:
+        """
+        Couples (user_id, external_uid) déjà présents dans calendar_events ou l'archive
+
+        Le filtre sur les propriétaires du lot permet d'utiliser les index (user_id, external_uid)
+        des deux tables ; external_uid seul n'est pas indexé en tête et parcourrait toute la table.
+        """
+        if not user_ids or not external_uids:
+            return set()
+        owners = sorted(user_ids)
+        uids = list(external_uids)
+        keys = set()
+        for start in range(0, len(uids), BULK_CHUNK_SIZE):
+            chunk = uids[start:start + BULK_CHUNK_SIZE]
+            for model in (CalendarEvent, CalendarEventArchive):
+                keys.update(db.execute(
+                    select(model.user_id, model.external_uid)
+                    .where(model.user_id.in_(owners), model.external_uid.in_(chunk))
+                ).tuples())
+        return keys
+
+    @staticmethod
+    def _finalize(db: Session, user_ids: Set[int]) -> Dict:
+        """Recalculs faits une seule fois en fin d'import (et non à chaque lot)"""
+        # Versions des calendriers (ETag de l'export ICS) des utilisateurs importés
+        CalendarFeedService.touch(db, user_ids)
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            db.execute(text("ANALYZE TABLE calendar_events"))
+        elif dialect in ("postgresql", "sqlite"):
+            db.execute(text("ANALYZE calendar_events"))
+        db.commit()
+        # L'historique importé va directement dans l'archive
+        archived = EventArchiveService.archive_events(db)["archived"] if Config.EVENT_ARCHIVE_ENABLED else 0
+        return {"archived": archived}
+
+    @staticmethod
+    def import_file(db: Session, path: str, fmt: Optional[str] = None, **options) -> Dict:
+        """
+        Importe un fichier ICS ou CSV du disque (format déduit de l'extension par défaut)
+
+        Voir import_events pour les options.
+        """
+        fmt = fmt or EventImportService.detect_format(path)
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return EventImportService.import_events(db, f, fmt, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import d'événements ICS ou CSV")
+    parser.add_argument("path", help="Fichier .ics ou .csv")
+    parser.add_argument("--format", choices=("ics", "csv"), default=None, help="Format (déduit de l'extension par défaut)")
+    parser.add_argument("--email", default=None, help="Attribuer tous les événements à cet utilisateur")
+    parser.add_argument("--type-id", type=int, default=1, help="Type des événements")
+    parser.add_argument("--batch-size", type=int, default=None, help="Événements par transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        try:
+            stats = EventImportService.import_file(
+                db, args.path, args.format, owner_email=args.email, type_id=args.type_id, batch_size=args.batch_size
+            )
+        except ValueError as e:
+            # Les lots déjà validés restent importés ; relancer l'import ne les duplique pas
+            parser.exit(1, f"Erreur: {e}\n")
+        for error in stats.pop("errors"):
+            print(f"ligne {error['line']}: {error['error']}")
+        for key, value in stats.items():
+            print(f"{key}: {value}")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
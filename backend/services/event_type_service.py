@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.event_type import EventType
 
@@ -8,4 +10,15 @@ class EventTypeService:
 
     @staticmethod
     def get_event_type_by_id(db: Session, event_type_id: int):
-        return db.query(EventType).filter(EventType.id == event_type_id).first()
\ No newline at end of file
+        return db.query(EventType).filter(EventType.id == event_type_id).first()
+
+
+class AsyncEventTypeService:
+    @staticmethod
+    async def get_all_event_types(session: AsyncSession):
+        result = await session.execute(select(EventType))
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_event_type_by_id(session: AsyncSession, event_type_id: int):
+        return await session.get(EventType, event_type_id)
@@ -0,0 +1,162 @@
+"""
+Cache des plages occupées Google Calendar (freebusy.query)
+
+Les plages sont gardées par calendrier et par fenêtre pendant FREEBUSY_CACHE_TTL_SECONDS.
+Une fenêtre en cache sert toute demande qu'elle couvre, tant que son âge respecte le
+budget de fraîcheur de l'appelant : replanifier avec les mêmes personnes ne rappelle pas Google.
+
+Le cache est propre à chaque processus, mais les invalidations (notifications push Google)
+sont datées dans la base SQLite partagée du gestionnaire de quotas (QUOTA_DB_PATH) : une
+entrée récupérée avant la dernière invalidation de son calendrier est ignorée par tous les
+workers de la machine, pas seulement par celui qui a reçu la notification.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from services.google_calendar_service import GoogleCalendarService
+from services.google_client_factory import build_calendar_service
+
+BusyBlocks = List[Tuple[datetime, datetime]]
+
+# Clé de l'invalidation de tous les calendriers
+ALL_CALENDARS = "*"
+
+
+class FreeBusyCache:
+    """Cache process-wide des plages occupées, par calendrier"""
+
+    # calendar_id -> liste de (récupéré_à, début_fenêtre, fin_fenêtre, plages)
+    _entries: Dict[str, List[Tuple[float, datetime, datetime, BusyBlocks]]] = {}
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @classmethod
+    def _connection(cls) -> sqlite3.Connection:
+        # Une connexion par thread, sur le fichier partagé avec QuotaManager
+        conn = getattr(cls._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(Config.QUOTA_DB_PATH)), exist_ok=True)
+            conn = sqlite3.connect(Config.QUOTA_DB_PATH, timeout=30, isolation_level=None)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS freebusy_invalidations ("
+                "calendar_id TEXT PRIMARY KEY, invalidated_at REAL NOT NULL)"
+            )
+            cls._local.conn = conn
+        return conn
+
+    @classmethod
+    def _invalidation_stamps(cls, calendar_ids: List[str]) -> Dict[str, float]:
+        """Date de la dernière invalidation de chaque calendrier (invalidation globale comprise)"""
+        keys = [*calendar_ids, ALL_CALENDARS]
+        rows = dict(cls._connection().execute(
+            f"SELECT calendar_id, invalidated_at FROM freebusy_invalidations "
+            f"WHERE calendar_id IN ({','.join('?' * len(keys))})",
+            keys
+        ).fetchall())
+        everything = rows.get(ALL_CALENDARS, 0.0)
+        return {calendar_id: max(rows.get(calendar_id, 0.0), everything) for calendar_id in calendar_ids}
+
+    @staticmethod
+    def _window(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+        """Élargit la fenêtre aux jours entiers pour que les demandes voisines partagent l'entrée"""
+        day_start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+        if day_end < end:
+            day_end += timedelta(days=1)
+        return day_start, day_end
+
+    @classmethod
+    def _lookup(
+        cls, calendar_id: str, start: datetime, end: datetime, max_age: float, invalidated_at: float
+    ) -> Optional[BusyBlocks]:
+        now = time.time()
+        for fetched_at, window_start, window_end, blocks in cls._entries.get(calendar_id, []):
+            if fetched_at <= invalidated_at:
+                continue
+            if now - fetched_at <= max_age and window_start <= start and end <= window_end:
+                return [block for block in blocks if block[0] < end and block[1] > start]
+        return None
+
+    @classmethod
+    def _store(
+        cls, calendar_id: str, fetched_at: float, window_start: datetime, window_end: datetime, blocks: BusyBlocks
+    ):
+        now = time.time()
+        entries = [
+            entry for entry in cls._entries.get(calendar_id, [])
+            if now - entry[0] <= Config.FREEBUSY_CACHE_TTL_SECONDS
+        ]
+        entries.insert(0, (fetched_at, window_start, window_end, blocks))
+        cls._entries[calendar_id] = entries
+
+    @classmethod
+    def get_busy_blocks(
+        cls,
+        calendar_ids: List[str],
+        start: datetime,
+        end: datetime,
+        max_staleness_seconds: Optional[float] = None,
+        calendar_service: Optional[GoogleCalendarService] = None
+    ) -> Dict[str, BusyBlocks]:
+        """
+        Retourne les plages occupées de chaque calendrier sur [start, end]
+
+        Seuls les calendriers absents du cache (ou trop anciens) sont demandés à Google,
+        en un appel freebusy.query groupé.
+
+        Args:
+            calendar_ids: IDs des calendriers (emails des participants)
+            start: Début de la fenêtre
+            end: Fin de la fenêtre
+            max_staleness_seconds: Âge maximum accepté (FREEBUSY_STALENESS_SECONDS par défaut)
+            calendar_service: Service Google Calendar (celui du mode de simulation par défaut)
+
+        Returns:
+            Dictionnaire calendar_id -> plages occupées ; les calendriers en erreur sont absents
+        """
+        max_age = min(
+            Config.FREEBUSY_STALENESS_SECONDS if max_staleness_seconds is None else max_staleness_seconds,
+            Config.FREEBUSY_CACHE_TTL_SECONDS
+        )
+        result = {}
+        missing = []
+        calendar_ids = list(dict.fromkeys(calendar_ids))
+        stamps = cls._invalidation_stamps(calendar_ids) if calendar_ids else {}
+        with cls._lock:
+            for calendar_id in calendar_ids:
+                blocks = cls._lookup(calendar_id, start, end, max_age, stamps[calendar_id])
+                if blocks is None:
+                    missing.append(calendar_id)
+                else:
+                    result[calendar_id] = blocks
+
+        if missing:
+            window_start, window_end = cls._window(start, end)
+            calendar_service = calendar_service or build_calendar_service()
+            # Daté du début de l'appel : une invalidation reçue pendant l'appel l'emporte
+            fetched_at = time.time()
+            fetched = calendar_service.query_freebusy(missing, window_start, window_end)
+            with cls._lock:
+                for calendar_id, blocks in fetched.items():
+                    cls._store(calendar_id, fetched_at, window_start, window_end, blocks)
+                    result[calendar_id] = [block for block in blocks if block[0] < end and block[1] > start]
+
+        return result
+
+    @classmethod
+    def invalidate(cls, calendar_id: Optional[str] = None):
+        """Oublie les plages en cache d'un calendrier (ou de tous), dans tous les processus de la machine"""
+        cls._connection().execute(
+            "INSERT INTO freebusy_invalidations (calendar_id, invalidated_at) VALUES (?, ?) "
+            "ON CONFLICT(calendar_id) DO UPDATE SET invalidated_at = excluded.invalidated_at",
+            (calendar_id or ALL_CALENDARS, time.time())
+        )
+        with cls._lock:
+            if calendar_id is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop(calendar_id, None)
@@ -6,19 +6,50 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Dict, List
 import os
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+import socket
+import threading
+import time
+from google.auth.exceptions import GoogleAuthError
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-import pickle
+from googleapiclient.errors import HttpError
+import httplib2
+import logging
+from services.credential_manager import CredentialManager
+from services.quota_manager import QuotaManager
+
+logger = logging.getLogger(__name__)
 
 
 class GmailAPIService:
-    """Service pour envoyer des emails via l'API Gmail"""
+    """
+    Service pour envoyer des emails via l'API Gmail
+
+    Les credentials et le client Gmail sont partagés par toutes les instances du processus :
+    le token n'est lu sur disque et le document de découverte construit qu'une seule fois.
+    Chaque thread garde sa propre connexion HTTP (httplib2 n'est pas thread-safe),
+    réutilisée d'un envoi à l'autre.
+    """
 
-    # Si vous modifiez ces scopes, supprimez le fichier token.pickle
+    # Si vous modifiez ces scopes, supprimez le fichier gmail_token.pickle
     SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+    # Gmail recommande au plus 50 requêtes par lot
+    BATCH_SIZE = 50
+    BATCH_MAX_ATTEMPTS = 4
+    # Codes HTTP pour lesquels un nouvel essai a un sens
+    RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+    # Raisons d'un 403 dû au débit (et non à un refus définitif)
+    RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+    # Erreurs levées avant l'envoi de la requête batch (aucun message n'a pu partir)
+    NOT_SENT_ERRORS = (httplib2.ServerNotFoundError, ConnectionRefusedError, socket.gaierror, GoogleAuthError)
+
+    # État partagé par le processus
+    _creds = None
+    _service = None
+    _lock = threading.Lock()
+    _local = threading.local()
+
     def __init__(self):
         """Initialise le service Gmail API"""
         self.credentials_path = os.path.join(
@@ -27,42 +58,59 @@ class GmailAPIService:
         self.token_path = os.path.join(
             os.path.dirname(__file__), '..', 'credentials', 'gmail_token.pickle'
         )
-        self.creds = None
 
-    def _authenticate(self):
-        """Authentifie l'utilisateur via OAuth2"""
-        # Le token sauvegardé permet d'éviter de se reconnecter à chaque fois
-        if os.path.exists(self.token_path):
-            with open(self.token_path, 'rb') as token:
-                self.creds = pickle.load(token)
-
-        # Si pas de credentials valides, demander à l'utilisateur de se connecter
-        if not self.creds or not self.creds.valid:
-            if self.creds and self.creds.expired and self.creds.refresh_token:
-                self.creds.refresh(Request())
-            else:
-                if not os.path.exists(self.credentials_path):
-                    print(f"❌ Fichier credentials manquant: {self.credentials_path}")
-                    print("\n📋 Pour configurer Gmail API:")
-                    print("1. Allez sur https://console.cloud.google.com/")
-                    print("2. Créez un projet ou sélectionnez-en un")
-                    print("3. Activez Gmail API")
-                    print("4. Créez des credentials OAuth 2.0")
-                    print("5. Téléchargez le fichier JSON")
-                    print(f"6. Sauvegardez-le comme: {self.credentials_path}")
-                    return False
-
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_path, self.SCOPES
-                )
-                self.creds = flow.run_local_server(port=0)
+    @property
+    def creds(self):
+        return GmailAPIService._creds
 
-            # Sauvegarder le token pour la prochaine fois
-            with open(self.token_path, 'wb') as token:
-                pickle.dump(self.creds, token)
+    def _authenticate(self):
+        """Authentifie l'utilisateur via OAuth2 (credentials partagés par CredentialManager)"""
+        creds = CredentialManager.get(
+            "gmail", self.credentials_path, self.token_path, self.SCOPES,
+            setup_hint="(activez Gmail API sur https://console.cloud.google.com/, "
+                       "créez des credentials OAuth 2.0 et sauvegardez le fichier JSON à cet emplacement)"
+        )
+        if creds is None:
+            return False
 
+        if creds is not GmailAPIService._creds:
+            with GmailAPIService._lock:
+                if creds is not GmailAPIService._creds:
+                    # Nouvelles credentials : le client et les connexions doivent être recréés
+                    GmailAPIService._service = None
+                    GmailAPIService._local = threading.local()
+                    GmailAPIService._creds = creds
         return True
 
+    def _get_service(self):
+        """Retourne le client Gmail partagé, construit au premier appel"""
+        if not self._authenticate():
+            return None
+
+        if GmailAPIService._service is None:
+            with GmailAPIService._lock:
+                if GmailAPIService._service is None:
+                    GmailAPIService._service = build(
+                        'gmail', 'v1', credentials=GmailAPIService._creds, cache_discovery=False
+                    )
+        return GmailAPIService._service
+
+    def _get_http(self):
+        """Connexion HTTP authentifiée du thread courant (keep-alive entre les envois)"""
+        local = GmailAPIService._local
+        if getattr(local, "http", None) is None:
+            local.http = AuthorizedHttp(GmailAPIService._creds, http=httplib2.Http())
+        return local.http
+
+    @staticmethod
+    def _build_raw(to_email: str, subject: str, message: str) -> str:
+        """Construit le message MIME encodé en base64 attendu par l'API"""
+        msg = MIMEMultipart()
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(message, 'plain', 'utf-8'))
+        return base64.urlsafe_b64encode(msg.as_bytes()).decode()
+
     def send_email(self, to_email: str, subject: str, message: str) -> bool:
         """
         Envoie un email via l'API Gmail
@@ -76,38 +124,160 @@ class GmailAPIService:
             True si l'envoi a réussi, False sinon
         """
         try:
-            # S'authentifier
-            if not self._authenticate():
+            # Client Gmail partagé (authentification faite une seule fois par processus)
+            service = self._get_service()
+            if not service:
                 return False
 
-            # Créer le service Gmail
-            service = build('gmail', 'v1', credentials=self.creds)
-
-            # Créer le message
-            msg = MIMEMultipart()
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(message, 'plain', 'utf-8'))
-
-            # Encoder le message en base64
-            raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
-
-            # Envoyer via l'API
-            message_body = {'raw': raw}
+            # Envoyer via l'API (en respectant le quota partagé entre processus)
+            QuotaManager.acquire("gmail.send")
+            message_body = {'raw': self._build_raw(to_email, subject, message)}
             send_message = service.users().messages().send(
                 userId='me', body=message_body
-            ).execute()
+            ).execute(http=self._get_http())
 
-            print(f"✅ Email envoyé avec succès à {to_email} (ID: {send_message['id']})")
+            logger.info(
+                "Email envoyé avec succès",
+                extra={"stage": "gmail_send", "to": to_email, "message_id": send_message['id'], "sampled": True}
+            )
             return True
 
         except Exception as e:
-            print(f"❌ Erreur lors de l'envoi de l'email à {to_email}: {str(e)}")
+            logger.error(
+                "Erreur lors de l'envoi de l'email: %s", str(e),
+                extra={"stage": "gmail_send", "to": to_email}
+            )
             return False
 
+    def send_batch(self, messages: List[Dict]) -> Dict[str, Dict]:
+        """
+        Envoie plusieurs emails en une requête HTTP batch par lot de BATCH_SIZE
+
+        Seuls les messages en échec avec une erreur temporaire (429, 5xx, 403 de débit) sont
+        renvoyés, avec un délai exponentiel entre les tentatives. Si la requête batch échoue
+        après son envoi (délai dépassé, connexion coupée), Gmail a pu accepter les messages
+        sans réponse : ils ne sont pas renvoyés mais signalés "unknown" (pas de doublon).
+
+        Args:
+            messages: Liste de dictionnaires {"key", "to", "subject", "message"} ;
+                "key" identifie le destinataire dans le résultat
+
+        Returns:
+            Dictionnaire str(key) -> {"sent": bool, "message_id" ou "error", "attempts": int,
+            "unknown": True si l'envoi a pu avoir lieu}
+        """
+        messages = [dict(item, key=str(item["key"])) for item in messages]
+        results = {
+            item["key"]: {"sent": False, "error": "Non envoyé", "attempts": 0}
+            for item in messages
+        }
+        if not messages:
+            return results
+
+        try:
+            service = self._get_service()
+        except Exception as e:
+            service = None
+            logger.error("Erreur d'authentification Gmail: %s", str(e), extra={"stage": "gmail_batch"})
+        if not service:
+            for result in results.values():
+                result["error"] = "Authentification Gmail impossible"
+            return results
+
+        pending = list(messages)
+        for attempt in range(1, self.BATCH_MAX_ATTEMPTS + 1):
+            if attempt > 1:
+                time.sleep(min(2 ** (attempt - 2), 8))
+
+            retry = []
+            for start in range(0, len(pending), self.BATCH_SIZE):
+                chunk = pending[start:start + self.BATCH_SIZE]
+                retry.extend(self._execute_batch(service, chunk, results, attempt))
+
+            if not retry:
+                break
+            pending = retry
+
+        sent = sum(1 for result in results.values() if result["sent"])
+        logger.info(
+            "Envoi groupé terminé: %d/%d emails envoyés", sent, len(messages),
+            extra={"stage": "gmail_batch", "sent": sent, "total": len(messages)}
+        )
+        return results
+
+    def _execute_batch(self, service, chunk: List[Dict], results: Dict[str, Dict], attempt: int) -> List[Dict]:
+        """Exécute un lot et retourne les messages à renvoyer"""
+        by_key = {item["key"]: item for item in chunk}
+        retry = []
+
+        def callback(request_id, response, exception):
+            item = by_key[request_id]
+            result = results[request_id]
+            result["attempts"] = attempt
+            if exception is None:
+                results[request_id] = {"sent": True, "message_id": response.get("id"), "attempts": attempt}
+                return
+            status = exception.resp.status if isinstance(exception, HttpError) else None
+            result["error"] = str(exception)
+            if self._is_retryable(exception):
+                retry.append(item)
+            else:
+                logger.error(
+                    "Échec définitif de l'envoi: %s", str(exception),
+                    extra={"stage": "gmail_batch", "to": item["to"], "status": status}
+                )
+
+        batch = service.new_batch_http_request(callback=callback)
+        for item in chunk:
+            batch.add(
+                service.users().messages().send(
+                    userId='me', body={'raw': self._build_raw(item["to"], item["subject"], item["message"])}
+                ),
+                request_id=item["key"]
+            )
+
+        QuotaManager.acquire("gmail.send", len(chunk))
+        try:
+            batch.execute(http=self._get_http())
+        except Exception as e:
+            # Erreur sur la requête batch elle-même : seuls les messages sans réponse sont concernés
+            unanswered = [item for item in chunk if results[item["key"]]["attempts"] < attempt]
+            for item in unanswered:
+                results[item["key"]].update(error=str(e), attempts=attempt)
+            if isinstance(e, HttpError) or isinstance(e, self.NOT_SENT_ERRORS):
+                # Lot refusé par Gmail ou jamais envoyé : aucun message n'est parti
+                logger.warning("Erreur lors de l'envoi du lot: %s", str(e), extra={"stage": "gmail_batch"})
+                if isinstance(e, HttpError) and not self._is_retryable(e):
+                    return retry
+                return retry + unanswered
+            # Délai dépassé, connexion coupée... : Gmail a pu accepter les messages
+            logger.error(
+                "Résultat du lot inconnu, messages non renvoyés: %s", str(e),
+                extra={"stage": "gmail_batch", "count": len(unanswered)}
+            )
+            for item in unanswered:
+                results[item["key"]]["unknown"] = True
+            return retry
+
+        return retry
+
+    @classmethod
+    def _is_retryable(cls, exception: Exception) -> bool:
+        """Vrai pour une erreur HTTP temporaire (429, 5xx ou 403 de dépassement de débit)"""
+        if not isinstance(exception, HttpError):
+            return False
+        status = exception.resp.status
+        if status in cls.RETRYABLE_STATUSES:
+            return True
+        if status == 403:
+            content = exception.content.decode("utf-8", "replace") if isinstance(exception.content, bytes) \
+                else str(exception.content or "")
+            return any(reason in content for reason in cls.RATE_LIMIT_REASONS)
+        return False
+
     def send_meeting_invitations(self, invitations: List[Dict], participants: List[Dict]) -> Dict[str, bool]:
         """
-        Envoie les invitations par email à tous les participants
+        Envoie les invitations par email à tous les participants (en une requête batch)
 
         Args:
             invitations: Liste des invitations générées
@@ -117,27 +287,39 @@ class GmailAPIService:
             Dictionnaire avec le statut d'envoi pour chaque participant
         """
         results = {}
+        messages = []
+
+        # Utiliser la première invitation
+        invitation = invitations[0] if invitations else None
 
         for participant in participants:
             email = participant.get('email')
             if not email:
-                print(f"Pas d'email pour le participant {participant.get('name', participant['id'])}")
+                logger.warning(
+                    "Pas d'email pour le participant %s", participant.get('name', participant['id']),
+                    extra={"stage": "gmail_send"}
+                )
                 results[participant['id']] = False
                 continue
 
-            # Utiliser la première invitation
-            invitation = invitations[0] if invitations else None
             if not invitation:
-                print(f"Pas d'invitation disponible pour {email}")
+                logger.warning(
+                    "Pas d'invitation disponible", extra={"stage": "gmail_send", "to": email}
+                )
                 results[participant['id']] = False
                 continue
 
-            success = self.send_email(
-                to_email=email,
-                subject=invitation['subject'],
-                message=invitation['message']
-            )
+            messages.append({
+                "key": str(participant['id']),
+                "to": email,
+                "subject": invitation['subject'],
+                "message": invitation['message']
+            })
 
-            results[participant['id']] = success
+        batch_results = self.send_batch(messages)
+        for participant in participants:
+            key = str(participant['id'])
+            if key in batch_results:
+                results[participant['id']] = batch_results[key]["sent"]
 
         return results
@@ -3,14 +3,17 @@ Service pour gérer Google Calendar API
 Permet de créer, modifier et supprimer des événements dans Google Agenda
 """
 import os
-import pickle
-from datetime import datetime
-from typing import Dict, List, Optional
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import logging
+from config import Config
+from services.credential_manager import CredentialManager
+from services.quota_manager import QuotaManager
+
+logger = logging.getLogger(__name__)
 
 
 class GoogleCalendarService:
@@ -35,64 +38,42 @@ class GoogleCalendarService:
 
     def _authenticate(self) -> bool:
         """
-        Authentifie l'utilisateur via OAuth2
+        Authentifie l'utilisateur via OAuth2 (credentials partagés par CredentialManager)
         
         Returns:
             True si l'authentification a réussi, False sinon
         """
-        # Charger le token sauvegardé s'il existe
-        if os.path.exists(self.token_path):
-            with open(self.token_path, 'rb') as token:
-                self.creds = pickle.load(token)
-
-        # Si pas de credentials valides, demander l'authentification
-        if not self.creds or not self.creds.valid:
-            if self.creds and self.creds.expired and self.creds.refresh_token:
-                try:
-                    self.creds.refresh(Request())
-                except Exception as e:
-                    print(f"❌ Erreur lors du refresh du token: {str(e)}")
-                    # Supprimer le token invalide
-                    if os.path.exists(self.token_path):
-                        os.remove(self.token_path)
-                    return False
-            else:
-                if not os.path.exists(self.credentials_path):
-                    print(f"❌ Fichier credentials manquant: {self.credentials_path}")
-                    print("\n📋 Pour configurer Google Calendar API:")
-                    print("1. Allez sur https://console.cloud.google.com/")
-                    print("2. Sélectionnez votre projet (ou créez-en un)")
-                    print("3. Activez Google Calendar API")
-                    print("4. Créez des credentials OAuth 2.0")
-                    print("5. Téléchargez le fichier JSON")
-                    print(f"6. Sauvegardez-le comme: {self.credentials_path}")
-                    print("\nNote: Vous pouvez utiliser le même credentials.json que Gmail")
-                    print("      en le copiant et renommant en calendar_credentials.json")
-                    return False
-
-                try:
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        self.credentials_path, self.SCOPES
-                    )
-                    self.creds = flow.run_local_server(port=0)
-                except Exception as e:
-                    print(f"❌ Erreur lors de l'authentification: {str(e)}")
-                    return False
-
-            # Sauvegarder le token pour la prochaine fois
-            with open(self.token_path, 'wb') as token:
-                pickle.dump(self.creds, token)
-
+        creds = CredentialManager.get(
+            "calendar", self.credentials_path, self.token_path, self.SCOPES,
+            setup_hint="(activez Google Calendar API sur https://console.cloud.google.com/, "
+                       "créez des credentials OAuth 2.0 et sauvegardez le fichier JSON à cet emplacement ; "
+                       "le même fichier que Gmail peut être réutilisé)"
+        )
+        if creds is None:
+            return False
+        if creds is not self.creds:
+            # Nouvelles credentials : le client doit être reconstruit
+            self.creds = creds
+            self.service = None
         return True
 
     def _get_service(self):
         """Obtient le service Google Calendar API"""
+        # Vérifié à chaque appel : le token est rafraîchi avant son expiration
+        if not self._authenticate():
+            return None
         if not self.service:
-            if not self._authenticate():
-                return None
             self.service = build('calendar', 'v3', credentials=self.creds)
         return self.service
 
+    # Réponses partielles (fields=) : seuls les champs utilisés sont téléchargés
+    EVENT_SUMMARY_FIELDS = 'id,etag,htmlLink,summary,start,end'
+    EVENT_DETAIL_FIELDS = (
+        'id,etag,htmlLink,summary,start,end,description,location,'
+        'attendees(email,displayName,responseStatus)'
+    )
+    LIST_FIELDS = 'items(id,summary,start,end,htmlLink)'
+
     def create_event(
         self,
         summary: str,
@@ -151,13 +132,17 @@ class GoogleCalendarService:
                 }
 
             # Créer l'événement
+            QuotaManager.acquire("calendar.events.insert")
             created_event = service.events().insert(
                 calendarId=calendar_id,
                 body=event,
                 sendUpdates='all'  # Envoie des invitations aux participants
             ).execute()
 
-            print(f"✅ Événement créé dans Google Calendar: {created_event.get('htmlLink')}")
+            logger.info(
+                "Événement créé dans Google Calendar",
+                extra={"stage": "calendar_create", "event_id": created_event['id'], "sampled": True}
+            )
             
             return {
                 'id': created_event['id'],
@@ -168,12 +153,10 @@ class GoogleCalendarService:
             }
 
         except HttpError as error:
-            print(f"❌ Erreur HTTP lors de la création de l'événement: {error}")
+            logger.error("Erreur HTTP lors de la création de l'événement: %s", error, extra={"stage": "calendar_create"})
             return None
-        except Exception as e:
-            print(f"❌ Erreur lors de la création de l'événement dans Google Calendar: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Erreur lors de la création de l'événement dans Google Calendar", extra={"stage": "calendar_create"})
             return None
 
     def update_event(
@@ -185,11 +168,16 @@ class GoogleCalendarService:
         description: str = None,
         attendees: List[str] = None,
         location: str = None,
-        calendar_id: str = 'primary'
+        calendar_id: str = 'primary',
+        etag: str = None
     ) -> Optional[Dict]:
         """
         Met à jour un événement existant dans Google Calendar
         
+        Une seule requête events.patch ne contenant que les champs fournis. Avec `etag`
+        (renvoyé par get_event ou une mise à jour précédente), la modification est refusée
+        si l'événement a changé entre-temps (If-Match) : aucune modification n'est écrasée.
+        
         Args:
             event_id: ID de l'événement à modifier
             summary: Nouveau titre (optionnel)
@@ -199,61 +187,74 @@ class GoogleCalendarService:
             attendees: Nouvelle liste de participants (optionnel)
             location: Nouveau lieu (optionnel)
             calendar_id: ID du calendrier
+            etag: ETag attendu de l'événement (optionnel)
             
         Returns:
-            Dictionnaire avec les détails de l'événement modifié ou None si erreur
+            Dictionnaire avec les détails de l'événement modifié (dont le nouvel etag)
+            ou None si erreur ou conflit
         """
         try:
             service = self._get_service()
             if not service:
                 return None
 
-            # Récupérer l'événement existant
-            event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
-
-            # Mettre à jour les champs fournis
+            # Seuls les champs fournis sont envoyés
+            patch = {}
             if summary is not None:
-                event['summary'] = summary
+                patch['summary'] = summary
             if location is not None:
-                event['location'] = location
+                patch['location'] = location
             if description is not None:
-                event['description'] = description
+                patch['description'] = description
             if start_datetime is not None:
-                event['start'] = {
+                patch['start'] = {
                     'dateTime': start_datetime.isoformat(),
                     'timeZone': 'Europe/Paris',
                 }
             if end_datetime is not None:
-                event['end'] = {
+                patch['end'] = {
                     'dateTime': end_datetime.isoformat(),
                     'timeZone': 'Europe/Paris',
                 }
             if attendees is not None:
-                event['attendees'] = [{'email': email} for email in attendees]
+                patch['attendees'] = [{'email': email} for email in attendees]
 
-            # Sauvegarder les modifications
-            updated_event = service.events().update(
+            request = service.events().patch(
                 calendarId=calendar_id,
                 eventId=event_id,
-                body=event,
-                sendUpdates='all'
-            ).execute()
-
-            print(f"✅ Événement mis à jour dans Google Calendar: {updated_event.get('htmlLink')}")
+                body=patch,
+                sendUpdates='all',
+                fields=self.EVENT_SUMMARY_FIELDS
+            )
+            if etag:
+                request.headers['If-Match'] = etag
+            updated_event = request.execute()
+
+            logger.info(
+                "Événement mis à jour dans Google Calendar",
+                extra={"stage": "calendar_update", "event_id": event_id, "fields": sorted(patch), "sampled": True}
+            )
             
             return {
                 'id': updated_event['id'],
+                'etag': updated_event.get('etag'),
                 'htmlLink': updated_event['htmlLink'],
-                'summary': updated_event['summary'],
+                'summary': updated_event.get('summary', ''),
                 'start': updated_event['start'],
                 'end': updated_event['end']
             }
 
         except HttpError as error:
-            print(f"❌ Erreur HTTP lors de la modification de l'événement: {error}")
+            if error.resp.status == 412:
+                logger.warning(
+                    "Événement modifié entre-temps, mise à jour annulée",
+                    extra={"stage": "calendar_update", "event_id": event_id}
+                )
+                return None
+            logger.error("Erreur HTTP lors de la modification de l'événement: %s", error, extra={"stage": "calendar_update"})
             return None
         except Exception as e:
-            print(f"❌ Erreur lors de la modification de l'événement: {str(e)}")
+            logger.error("Erreur lors de la modification de l'événement: %s", str(e), extra={"stage": "calendar_update"})
             return None
 
     def delete_event(self, event_id: str, calendar_id: str = 'primary') -> bool:
@@ -278,14 +279,17 @@ class GoogleCalendarService:
                 sendUpdates='all'
             ).execute()
 
-            print(f"✅ Événement supprimé de Google Calendar")
+            logger.info(
+                "Événement supprimé de Google Calendar",
+                extra={"stage": "calendar_delete", "event_id": event_id, "sampled": True}
+            )
             return True
 
         except HttpError as error:
-            print(f"❌ Erreur HTTP lors de la suppression de l'événement: {error}")
+            logger.error("Erreur HTTP lors de la suppression de l'événement: %s", error, extra={"stage": "calendar_delete"})
             return False
         except Exception as e:
-            print(f"❌ Erreur lors de la suppression de l'événement: {str(e)}")
+            logger.error("Erreur lors de la suppression de l'événement: %s", str(e), extra={"stage": "calendar_delete"})
             return False
 
     def get_event(self, event_id: str, calendar_id: str = 'primary') -> Optional[Dict]:
@@ -304,10 +308,13 @@ class GoogleCalendarService:
             if not service:
                 return None
 
-            event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
+            event = service.events().get(
+                calendarId=calendar_id, eventId=event_id, fields=self.EVENT_DETAIL_FIELDS
+            ).execute()
             
             return {
                 'id': event['id'],
+                'etag': event.get('etag'),
                 'htmlLink': event['htmlLink'],
                 'summary': event.get('summary', ''),
                 'start': event['start'],
@@ -318,39 +325,37 @@ class GoogleCalendarService:
             }
 
         except HttpError as error:
-            print(f"❌ Erreur HTTP lors de la récupération de l'événement: {error}")
+            logger.error("Erreur HTTP lors de la récupération de l'événement: %s", error, extra={"stage": "calendar_get"})
             return None
         except Exception as e:
-            print(f"❌ Erreur lors de la récupération de l'événement: {str(e)}")
+            logger.error("Erreur lors de la récupération de l'événement: %s", str(e), extra={"stage": "calendar_get"})
             return None
 
-    def list_upcoming_events(self, max_results: int = 10, calendar_id: str = 'primary') -> List[Dict]:
+    def list_upcoming_events(
+        self,
+        max_results: int = 10,
+        calendar_id: str = 'primary',
+        time_max: Optional[datetime] = None
+    ) -> List[Dict]:
         """
         Liste les événements à venir
         
         Args:
             max_results: Nombre maximum d'événements à retourner
             calendar_id: ID du calendrier
+            time_max: Fin de la période (optionnel)
             
         Returns:
             Liste des événements à venir
         """
         try:
-            service = self._get_service()
-            if not service:
-                return []
-
-            now = datetime.utcnow().isoformat() + 'Z'  # 'Z' indique UTC
-            
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                timeMin=now,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
+            events = self.iter_events(
+                calendar_id=calendar_id,
+                time_min=datetime.now(),
+                time_max=time_max,
+                page_size=min(max_results, self.MAX_PAGE_SIZE),
+                max_results=max_results
+            )
             
             return [{
                 'id': event['id'],
@@ -361,8 +366,411 @@ class GoogleCalendarService:
             } for event in events]
 
         except HttpError as error:
-            print(f"❌ Erreur HTTP lors de la récupération des événements: {error}")
+            logger.error("Erreur HTTP lors de la récupération des événements: %s", error, extra={"stage": "calendar_list"})
             return []
         except Exception as e:
-            print(f"❌ Erreur lors de la récupération des événements: {str(e)}")
+            logger.error("Erreur lors de la récupération des événements: %s", str(e), extra={"stage": "calendar_list"})
             return []
+
+    # events.list renvoie au plus 2500 événements par page
+    MAX_PAGE_SIZE = 2500
+
+    def iter_events(
+        self,
+        calendar_id: str = 'primary',
+        time_min: Optional[datetime] = None,
+        time_max: Optional[datetime] = None,
+        fields: str = LIST_FIELDS,
+        page_size: int = 250,
+        max_results: Optional[int] = None,
+        order_by_start: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Parcourt les événements d'un calendrier page par page (générateur)
+
+        Une page n'est demandée que lorsque la précédente a été consommée : la mémoire reste
+        constante quel que soit le nombre d'événements, et arrêter l'itération (break,
+        max_results) évite de télécharger les pages suivantes.
+
+        Args:
+            calendar_id: ID du calendrier
+            time_min: Début de la période (optionnel, heure locale si naïf)
+            time_max: Fin de la période (optionnel, heure locale si naïf)
+            fields: Champs des événements à renvoyer (réponse partielle)
+            page_size: Nombre d'événements par page (au plus MAX_PAGE_SIZE)
+            max_results: Nombre total maximum d'événements (optionnel)
+            order_by_start: Trier par date de début (événements récurrents développés)
+
+        Yields:
+            Événements bruts de l'API, limités aux champs demandés
+
+        Raises:
+            HttpError: Erreur de l'API pendant le parcours
+            RuntimeError: Si l'authentification est impossible
+        """
+        service = self._get_service()
+        if not service:
+            raise RuntimeError("Authentification Google Calendar impossible")
+
+        params = {
+            'calendarId': calendar_id,
+            'singleEvents': True,
+            'maxResults': max(1, min(page_size, self.MAX_PAGE_SIZE)),
+            # Le jeton de page doit faire partie du masque pour pouvoir paginer
+            'fields': fields if 'nextPageToken' in fields else f'nextPageToken,{fields}',
+        }
+        if order_by_start:
+            params['orderBy'] = 'startTime'
+        if time_min:
+            params['timeMin'] = self._rfc3339(time_min)
+        if time_max:
+            params['timeMax'] = self._rfc3339(time_max)
+
+        returned = 0
+        for page in self._iter_pages(service, params):
+            for event in page.get('items', []):
+                yield event
+                returned += 1
+                if max_results is not None and returned >= max_results:
+                    return
+
+    @staticmethod
+    def _iter_pages(service, params: Dict) -> Iterator[Dict]:
+        """Exécute events.list en suivant nextPageToken, une page à la fois"""
+        params = dict(params)
+        while True:
+            response = service.events().list(**params).execute()
+            yield response
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return
+            params['pageToken'] = page_token
+
+    @staticmethod
+    def _rfc3339(value: datetime) -> str:
+        """Date RFC 3339 attendue par l'API (les dates naïves sont dans CALENDAR_TIMEZONE)"""
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=ZoneInfo(Config.CALENDAR_TIMEZONE))
+        return value.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+    # Google Calendar accepte au plus 50 requêtes par lot HTTP
+    BATCH_SIZE = 50
+    # Champs comparés par le réconciliateur (réponse partielle)
+    RECONCILE_FIELDS = 'id,etag,status,summary,start,end,attendees(email)'
+
+    def batch_get_events(
+        self,
+        event_ids: List[str],
+        calendar_id: str = 'primary',
+        fields: str = RECONCILE_FIELDS
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Récupère plusieurs événements par requêtes HTTP batch
+
+        Args:
+            event_ids: IDs des événements Google
+            calendar_id: ID du calendrier
+            fields: Champs à renvoyer (réponse partielle)
+
+        Returns:
+            Dictionnaire event_id -> événement, ou None si l'événement n'existe plus (404/410) ;
+            les événements en erreur (autre code) sont absents
+        """
+        results = {}
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                results[request_id] = response
+            elif isinstance(exception, HttpError) and exception.resp.status in (404, 410):
+                results[request_id] = None
+            else:
+                logger.warning(
+                    "Erreur lors de la récupération groupée: %s", str(exception),
+                    extra={"stage": "calendar_batch_get", "event_id": request_id}
+                )
+
+        self._execute_batch(
+            [(event_id, lambda service, event_id=event_id: service.events().get(
+                calendarId=calendar_id, eventId=event_id, fields=fields
+            )) for event_id in dict.fromkeys(event_ids)],
+            callback, "calendar.events.get", "calendar_batch_get"
+        )
+        return results
+
+    def batch_patch_events(
+        self,
+        patches: Dict[str, Dict],
+        calendar_id: str = 'primary',
+        etags: Optional[Dict[str, str]] = None
+    ) -> Dict[str, bool]:
+        """
+        Applique des modifications partielles (events.patch) à plusieurs événements par lots
+
+        Args:
+            patches: Dictionnaire event_id -> champs à modifier
+            calendar_id: ID du calendrier
+            etags: ETag attendu par événement (If-Match : refus si modifié entre-temps)
+
+        Returns:
+            Dictionnaire event_id -> True si la modification a réussi
+        """
+        results = {event_id: False for event_id in patches}
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                results[request_id] = True
+            else:
+                logger.warning(
+                    "Erreur lors de la modification groupée: %s", str(exception),
+                    extra={"stage": "calendar_batch_patch", "event_id": request_id}
+                )
+
+        def build_patch(service, event_id, body):
+            request = service.events().patch(
+                calendarId=calendar_id, eventId=event_id, body=body, sendUpdates='all', fields='id,etag'
+            )
+            if etags and etags.get(event_id):
+                request.headers['If-Match'] = etags[event_id]
+            return request
+
+        self._execute_batch(
+            [(event_id, lambda service, event_id=event_id, body=body: build_patch(service, event_id, body))
+             for event_id, body in patches.items()],
+            callback, "calendar.events.patch", "calendar_batch_patch"
+        )
+        return results
+
+    def _execute_batch(self, requests: List[Tuple[str, object]], callback, quota: str, stage: str):
+        """Exécute des requêtes (request_id, fabrique(service)) par lots de BATCH_SIZE"""
+        if not requests:
+            return
+        try:
+            service = self._get_service()
+            if not service:
+                return
+        except Exception as e:
+            logger.error("Erreur d'authentification Google Calendar: %s", str(e), extra={"stage": stage})
+            return
+
+        for start in range(0, len(requests), self.BATCH_SIZE):
+            chunk = requests[start:start + self.BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=callback)
+            for request_id, build_request in chunk:
+                batch.add(build_request(service), request_id=request_id)
+            try:
+                QuotaManager.acquire(quota, len(chunk))
+                batch.execute()
+            except Exception as e:
+                logger.error("Erreur lors de l'exécution du lot: %s", str(e), extra={"stage": stage})
+
+    # Nombre maximum de calendriers par appel freebusy.query
+    FREEBUSY_MAX_CALENDARS = 50
+
+    def query_freebusy(
+        self,
+        calendar_ids: List[str],
+        time_min: datetime,
+        time_max: datetime
+    ) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        """
+        Récupère les plages occupées de plusieurs calendriers
+
+        Un appel freebusy.query par groupe de FREEBUSY_MAX_CALENDARS calendriers.
+
+        Args:
+            calendar_ids: IDs des calendriers (emails des participants)
+            time_min: Début de la fenêtre (heure locale)
+            time_max: Fin de la fenêtre (heure locale)
+
+        Returns:
+            Dictionnaire calendar_id -> liste de (début, fin) en heure locale naïve ;
+            les calendriers en erreur (inaccessibles, appel échoué) sont absents
+        """
+        busy = {}
+        unique_ids = list(dict.fromkeys(calendar_ids))
+        if not unique_ids:
+            return busy
+
+        try:
+            service = self._get_service()
+            if not service:
+                return busy
+        except Exception as e:
+            logger.error("Erreur d'authentification Google Calendar: %s", str(e), extra={"stage": "calendar_freebusy"})
+            return busy
+
+        tz = ZoneInfo(Config.CALENDAR_TIMEZONE)
+        for start in range(0, len(unique_ids), self.FREEBUSY_MAX_CALENDARS):
+            group = unique_ids[start:start + self.FREEBUSY_MAX_CALENDARS]
+            body = {
+                'timeMin': time_min.replace(tzinfo=tz).isoformat() if time_min.tzinfo is None else time_min.isoformat(),
+                'timeMax': time_max.replace(tzinfo=tz).isoformat() if time_max.tzinfo is None else time_max.isoformat(),
+                'timeZone': Config.CALENDAR_TIMEZONE,
+                'items': [{'id': calendar_id} for calendar_id in group],
+            }
+            try:
+                QuotaManager.acquire("calendar.freebusy")
+                response = service.freebusy().query(body=body).execute()
+            except Exception as e:
+                logger.error(
+                    "Erreur lors de la requête freebusy: %s", str(e),
+                    extra={"stage": "calendar_freebusy", "calendars": len(group)}
+                )
+                continue
+
+            for calendar_id, calendar in response.get('calendars', {}).items():
+                if calendar.get('errors'):
+                    logger.warning(
+                        "Calendrier inaccessible: %s", calendar_id,
+                        extra={"stage": "calendar_freebusy", "errors": calendar['errors']}
+                    )
+                    continue
+                busy[calendar_id] = [
+                    (self._parse_local(block['start'], tz), self._parse_local(block['end'], tz))
+                    for block in calendar.get('busy', [])
+                ]
+
+        return busy
+
+    @staticmethod
+    def _parse_local(value: str, tz) -> datetime:
+        """Convertit une date RFC 3339 de l'API en datetime local naïf"""
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return parsed.astimezone(tz).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+    def watch_events(
+        self,
+        calendar_id: str,
+        channel_id: str,
+        address: str,
+        token: str,
+        ttl_seconds: int
+    ) -> Optional[Dict]:
+        """
+        Ouvre un canal de notifications (events.watch) pour un calendrier
+
+        Google envoie alors une requête POST à `address` à chaque modification.
+
+        Args:
+            calendar_id: ID du calendrier à surveiller
+            channel_id: Identifiant unique du canal (choisi par nous)
+            address: URL HTTPS du webhook
+            token: Secret renvoyé dans l'en-tête X-Goog-Channel-Token
+            ttl_seconds: Durée de vie demandée du canal
+
+        Returns:
+            Dictionnaire {"resource_id", "expiration" (datetime)} ou None si erreur
+        """
+        try:
+            service = self._get_service()
+            if not service:
+                return None
+
+            response = service.events().watch(
+                calendarId=calendar_id,
+                body={
+                    'id': channel_id,
+                    'type': 'web_hook',
+                    'address': address,
+                    'token': token,
+                    'params': {'ttl': str(ttl_seconds)},
+                }
+            ).execute()
+            return {
+                'resource_id': response.get('resourceId'),
+                'expiration': datetime.fromtimestamp(int(response['expiration']) / 1000),
+            }
+
+        except HttpError as error:
+            logger.error("Erreur HTTP lors de l'ouverture du canal: %s", error, extra={"stage": "calendar_watch"})
+            return None
+        except Exception as e:
+            logger.error("Erreur lors de l'ouverture du canal: %s", str(e), extra={"stage": "calendar_watch"})
+            return None
+
+    def stop_channel(self, channel_id: str, resource_id: str) -> bool:
+        """
+        Ferme un canal de notifications
+
+        Args:
+            channel_id: Identifiant du canal
+            resource_id: Identifiant de la ressource renvoyé par events.watch
+
+        Returns:
+            True si le canal a été fermé (ou n'existait plus), False sinon
+        """
+        try:
+            service = self._get_service()
+            if not service:
+                return False
+            service.channels().stop(body={'id': channel_id, 'resourceId': resource_id}).execute()
+            return True
+        except HttpError as error:
+            if error.resp.status == 404:
+                return True
+            logger.error("Erreur HTTP lors de la fermeture du canal: %s", error, extra={"stage": "calendar_watch"})
+            return False
+        except Exception as e:
+            logger.error("Erreur lors de la fermeture du canal: %s", str(e), extra={"stage": "calendar_watch"})
+            return False
+
+    # Champs utiles à la synchronisation (réponse partielle)
+    SYNC_FIELDS = (
+        'nextPageToken,nextSyncToken,'
+        'items(id,status,summary,start,end,transparency,attendees(self,responseStatus))'
+    )
+
+    def iter_event_changes(
+        self,
+        calendar_id: str = 'primary',
+        sync_token: Optional[str] = None,
+        time_min: Optional[datetime] = None
+    ) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+        """
+        Événements modifiés depuis le dernier jeton de synchronisation, page par page
+
+        Sans `sync_token`, fait un import complet (à partir de `time_min`). Les pages sont
+        demandées au fil de l'itération : une seule est en mémoire à la fois. Les
+        événements supprimés ont le statut "cancelled".
+
+        Args:
+            calendar_id: ID du calendrier
+            sync_token: Jeton renvoyé par la synchronisation précédente
+            time_min: Début de la fenêtre de l'import complet (ignoré avec sync_token)
+
+        Returns:
+            Itérateur de tuples (événements bruts de la page, nouveau jeton de
+            synchronisation) ; le jeton n'est renseigné que sur la dernière page
+
+        Raises:
+            HttpError: Erreur de l'API (410 si le jeton a expiré : refaire un import complet)
+            RuntimeError: Si l'authentification est impossible
+        """
+        service = self._get_service()
+        if not service:
+            raise RuntimeError("Authentification Google Calendar impossible")
+
+        params = {
+            'calendarId': calendar_id,
+            'singleEvents': True,
+            'maxResults': 2500,
+            'fields': self.SYNC_FIELDS,
+        }
+        if sync_token:
+            params['syncToken'] = sync_token
+        else:
+            params['showDeleted'] = False
+            if time_min:
+                params['timeMin'] = self._rfc3339(time_min)
+
+        count = 0
+        for response in self._iter_pages(service, params):
+            items = response.get('items', [])
+            count += len(items)
+            yield items, response.get('nextSyncToken')
+
+        logger.info(
+            "Changements Google Calendar récupérés",
+            extra={"stage": "calendar_sync", "calendar_id": calendar_id, "count": count,
+                   "incremental": bool(sync_token), "sampled": True}
+        )
@@ -0,0 +1,35 @@
+"""
+Construction des clients Google Calendar et Gmail utilisés par les services
+Centralise le choix entre les vrais clients et les doublures de simulation (SIMULATION_MODE)
+"""
+from config import Config
+from services.gmail_api_service import GmailAPIService
+from services.google_calendar_service import GoogleCalendarService
+
+
+def build_calendar_service() -> GoogleCalendarService:
+    """
+    Construit le client Google Calendar
+
+    Selon SIMULATION_MODE, retourne le vrai service, un service dont les résultats sont
+    enregistrés (record) ou un calendrier simulé en mémoire (replay). Les doublures ne
+    sont importées que dans ces modes.
+    """
+    if Config.SIMULATION_MODE == "replay":
+        from simulation.stand_ins import ReplayGoogleCalendarService
+        return ReplayGoogleCalendarService()
+    if Config.SIMULATION_MODE == "record":
+        from simulation.stand_ins import RecordingGoogleCalendarService
+        return RecordingGoogleCalendarService()
+    return GoogleCalendarService()
+
+
+def build_gmail_service() -> GmailAPIService:
+    """Construit le client Gmail (voir build_calendar_service pour les modes de simulation)"""
+    if Config.SIMULATION_MODE == "replay":
+        from simulation.stand_ins import ReplayGmailAPIService
+        return ReplayGmailAPIService()
+    if Config.SIMULATION_MODE == "record":
+        from simulation.stand_ins import RecordingGmailAPIService
+        return RecordingGmailAPIService()
+    return GmailAPIService()
@@ -2,12 +2,13 @@
 Agent de rédaction d'invitation
 Utilise LangChain pour générer des messages d'invitation personnalisés
 """
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from typing import Dict, List
 from datetime import datetime
 from config import Config
+from services.llm_factory import build_chat_model
+from services.profiling_service import track
 import os
 
 
@@ -16,11 +17,7 @@ class InvitationAgent:
     
     def __init__(self):
         """Initialise l'agent avec le modèle LLM"""
-        self.llm = ChatGroq(
-            model=Config.INVITATION_MODEL,
-            temperature=Config.INVITATION_TEMPERATURE,
-            api_key=Config.GROQ_API_KEY
-        )
+        self.llm = build_chat_model(Config.INVITATION_MODEL, Config.INVITATION_TEMPERATURE)
         
         # Charger le template depuis les fichiers
         self.invitation_template = self._load_invitation_template()
@@ -73,14 +70,15 @@ class InvitationAgent:
         
         try:
             # Générer le message avec le LLM
-            invitation_message = self.chain.invoke({
-                "subject": subject,
-                "participants": participant_names,
-                "date": date_str,
-                "start_time": start_time_str,
-                "end_time": end_time_str,
-                "objective": objective
-            })
+            with track("groq_llm"):
+                invitation_message = self.chain.invoke({
+                    "subject": subject,
+                    "participants": participant_names,
+                    "date": date_str,
+                    "start_time": start_time_str,
+                    "end_time": end_time_str,
+                    "objective": objective
+                })
             
             return {
                 "subject": f"Invitation: {subject}",
@@ -172,16 +170,17 @@ RAPPEL:
         
         try:
             # Générer le message personnalisé
-            invitation_message = personalized_chain.invoke({
-                "recipient_name": recipient_first_name,
-                "subject": subject,
-                "participants": all_participant_names,
-                "date": date_str,
-                "start_time": start_time_str,
-                "end_time": end_time_str,
-                "objective": objective,
-                "signature": Config.EMAIL_SIGNATURE
-            })
+            with track("groq_llm"):
+                invitation_message = personalized_chain.invoke({
+                    "recipient_name": recipient_first_name,
+                    "subject": subject,
+                    "participants": all_participant_names,
+                    "date": date_str,
+                    "start_time": start_time_str,
+                    "end_time": end_time_str,
+                    "objective": objective,
+                    "signature": Config.EMAIL_SIGNATURE
+                })
             
             return {
                 "subject": f"Invitation: {subject}",
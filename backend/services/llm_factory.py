@@ -0,0 +1,43 @@
+"""
+Construction des modèles de chat utilisés par les agents
+Centralise la création de ChatGroq pour pouvoir le remplacer en mode simulation
+"""
+from langchain_core.runnables import RunnableLambda
+from langchain_groq import ChatGroq
+from config import Config
+from services.quota_manager import QuotaManager
+from simulation.llm import recording_model, replay_model
+
+
+def build_chat_model(model: str, temperature: float):
+    """
+    Construit le modèle de chat d'un agent
+
+    Selon SIMULATION_MODE, retourne le vrai ChatGroq, un ChatGroq dont les réponses
+    sont enregistrées (record) ou un modèle qui rejoue les réponses enregistrées (replay).
+    Les appels réels passent d'abord par le quota partagé "groq.chat".
+
+    Args:
+        model: Nom du modèle Groq
+        temperature: Température du modèle
+
+    Returns:
+        Runnable LangChain utilisable dans une chaîne prompt | llm | parser
+    """
+    if Config.SIMULATION_MODE == "replay":
+        return replay_model(model)
+
+    llm = RunnableLambda(_acquire_chat_quota) | ChatGroq(
+        model=model,
+        temperature=temperature,
+        api_key=Config.GROQ_API_KEY
+    )
+    if Config.SIMULATION_MODE == "record":
+        return recording_model(llm, model)
+    return llm
+
+
+def _acquire_chat_quota(prompt_value):
+    """Attend un jeton du quota Groq chat puis transmet le prompt inchangé"""
+    QuotaManager.acquire("groq.chat")
+    return prompt_value
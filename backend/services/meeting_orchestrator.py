@@ -2,39 +2,41 @@
 Orchestrateur de réunions
 LLM principal qui coordonne la planification de réunions multi-participants
 """
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from services.availability_service import AvailabilityService
+from models.async_database import run_async
+from models.database import read_session
+from services.availability_service import AvailabilityService, AsyncAvailabilityService
+from services.google_client_factory import build_calendar_service, build_gmail_service
 from services.invitation_agent import InvitationAgent
-from services.calendar_event_service import CalendarEventService
+from services.meeting_service import MeetingService
+from services.email_outbox_service import EmailOutboxService
 from services.user_service import UserService
-from services.gmail_api_service import GmailAPIService
-from services.google_calendar_service import GoogleCalendarService
+from services.llm_factory import build_chat_model
 from services.t2s import t2s
+from services.profiling_service import track
 from config import Config
 from dateutil import parser as date_parser
 import json
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 class MeetingOrchestrator:
     """Orchestrateur principal qui coordonne la planification de réunions"""
     
     def __init__(self):
         """Initialise l'orchestrateur avec le modèle LLM"""
-        self.llm = ChatGroq(
-            model=Config.ORCHESTRATOR_MODEL,
-            temperature=Config.ORCHESTRATOR_TEMPERATURE,
-            api_key=Config.GROQ_API_KEY
-        )
+        self.llm = build_chat_model(Config.ORCHESTRATOR_MODEL, Config.ORCHESTRATOR_TEMPERATURE)
         
         self.invitation_agent = InvitationAgent()
-        self.gmail_service = GmailAPIService()
-        self.google_calendar_service = GoogleCalendarService()
+        self.gmail_service = build_gmail_service()
+        self.google_calendar_service = build_calendar_service()
         
         # Charger les templates depuis les fichiers
         self.slot_selection_template = self._load_slot_selection_template()
@@ -84,29 +86,38 @@ class MeetingOrchestrator:
             google_calendar_status = "Non synchronisé"
         
         # Statut des emails
+        emails_queued = sum(1 for result in email_results.values() if result.get("queued", False))
         emails_sent = sum(1 for result in email_results.values() if result.get("sent", False))
         total_emails = len(email_results)
-        if emails_sent == total_emails:
+        if emails_queued and emails_queued + emails_sent == total_emails:
+            email_status = f"Toutes les invitations sont en cours d'envoi ({total_emails}/{total_emails})"
+        elif emails_sent == total_emails:
             email_status = f"Toutes les invitations envoyées avec succès ({emails_sent}/{total_emails})"
-        elif emails_sent > 0:
+        elif emails_sent + emails_queued > 0:
             failed_participants = [
                 email_results[pid]["user_name"] 
                 for pid in email_results 
-                if not email_results[pid].get("sent", False)
+                if not email_results[pid].get("sent", False) and not email_results[pid].get("queued", False)
             ]
-            email_status = f"{emails_sent}/{total_emails} invitations envoyées, échec pour : {', '.join(failed_participants)}"
+            progress = []
+            if emails_sent:
+                progress.append(f"{emails_sent}/{total_emails} invitations envoyées")
+            if emails_queued:
+                progress.append(f"{emails_queued}/{total_emails} invitations en file d'envoi")
+            email_status = f"{', '.join(progress)}, échec pour : {', '.join(failed_participants)}"
         else:
             email_status = "Aucune invitation n'a pu être envoyée"
         
         # Générer la réponse avec le LLM
-        return self.natural_response_chain.invoke({
-            "subject": subject,
-            "datetime_range": datetime_range,
-            "participant_names": participant_names,
-            "reasoning": reasoning or "Créneau optimal sélectionné",
-            "google_calendar_status": google_calendar_status,
-            "email_status": email_status
-        })
+        with track("groq_llm"):
+            return self.natural_response_chain.invoke({
+                "subject": subject,
+                "datetime_range": datetime_range,
+                "participant_names": participant_names,
+                "reasoning": reasoning or "Créneau optimal sélectionné",
+                "google_calendar_status": google_calendar_status,
+                "email_status": email_status
+            })
     
     def _load_slot_selection_template(self):
         """Charge le template de sélection de créneau depuis les fichiers"""
@@ -166,10 +177,12 @@ class MeetingOrchestrator:
             Dictionnaire avec les informations extraites
         """
         try:
-            parsed = self.parsing_chain.invoke({"request_text": request_text})
+            with track("groq_llm"):
+                parsed = self.parsing_chain.invoke({"request_text": request_text})
             return parsed
         except Exception as e:
             # Fallback avec valeurs par défaut
+            logger.warning("Analyse de la demande impossible, valeurs par défaut utilisées: %s", str(e), extra={"stage": "parsing"})
             return {
                 "subject": "Réunion",
                 "objective": request_text,
@@ -207,12 +220,21 @@ class MeetingOrchestrator:
         preferences = parsed_request.get("preferences", {})
         
         # Étape 2: Convertir les noms des participants en IDs
+        # (tous les noms en un appel, recherche approchée insensible aux accents et à la casse)
         participant_ids = []
+        matches = UserService.resolve_participants(db, participant_names)
         for name in participant_names:
-            # Recherche par nom (approximative)
-            user = UserService.get_user_by_name(db, name)
-            if user:
-                participant_ids.append(user.id)
+            candidates = matches.get(name)
+            if not candidates:
+                logger.info("Participant introuvable", extra={"stage": "resolve_participants", "participant": name})
+                continue
+            if len(candidates) > 1 and candidates[1]["score"] == candidates[0]["score"]:
+                logger.info(
+                    "Nom de participant ambigu", extra={"stage": "resolve_participants", "participant": name,
+                                                        "candidates": [c["name"] for c in candidates]}
+                )
+            if candidates[0]["user_id"] not in participant_ids:
+                participant_ids.append(candidates[0]["user_id"])
         
         if not participant_ids:
             return {
@@ -229,14 +251,24 @@ class MeetingOrchestrator:
                 "error": "Aucun participant valide trouvé"
             }
         
-        # Étape 4: Trouver les créneaux disponibles
-        available_slots = AvailabilityService.get_available_slots(
-            db=db,
-            participant_ids=participant_ids,
-            start_date=preferred_start_date,
-            end_date=preferred_end_date,
-            meeting_duration_minutes=duration_minutes
-        )
+        # Étape 4: Trouver les créneaux disponibles (lectures seules, sur la réplique si configurée)
+        if Config.ASYNC_DB_ENABLED:
+            # Plages occupées de tous les participants récupérées en parallèle
+            available_slots = run_async(AsyncAvailabilityService.get_available_slots(
+                participant_ids=participant_ids,
+                start_date=preferred_start_date,
+                end_date=preferred_end_date,
+                meeting_duration_minutes=duration_minutes
+            ))
+        else:
+            with read_session() as read_db:
+                available_slots = AvailabilityService.get_available_slots(
+                    db=read_db,
+                    participant_ids=participant_ids,
+                    start_date=preferred_start_date,
+                    end_date=preferred_end_date,
+                    meeting_duration_minutes=duration_minutes
+                )
         
         if not available_slots:
             return {
@@ -253,13 +285,14 @@ class MeetingOrchestrator:
         try:
             slots_formatted = AvailabilityService.format_slots_for_llm(available_slots)
             
-            selection_result = self.selection_chain.invoke({
-                "available_slots": slots_formatted,
-                "subject": subject,
-                "duration": duration_minutes,
-                "participant_count": len(participants),
-                "preferences": json.dumps(preferences or {}, ensure_ascii=False)
-            })
+            with track("groq_llm"):
+                selection_result = self.selection_chain.invoke({
+                    "available_slots": slots_formatted,
+                    "subject": subject,
+                    "duration": duration_minutes,
+                    "participant_count": len(participants),
+                    "preferences": json.dumps(preferences or {}, ensure_ascii=False)
+                })
             
             # Récupérer le créneau sélectionné
             selected_index = selection_result.get("slot_index", 0)
@@ -269,6 +302,7 @@ class MeetingOrchestrator:
             
         except Exception as e:
             # Fallback: prendre le premier créneau
+            logger.warning("Sélection du créneau par le LLM impossible: %s", str(e), extra={"stage": "slot_selection"})
             selected_slot = available_slots[0]
             reasoning = "Créneau sélectionné automatiquement (erreur LLM)"
             alternative_indices = [1, 2] if len(available_slots) > 2 else []
@@ -288,48 +322,30 @@ class MeetingOrchestrator:
         attendee_emails = [p.get("email") for p in participants if p.get("email")]
         
         try:
-            google_calendar_event = self.google_calendar_service.create_event(
-                summary=subject,
-                start_datetime=selected_slot["start"],
-                end_datetime=selected_slot["end"],
-                description=f"{objective}\n\nParticipants: {', '.join([p['name'] for p in participants])}",
-                attendees=attendee_emails,
-                location=""
-            )
-            if google_calendar_event:
-                print(f"✅ Événement synchronisé avec Google Calendar: {google_calendar_event.get('htmlLink')}")
-        except Exception as e:
-            print(f"⚠️ Impossible de synchroniser avec Google Calendar: {str(e)}")
-            print("   L'événement sera quand même créé en base de données locale")
-        
-        # Étape 8: Créer les événements dans le calendrier local pour chaque participant
-        created_events = []
-        for participant in participants:
-            try:
-                event = CalendarEventService.create_event(
-                    db=db,
-                    user_id=participant["id"],
-                    type_id=1,  # Type par défaut, à ajuster selon vos besoins
-                    title=subject,
+            with track("google_calendar"):
+                google_calendar_event = self.google_calendar_service.create_event(
+                    summary=subject,
                     start_datetime=selected_slot["start"],
                     end_datetime=selected_slot["end"],
-                    is_all_day=False
+                    description=f"{objective}\n\nParticipants: {', '.join([p['name'] for p in participants])}",
+                    attendees=attendee_emails,
+                    location=""
                 )
-                created_events.append({
-                    "user_id": participant["id"],
-                    "event_id": event.id,
-                    "user_name": participant["name"],
-                    "google_calendar_link": google_calendar_event.get('htmlLink') if google_calendar_event else None
-                })
-            except Exception as e:
-                created_events.append({
-                    "user_id": participant["id"],
-                    "error": str(e),
-                    "user_name": participant["name"]
-                })
+            if google_calendar_event:
+                logger.info(
+                    "Événement synchronisé avec Google Calendar",
+                    extra={"stage": "google_calendar", "html_link": google_calendar_event.get('htmlLink')}
+                )
+        except Exception as e:
+            logger.warning(
+                "Impossible de synchroniser avec Google Calendar, l'événement sera quand même créé en base locale: %s",
+                str(e),
+                extra={"stage": "google_calendar"}
+            )
         
-        # Étape 9: Envoyer les invitations personnalisées par email
+        # Étape 8: Rédiger les invitations personnalisées (avant d'ouvrir la transaction)
         email_results = {}
+        outgoing = []
         for participant in participants:
             email = participant.get("email")
             if email:
@@ -343,22 +359,18 @@ class MeetingOrchestrator:
                         end_datetime=selected_slot["end"],
                         objective=objective
                     )
-                    
-                    # Envoyer l'email personnalisé via Gmail API
-                    success = self.gmail_service.send_email(
-                        to_email=email,
-                        subject=personalized_invitation["subject"],
-                        message=personalized_invitation["message"]
-                    )
-                    email_results[participant["id"]] = {
-                        "sent": success,
-                        "email": email,
-                        "user_name": participant["name"]
-                    }
+                    outgoing.append({
+                        "key": str(participant["id"]),
+                        "user_id": participant["id"],
+                        "to": email,
+                        "subject": personalized_invitation["subject"],
+                        "message": personalized_invitation["message"]
+                    })
                 except Exception as e:
-                    print(f"❌ Erreur lors de l'envoi à {participant['name']}: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception(
+                        "Erreur lors de la génération de l'invitation",
+                        extra={"stage": "invitations", "participant_id": participant["id"]}
+                    )
                     email_results[participant["id"]] = {
                         "sent": False,
                         "error": str(e),
@@ -372,6 +384,82 @@ class MeetingOrchestrator:
                     "user_name": participant["name"]
                 }
         
+        # Étape 9: Créer la réunion (une ligne + un participant par personne, insertions groupées)
+        # et mettre les invitations dans la boîte d'envoi, dans une seule transaction
+        # (le worker enverra les emails hors de la requête)
+        created_events = []
+        try:
+            meeting = MeetingService.create_meeting(
+                db=db,
+                title=subject,
+                start_datetime=selected_slot["start"],
+                end_datetime=selected_slot["end"],
+                attendee_ids=[participant["id"] for participant in participants],
+                type_id=1,  # Type par défaut, à ajuster selon vos besoins
+                google_event_id=google_calendar_event['id'] if google_calendar_event else None,
+                commit=False
+            )
+            created_events = [
+                {
+                    "user_id": participant["id"],
+                    "meeting_id": meeting.id,
+                    "user_name": participant["name"],
+                    "google_calendar_link": google_calendar_event.get('htmlLink') if google_calendar_event else None
+                }
+                for participant in participants
+            ]
+            
+            if Config.EMAIL_OUTBOX_ENABLED:
+                EmailOutboxService.enqueue_many(db, [
+                    {
+                        "idempotency_key": f"invitation:{meeting.id}:{item['user_id']}",
+                        "user_id": item["user_id"],
+                        "to_email": item["to"],
+                        "subject": item["subject"],
+                        "body": item["message"]
+                    }
+                    for item in outgoing
+                ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception("Erreur lors de l'enregistrement de la réunion", extra={"stage": "local_events"})
+            created_events = [
+                {"user_id": p["id"], "error": str(e), "user_name": p["name"]}
+                for p in participants
+            ]
+            for item in outgoing:
+                email_results[item["user_id"]] = {
+                    "sent": False,
+                    "error": "Réunion non enregistrée",
+                    "email": item["to"],
+                    "user_name": next(p["name"] for p in participants if p["id"] == item["user_id"])
+                }
+            outgoing = []
+        
+        if Config.EMAIL_OUTBOX_ENABLED:
+            for item in outgoing:
+                email_results[item["user_id"]] = {
+                    "sent": False,
+                    "queued": True,
+                    "email": item["to"],
+                    "user_name": next(p["name"] for p in participants if p["id"] == item["user_id"])
+                }
+        elif outgoing:
+            # Envoi direct : toutes les invitations en une seule requête batch Gmail
+            with track("gmail"):
+                batch_results = self.gmail_service.send_batch(outgoing)
+            for item in outgoing:
+                result = batch_results[item["key"]]
+                email_results[item["user_id"]] = {
+                    "sent": result["sent"],
+                    "email": item["to"],
+                    "user_name": next(p["name"] for p in participants if p["id"] == item["user_id"])
+                }
+                if not result["sent"]:
+                    email_results[item["user_id"]]["error"] = result.get("error")
+        email_results = {p["id"]: email_results[p["id"]] for p in participants}
+        
         # Préparer les créneaux alternatifs
         alternatives = []
         for idx in alternative_indices:
@@ -396,10 +484,11 @@ class MeetingOrchestrator:
         # Convertir la réponse en audio avec t2s
         audio_path = None
         try:
-            audio_path = t2s(natural_response)
-            print(f"✅ Réponse audio générée: {audio_path}")
+            with track("groq_audio"):
+                audio_path = t2s(natural_response)
+            logger.info("Réponse audio générée", extra={"stage": "t2s", "path": audio_path, "sampled": True})
         except Exception as e:
-            print(f"⚠️ Impossible de générer l'audio: {str(e)}")
+            logger.warning("Impossible de générer l'audio: %s", str(e), extra={"stage": "t2s"})
         
         # Retourner le résultat avec la réponse naturelle et l'audio
         return {
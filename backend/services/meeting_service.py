@@ -0,0 +1,239 @@
+"""
+Service des réunions
+Une réunion est enregistrée une seule fois (meetings) avec une ligne par participant
+(meeting_attendees) au lieu d'un CalendarEvent dupliqué pour chaque participant.
+"""
+from sqlalchemy import Select, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.meeting import Meeting
+from models.meeting_attendee import MeetingAttendee
+from models.google_event_link import GoogleEventLink
+from services.calendar_feed_service import CalendarFeedService
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+# Statuts de participation qui ne bloquent pas le créneau
+FREE_STATUSES = ("declined",)
+
+
+class MeetingService:
+    """Service pour créer, replanifier et interroger les réunions"""
+
+    @staticmethod
+    def create_meeting(
+        db: Session,
+        title: str,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        attendee_ids: List[int],
+        type_id: int = 1,
+        is_all_day: bool = False,
+        google_event_id: Optional[str] = None,
+        google_calendar_id: str = 'primary',
+        commit: bool = True
+    ) -> Meeting:
+        """
+        Crée une réunion et ses participants en insertions groupées
+
+        La réunion, ses participants et (si google_event_id est fourni) les liens Google
+        sont écrits dans la même transaction.
+
+        Args:
+            db: Session de base de données
+            title: Titre de la réunion
+            start_datetime: Début
+            end_datetime: Fin
+            attendee_ids: IDs des participants
+            type_id: Type d'événement
+            is_all_day: Réunion sur la journée entière
+            google_event_id: Événement Google Calendar de la réunion
+            google_calendar_id: Calendrier Google de l'événement
+            commit: Valider la transaction (False : l'appelant la valide, après un flush)
+
+        Returns:
+            Réunion créée
+        """
+        meeting = Meeting(
+            type_id=type_id,
+            title=title,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            is_all_day=is_all_day,
+            google_event_id=google_event_id
+        )
+        db.add(meeting)
+        db.flush()
+
+        attendee_ids = list(dict.fromkeys(attendee_ids))
+        if attendee_ids:
+            db.execute(insert(MeetingAttendee), [
+                {"meeting_id": meeting.id, "user_id": user_id, "status": "invited"}
+                for user_id in attendee_ids
+            ])
+            if google_event_id:
+                # Lien local <-> Google pour propager les modifications (voir CalendarReconciler)
+                db.execute(insert(GoogleEventLink), [
+                    {
+                        "meeting_id": meeting.id,
+                        "user_id": user_id,
+                        "google_event_id": google_event_id,
+                        "google_calendar_id": google_calendar_id
+                    }
+                    for user_id in attendee_ids
+                ])
+        CalendarFeedService.touch(db, attendee_ids)
+
+        if commit:
+            db.commit()
+        return meeting
+
+    @staticmethod
+    def get_meeting_by_id(db: Session, meeting_id: int) -> Optional[Meeting]:
+        return db.query(Meeting).filter(Meeting.id == meeting_id).first()
+
+    @staticmethod
+    def get_attendee_ids(db: Session, meeting_id: int) -> List[int]:
+        return [
+            user_id for (user_id,) in db.query(MeetingAttendee.user_id).filter(
+                MeetingAttendee.meeting_id == meeting_id
+            ).order_by(MeetingAttendee.id)
+        ]
+
+    @staticmethod
+    def reschedule_meeting(db: Session, meeting_id: int, start_datetime: datetime, end_datetime: datetime) -> bool:
+        """
+        Déplace une réunion pour tous ses participants (une seule ligne modifiée)
+
+        Returns:
+            True si la réunion existe
+        """
+        result = db.execute(
+            update(Meeting).where(Meeting.id == meeting_id).values(
+                start_datetime=start_datetime, end_datetime=end_datetime, updated_at=datetime.now()
+            ).execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            CalendarFeedService.touch(db, MeetingService.get_attendee_ids(db, meeting_id))
+        db.commit()
+        return bool(result.rowcount)
+
+    @staticmethod
+    def set_attendee_status(db: Session, meeting_id: int, user_id: int, status: str) -> bool:
+        """
+        Enregistre la réponse d'un participant (invited, accepted, tentative, declined)
+
+        Returns:
+            True si le participant fait partie de la réunion
+        """
+        result = db.execute(
+            update(MeetingAttendee).where(
+                MeetingAttendee.meeting_id == meeting_id,
+                MeetingAttendee.user_id == user_id
+            ).values(status=status, responded_at=datetime.now()).execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            CalendarFeedService.touch(db, [user_id])
+        db.commit()
+        return bool(result.rowcount)
+
+    @staticmethod
+    def delete_meeting(db: Session, meeting_id: int) -> bool:
+        meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+        if meeting:
+            CalendarFeedService.touch(db, MeetingService.get_attendee_ids(db, meeting_id))
+            db.delete(meeting)
+            db.commit()
+            return True
+        return False
+
+    @staticmethod
+    def get_busy_slots(
+        db: Session,
+        user_ids: List[int],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Créneaux occupés par les réunions d'un ensemble d'utilisateurs, en une requête
+
+        Une réunion commune à plusieurs participants n'est comptée qu'une fois ;
+        les participants qui l'ont refusée ne sont pas bloqués.
+
+        Args:
+            db: Session de base de données
+            user_ids: IDs des utilisateurs
+            start_date: Date de début
+            end_date: Date de fin
+
+        Returns:
+            Liste de (début, fin) des réunions chevauchant la période
+        """
+        if not user_ids:
+            return []
+        rows = db.execute(MeetingService.busy_slots_query(user_ids, start_date, end_date)).all()
+        return [(start, end) for start, end in rows]
+
+    @staticmethod
+    def busy_slots_query(user_ids: List[int], start_date: datetime, end_date: datetime) -> Select:
+        """Requête des créneaux occupés par les réunions (partagée avec AsyncMeetingService)"""
+        meeting_ids = select(MeetingAttendee.meeting_id).where(
+            MeetingAttendee.user_id.in_(user_ids),
+            MeetingAttendee.status.notin_(FREE_STATUSES)
+        )
+        return select(Meeting.start_datetime, Meeting.end_datetime).where(
+            Meeting.id.in_(meeting_ids),
+            Meeting.start_datetime < end_date,
+            Meeting.end_datetime > start_date
+        )
+
+    @staticmethod
+    def iter_user_meetings(
+        db: Session,
+        user_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Meeting]:
+        """
+        Réunions d'un utilisateur (sauf celles qu'il a refusées), triées par début, lues par lots (yield_per)
+
+        Args:
+            db: Session de base de données
+            user_id: ID du participant
+            start: Réunions commençant à partir de cette date
+            end: Réunions finissant au plus tard à cette date
+            batch_size: Lignes lues par lot
+        """
+        query = select(Meeting).join(MeetingAttendee, MeetingAttendee.meeting_id == Meeting.id).where(
+            MeetingAttendee.user_id == user_id,
+            MeetingAttendee.status.notin_(FREE_STATUSES)
+        )
+        if start is not None:
+            query = query.where(Meeting.start_datetime >= start)
+        if end is not None:
+            query = query.where(Meeting.end_datetime <= end)
+        query = query.order_by(Meeting.start_datetime, Meeting.id)
+        for meeting in db.execute(query.execution_options(yield_per=batch_size)).scalars():
+            yield meeting
+
+
+class AsyncMeetingService:
+    """Versions asynchrones (AsyncSession) des lectures de MeetingService"""
+
+    @staticmethod
+    async def get_meeting_by_id(session: AsyncSession, meeting_id: int) -> Optional[Meeting]:
+        return await session.get(Meeting, meeting_id)
+
+    @staticmethod
+    async def get_busy_slots(
+        session: AsyncSession,
+        user_ids: List[int],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """Voir MeetingService.get_busy_slots"""
+        if not user_ids:
+            return []
+        result = await session.execute(MeetingService.busy_slots_query(user_ids, start_date, end_date))
+        return [(start, end) for start, end in result.all()]
@@ -0,0 +1,183 @@
+"""
+Index en mémoire des noms d'utilisateurs pour résoudre les participants d'une demande
+
+Les noms sont normalisés (minuscules, sans accents, voir normalize_name) puis indexés par
+mot et par trigramme : "fatou", "Elodie" ou "Élodie Bernar" retrouvent "Fatou Diallo" et
+"Élodie Bernard", avec un score de 0 à 1. L'index est construit à partir de l'annuaire en
+mémoire (UserDirectory), sans requête, et reconstruit quand l'annuaire change.
+
+Remplissage de users.search_name après la migration 004 (depuis backend/) :
+    python -m services.name_index --backfill
+"""
+import argparse
+import logging
+import threading
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from config import Config
+from models.database import SessionLocal
+from models.user import User, normalize_name
+from services.user_directory import UserDirectory
+
+logger = logging.getLogger(__name__)
+
+# Scores par type de correspondance (un nom approché ne dépasse jamais un nom exact)
+EXACT_SCORE = 1.0
+TOKEN_SCORE = 0.95
+PREFIX_SCORE = 0.85
+FUZZY_WEIGHT = 0.9
+# Part minimale de trigrammes communs pour qu'un nom soit candidat
+MIN_TRIGRAM_OVERLAP = 0.3
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _ratio(a: str, b: str) -> float:
+    return SequenceMatcher(None, a, b).ratio() if a and b else 0.0
+
+
+class NameIndex:
+    """Index process-wide des noms normalisés (mots et trigrammes)"""
+
+    _lock = threading.Lock()
+    # Version de l'annuaire à partir de laquelle l'index a été construit
+    _version: Optional[int] = None
+    # user_id -> (nom normalisé, nom affiché)
+    _names: Dict[int, Tuple[str, str]] = {}
+    _exact: Dict[str, List[int]] = {}
+    _tokens: Dict[str, Set[int]] = {}
+    _trigram_ids: Dict[str, Set[int]] = {}
+
+    @classmethod
+    def _ensure(cls, db: Session):
+        UserDirectory.ensure(db)
+        with cls._lock:
+            if cls._version == UserDirectory.version:
+                return
+            version = UserDirectory.version
+            names, exact = {}, defaultdict(list)
+            tokens, trigram_ids = defaultdict(set), defaultdict(set)
+            for record in UserDirectory.records(db):
+                key = record.search_name
+                if not key:
+                    continue
+                names[record.id] = (key, record.display_name)
+                exact[key].append(record.id)
+                for token in key.split():
+                    tokens[token].add(record.id)
+                for trigram in _trigrams(key):
+                    trigram_ids[trigram].add(record.id)
+            cls._names, cls._exact = names, dict(exact)
+            cls._tokens, cls._trigram_ids = dict(tokens), dict(trigram_ids)
+            cls._version = version
+            logger.info("Index des noms reconstruit", extra={"stage": "name_index", "users": len(names)})
+
+    @classmethod
+    def _score(cls, query: str, query_tokens: List[str], key: str) -> float:
+        if query == key:
+            return EXACT_SCORE
+        name_tokens = key.split()
+        if all(token in name_tokens for token in query_tokens):
+            return TOKEN_SCORE
+        score = 0.0
+        if all(any(name.startswith(token) for name in name_tokens) for token in query_tokens):
+            score = PREFIX_SCORE
+        # Faute de frappe : meilleur rapprochement mot à mot, ou sur le nom complet
+        per_token = sum(max(_ratio(token, name) for name in name_tokens) for token in query_tokens) / len(query_tokens)
+        return max(score, FUZZY_WEIGHT * max(per_token, _ratio(query, key)))
+
+    @classmethod
+    def _search(cls, name: str, limit: int, min_score: float) -> List[Dict]:
+        query = normalize_name(name)
+        if not query:
+            return []
+        query_tokens = query.split()
+
+        candidates = set(cls._exact.get(query, []))
+        for token in query_tokens:
+            candidates |= cls._tokens.get(token, set())
+        query_trigrams = _trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(cls._trigram_ids.get(trigram, ()))
+        threshold = max(1, int(MIN_TRIGRAM_OVERLAP * len(query_trigrams)))
+        candidates |= {user_id for user_id, count in shared.items() if count >= threshold}
+
+        matches = []
+        for user_id in candidates:
+            key, display = cls._names[user_id]
+            score = cls._score(query, query_tokens, key)
+            if score >= min_score:
+                matches.append({"user_id": user_id, "name": display, "score": round(score, 3)})
+        matches.sort(key=lambda match: (-match["score"], match["name"], match["user_id"]))
+        return matches[:limit]
+
+    @classmethod
+    def resolve(
+        cls,
+        db: Session,
+        names: List[str],
+        limit: int = 5,
+        min_score: Optional[float] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Recherche plusieurs noms en un appel, sans requête si l'annuaire est à jour
+
+        Args:
+            db: Session de base de données
+            names: Noms tels qu'écrits dans la demande
+            limit: Nombre maximum de correspondances par nom
+            min_score: Score minimum (NAME_MATCH_MIN_SCORE par défaut)
+
+        Returns:
+            Dictionnaire nom -> correspondances {"user_id", "name", "score"}, de la meilleure à la moins bonne
+        """
+        cls._ensure(db)
+        min_score = Config.NAME_MATCH_MIN_SCORE if min_score is None else min_score
+        return {name: cls._search(name, limit, min_score) for name in dict.fromkeys(names)}
+
+
+def backfill_search_names(db: Session) -> int:
+    """
+    Calcule users.search_name pour les utilisateurs où elle est vide ou périmée
+
+    Returns:
+        Nombre d'utilisateurs mis à jour
+    """
+    rows = []
+    for user_id, first_name, last_name, search_name in db.query(
+        User.id, User.first_name, User.last_name, User.search_name
+    ):
+        expected = normalize_name(f"{first_name or ''} {last_name or ''}")
+        if search_name != expected:
+            rows.append({"id": user_id, "search_name": expected})
+    if rows:
+        db.execute(update(User), rows)
+        db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index des noms d'utilisateurs")
+    parser.add_argument("--backfill", action="store_true", help="Remplir users.search_name")
+    parser.add_argument("names", nargs="*", help="Noms à rechercher")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            print(f"{backfill_search_names(db)} utilisateurs mis à jour")
+        for name, matches in NameIndex.resolve(db, args.names).items():
+            print(name, matches)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
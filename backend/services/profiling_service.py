@@ -0,0 +1,251 @@
+"""
+Service de profilage à la demande
+Exécute une planification sous cProfile et ventile le temps passé entre la base
+de données, chaque API externe (Groq, Google Calendar, Gmail) et le reste
+(temps non attribué), avec le temps CPU mesuré à part
+"""
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import event
+from config import Config
+
+
+# Profil actif pour la requête courante (None si le profilage n'est pas demandé)
+_current_profile: ContextVar = ContextVar("current_profile", default=None)
+
+# cProfile ne supporte qu'un profileur actif à la fois de façon fiable
+_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Mesures collectées pendant une requête profilée"""
+
+    def __init__(self, profile_id: Optional[str] = None):
+        self.id = profile_id or ProfilingService.new_id()
+        self.started_at = datetime.now()
+        self.timings: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def add(self, category: str, elapsed: float):
+        """Ajoute une durée (en secondes) à une catégorie"""
+        self.timings[category] = self.timings.get(category, 0.0) + elapsed
+        self.calls[category] = self.calls.get(category, 0) + 1
+
+
+@contextmanager
+def track(category: str):
+    """
+    Mesure le temps passé dans un bloc et l'attribue à une catégorie
+
+    Ne fait rien si aucune requête n'est profilée, le coût est donc négligeable
+    sur le chemin normal.
+
+    Args:
+        category: Nom de la catégorie (ex: "groq_llm", "gmail", "google_calendar")
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(category, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("profiling_start")
+    if not starts:
+        return
+    start = starts.pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add("database", time.perf_counter() - start)
+
+
+class ProfilingService:
+    """Service pour profiler une requête et stocker le résultat sous un identifiant"""
+
+    PROFILES_DIR = os.path.join(os.path.dirname(__file__), '..', 'profiles')
+
+    @staticmethod
+    def instrument_engine(engine):
+        """
+        Branche la mesure du temps SQL sur un moteur SQLAlchemy
+
+        Args:
+            engine: Moteur SQLAlchemy à instrumenter
+        """
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @staticmethod
+    def new_id() -> str:
+        """Nouvel identifiant de profil (connu avant l'exécution, ex. pour les en-têtes de réponse)"""
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def run(func: Callable, *args, profile_id: Optional[str] = None, **kwargs) -> Tuple[Any, Dict]:
+        """
+        Exécute une fonction sous profilage
+
+        Le profil est enregistré même si la fonction lève une exception (l'exception est
+        ensuite propagée) : il reste consultable sous `profile_id`.
+
+        Args:
+            func: Fonction à exécuter
+            *args, **kwargs: Arguments transmis à la fonction
+            profile_id: Identifiant du profil (voir new_id ; généré si absent)
+
+        Returns:
+            Tuple (résultat de la fonction, résumé du profil)
+        """
+        profile = RequestProfile(profile_id)
+        token = _current_profile.set(profile)
+
+        # Si un autre profilage est en cours, on garde la ventilation sans cProfile
+        profiler = cProfile.Profile() if _profiler_lock.acquire(blocking=False) else None
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            if profiler:
+                profiler.enable()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                if profiler:
+                    profiler.disable()
+        finally:
+            total = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            if profiler:
+                _profiler_lock.release()
+            _current_profile.reset(token)
+            summary = ProfilingService._build_summary(profile, total, cpu, profiler)
+            ProfilingService._store(profile.id, profiler, summary)
+        return result, summary
+
+    @staticmethod
+    def _build_summary(profile: RequestProfile, total: float, cpu: float, profiler: Optional[cProfile.Profile]) -> Dict:
+        """Construit la ventilation du temps entre base de données, APIs externes et reste"""
+        external = sum(profile.timings.values())
+        breakdown = {
+            category: {
+                "ms": round(elapsed * 1000, 2),
+                "calls": profile.calls[category],
+                "percent": round(100 * elapsed / total, 1) if total else 0.0
+            }
+            for category, elapsed in sorted(profile.timings.items(), key=lambda item: -item[1])
+        }
+        # Temps non attribué (calcul Python, mais aussi attentes non mesurées : verrous, I/O...)
+        other = max(total - external, 0.0)
+        breakdown["other"] = {
+            "ms": round(other * 1000, 2),
+            "calls": None,
+            "percent": round(100 * other / total, 1) if total else 0.0
+        }
+
+        top_functions = []
+        if profiler:
+            stats = pstats.Stats(profiler)
+            for func, (cc, nc, tt, ct, callers) in list(
+                sorted(stats.stats.items(), key=lambda item: -item[1][3])
+            )[:Config.PROFILING_TOP_FUNCTIONS]:
+                filename, line, name = func
+                top_functions.append({
+                    "function": f"{os.path.basename(filename)}:{line}({name})",
+                    "calls": nc,
+                    "total_ms": round(tt * 1000, 2),
+                    "cumulative_ms": round(ct * 1000, 2)
+                })
+
+        return {
+            "id": profile.id,
+            "created_at": profile.started_at.isoformat(),
+            "total_ms": round(total * 1000, 2),
+            # Temps CPU du processus (time.process_time, tous threads confondus)
+            "cpu_ms": round(cpu * 1000, 2),
+            "breakdown": breakdown,
+            "top_functions": top_functions,
+            "pstats_available": profiler is not None
+        }
+
+    @staticmethod
+    def _store(profile_id: str, profiler: Optional[cProfile.Profile], summary: Dict):
+        """Sauvegarde le profil (pstats + résumé JSON) et purge les plus anciens"""
+        os.makedirs(ProfilingService.PROFILES_DIR, exist_ok=True)
+
+        if profiler:
+            profiler.dump_stats(os.path.join(ProfilingService.PROFILES_DIR, f"{profile_id}.pstats"))
+        with open(os.path.join(ProfilingService.PROFILES_DIR, f"{profile_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        # Ne garder que les N profils les plus récents
+        summaries = sorted(
+            (name for name in os.listdir(ProfilingService.PROFILES_DIR) if name.endswith('.json')),
+            key=lambda name: os.path.getmtime(os.path.join(ProfilingService.PROFILES_DIR, name)),
+            reverse=True
+        )
+        for name in summaries[Config.PROFILING_MAX_STORED:]:
+            old_id = name[:-len('.json')]
+            for extension in ('.json', '.pstats'):
+                try:
+                    os.remove(os.path.join(ProfilingService.PROFILES_DIR, old_id + extension))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _is_valid_id(profile_id: str) -> bool:
+        """Vérifie qu'un identifiant ne permet pas de sortir du répertoire des profils"""
+        return len(profile_id) == 32 and all(c in "0123456789abcdef" for c in profile_id)
+
+    @staticmethod
+    def get_summary(profile_id: str) -> Optional[Dict]:
+        """
+        Récupère le résumé d'un profil stocké
+
+        Args:
+            profile_id: Identifiant du profil
+
+        Returns:
+            Résumé du profil ou None s'il n'existe pas
+        """
+        if not ProfilingService._is_valid_id(profile_id):
+            return None
+        path = os.path.join(ProfilingService.PROFILES_DIR, f"{profile_id}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def get_pstats_path(profile_id: str) -> Optional[str]:
+        """
+        Récupère le chemin du fichier pstats d'un profil
+
+        Args:
+            profile_id: Identifiant du profil
+
+        Returns:
+            Chemin du fichier ou None s'il n'existe pas
+        """
+        if not ProfilingService._is_valid_id(profile_id):
+            return None
+        path = os.path.join(ProfilingService.PROFILES_DIR, f"{profile_id}.pstats")
+        return path if os.path.exists(path) else None
@@ -0,0 +1,215 @@
+"""
+Gestionnaire de quotas des APIs externes (Gmail, Google Calendar, Groq)
+
+Chaque API a un seau à jetons nommé ("gmail.send", "calendar.events.insert",
+"groq.chat", "groq.audio"). L'état des seaux est stocké dans une base SQLite locale
+partagée par tous les processus (workers uvicorn, worker d'emails) de la machine :
+le débit global reste sous le quota même quand plusieurs processus appellent l'API.
+"""
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_limits(raw: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse une configuration du type "gmail.send=150/60,groq.chat=30/60"
+
+    Returns:
+        Dictionnaire nom -> (capacité en jetons, débit en jetons par seconde)
+    """
+    limits = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        tokens, _, period = value.partition("/")
+        capacity = float(tokens)
+        limits[name.strip()] = (capacity, capacity / float(period or 1))
+    return limits
+
+
+class QuotaManager:
+    """Seaux à jetons nommés, partagés entre processus via SQLite"""
+
+    _limits = _parse_limits(Config.QUOTA_LIMITS)
+    _local = threading.local()
+
+    @classmethod
+    def register(cls, name: str, tokens: float, period_seconds: float):
+        """
+        Déclare (ou redéfinit) un seau
+
+        Args:
+            name: Nom du seau
+            tokens: Nombre de jetons autorisés par période (et taille de rafale)
+            period_seconds: Durée de la période en secondes
+        """
+        cls._limits[name] = (float(tokens), float(tokens) / period_seconds)
+
+    @classmethod
+    def _connection(cls) -> sqlite3.Connection:
+        # Une connexion par thread ; BEGIN IMMEDIATE sérialise les accès entre processus
+        conn = getattr(cls._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(Config.QUOTA_DB_PATH)), exist_ok=True)
+            conn = sqlite3.connect(Config.QUOTA_DB_PATH, timeout=30, isolation_level=None)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            cls._local.conn = conn
+        return conn
+
+    @classmethod
+    def _take(cls, name: str, requested: int, partial: bool) -> Tuple[int, float]:
+        """
+        Retire des jetons du seau dans une transaction
+
+        Returns:
+            (jetons obtenus, secondes à attendre avant que `requested` soit disponible)
+        """
+        capacity, rate = cls._limits[name]
+        conn = cls._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            now = time.time()
+            if row is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+
+            if partial:
+                granted = min(int(tokens), requested)
+            else:
+                granted = requested if tokens >= requested else 0
+            tokens -= granted
+
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (name, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        wait = 0.0 if granted else (requested - tokens) / rate
+        return granted, wait
+
+    @classmethod
+    def acquire(cls, name: str, tokens: int = 1, timeout: float = None) -> bool:
+        """
+        Attend que `tokens` jetons soient disponibles puis les consomme
+
+        Une demande plus grande que la capacité du seau est servie en plusieurs fois.
+        Au-delà de `timeout`, l'appel est laissé passer (avec un avertissement) :
+        le quota ralentit les appels mais ne les bloque jamais définitivement.
+
+        Args:
+            name: Nom du seau
+            tokens: Nombre de jetons à consommer
+            timeout: Attente maximale en secondes (QUOTA_MAX_WAIT_SECONDS par défaut)
+
+        Returns:
+            True si les jetons ont été obtenus, False si l'attente a expiré
+        """
+        if not Config.QUOTA_ENABLED or name not in cls._limits:
+            return True
+
+        capacity = max(1, int(cls._limits[name][0]))
+        deadline = time.monotonic() + (Config.QUOTA_MAX_WAIT_SECONDS if timeout is None else timeout)
+        remaining = tokens
+        waited = 0.0
+        while remaining > 0:
+            step = min(remaining, capacity)
+            granted, wait = cls._take(name, step, partial=False)
+            if granted:
+                remaining -= granted
+                continue
+            if time.monotonic() + wait > deadline:
+                logger.warning(
+                    "Quota %s : attente maximale dépassée", name,
+                    extra={"stage": "quota", "bucket": name, "waited_s": round(waited, 3)}
+                )
+                return False
+            # Petit décalage aléatoire pour éviter que tous les processus se réveillent ensemble
+            delay = wait + random.uniform(0, 0.05)
+            time.sleep(delay)
+            waited += delay
+
+        if waited:
+            logger.info(
+                "Quota %s : appel retardé de %.3fs", name, waited,
+                extra={"stage": "quota", "bucket": name, "waited_s": round(waited, 3), "sampled": True}
+            )
+        return True
+
+    @classmethod
+    def try_acquire(cls, name: str, max_tokens: int) -> int:
+        """
+        Consomme sans attendre jusqu'à `max_tokens` jetons disponibles
+
+        Returns:
+            Nombre de jetons obtenus (max_tokens si le quota est désactivé ou inconnu)
+        """
+        if not Config.QUOTA_ENABLED or name not in cls._limits:
+            return max_tokens
+        granted, _ = cls._take(name, max_tokens, partial=True)
+        return granted
+
+    @classmethod
+    def release(cls, name: str, tokens: int):
+        """
+        Rend au seau des jetons obtenus mais non utilisés (sans dépasser sa capacité)
+
+        Args:
+            name: Nom du seau
+            tokens: Nombre de jetons à rendre
+        """
+        if tokens <= 0 or not Config.QUOTA_ENABLED or name not in cls._limits:
+            return
+        capacity, rate = cls._limits[name]
+        conn = cls._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            now = time.time()
+            current = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (name, min(capacity, current + tokens), now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @classmethod
+    def get_state(cls) -> Dict[str, Dict]:
+        """Retourne le niveau actuel de chaque seau (pour le diagnostic)"""
+        conn = cls._connection()
+        rows = dict(
+            (name, (tokens, updated_at))
+            for name, tokens, updated_at in conn.execute("SELECT name, tokens, updated_at FROM buckets")
+        )
+        now = time.time()
+        state = {}
+        for name, (capacity, rate) in cls._limits.items():
+            tokens, updated_at = rows.get(name, (capacity, now))
+            state[name] = {
+                "capacity": capacity,
+                "rate_per_s": rate,
+                "available": min(capacity, tokens + max(0.0, now - updated_at) * rate),
+            }
+        return state
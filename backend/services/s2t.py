@@ -2,6 +2,9 @@ import os
 from dotenv import load_dotenv
 import json
 from groq import Groq
+from config import Config
+from services.quota_manager import QuotaManager
+from simulation import audio as simulated_audio
 
 def s2t(filename):
     """
@@ -13,6 +16,12 @@ def s2t(filename):
     Returns:
         Texte transcrit
     """
+    if Config.SIMULATION_MODE != "off":
+        return simulated_audio.transcribe(filename, _transcribe_with_groq)
+    return _transcribe_with_groq(filename)
+
+def _transcribe_with_groq(filename):
+    """Transcription réelle via l'API Groq Whisper"""
     load_dotenv()
 
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -22,6 +31,8 @@ def s2t(filename):
     # Initialize the Groq client
     client = Groq(api_key=GROQ_API_KEY)
 
+    QuotaManager.acquire("groq.audio")
+
     # Open the audio file
     with open(filename, "rb") as file:
         # Create a transcription of the audio file
@@ -1,7 +1,13 @@
 import os
 from dotenv import load_dotenv
 from groq import Groq
+from config import Config
+from services.quota_manager import QuotaManager
+from simulation import audio as simulated_audio
 import uuid
+import logging
+
+logger = logging.getLogger(__name__)
 
 def t2s(text, output_dir=None):
     """
@@ -14,6 +20,16 @@ def t2s(text, output_dir=None):
     Returns:
         Chemin vers le fichier audio créé
     """
+    # Déterminer le répertoire de sortie
+    if output_dir is None:
+        output_dir = os.path.join(os.path.dirname(__file__), '..', 'temp_audio')
+
+    if Config.SIMULATION_MODE != "off":
+        return simulated_audio.synthesize(text, output_dir, _synthesize_with_groq)
+    return _synthesize_with_groq(text, output_dir)
+
+def _synthesize_with_groq(text, output_dir):
+    """Synthèse vocale réelle via l'API Groq TTS"""
     load_dotenv()
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
@@ -21,10 +37,6 @@ def t2s(text, output_dir=None):
         raise RuntimeError("Clé api groq non définie")
 
     client = Groq(api_key=GROQ_API_KEY)
-
-    # Déterminer le répertoire de sortie
-    if output_dir is None:
-        output_dir = os.path.join(os.path.dirname(__file__), '..', 'temp_audio')
     
     # Créer le répertoire s'il n'existe pas
     os.makedirs(output_dir, exist_ok=True)
@@ -37,6 +49,7 @@ def t2s(text, output_dir=None):
     voice = "Aaliyah-PlayAI"
     response_format = "wav"
 
+    QuotaManager.acquire("groq.audio")
     response = client.audio.speech.create(
         model=model,
         voice=voice,
@@ -45,7 +58,7 @@ def t2s(text, output_dir=None):
     )
 
     response.write_to_file(speech_file_path)
-    print(f"Fichier vocal créé: {speech_file_path}")
+    logger.info("Fichier vocal créé", extra={"stage": "t2s", "path": speech_file_path, "sampled": True})
     
     return speech_file_path
 
@@ -0,0 +1,256 @@
+"""
+Annuaire des utilisateurs en mémoire
+
+Les utilisateurs changent rarement : ils sont chargés une fois par processus (au démarrage)
+sous forme d'enregistrements compacts indexés par ID, email et nom normalisé, et les
+recherches de plan_meeting (participants, emails, noms) ne font plus de requête.
+
+Invalidation :
+- une modification faite dans ce processus (insert/update/delete ORM sur User) incrémente
+  un compteur et déclenche un rechargement à la prochaine lecture ;
+- les modifications des autres processus sont détectées par users.updated_at : MAX(updated_at)
+  et COUNT(*) sont comparés toutes les USER_DIRECTORY_POLL_SECONDS (par le worker, ou à la
+  lecture s'il ne tourne pas) ; seules les lignes modifiées sont rechargées, et tout
+  l'annuaire si des utilisateurs ont été supprimés.
+
+Empreinte mémoire (depuis backend/) :
+    python -m services.user_directory
+"""
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from config import Config
+from models.database import SessionLocal
+from models.user import User, normalize_name
+
+logger = logging.getLogger(__name__)
+
+
+class UserRecord(NamedTuple):
+    """Utilisateur tel que gardé en mémoire (tuple immuable, sans état ORM)"""
+    id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    email: str
+    search_name: str
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.first_name or ''} {self.last_name or ''}".strip() or f"User {self.id}"
+
+
+def _record(user_id: int, first_name: Optional[str], last_name: Optional[str], email: str) -> UserRecord:
+    return UserRecord(user_id, first_name, last_name, email, normalize_name(f"{first_name or ''} {last_name or ''}"))
+
+
+def _deep_sizeof(obj, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(key, seen) + _deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+class UserDirectory:
+    """Annuaire process-wide des utilisateurs"""
+
+    _lock = threading.Lock()
+    _by_id: Dict[int, UserRecord] = {}
+    _by_email: Dict[str, int] = {}
+    _by_search_name: Dict[str, Tuple[int, ...]] = {}
+    # Incrémenté à chaque modification de l'annuaire (NameIndex se reconstruit quand il change)
+    version = 0
+    _loaded = False
+    _dirty = False
+    _signature: Tuple[Optional[datetime], int] = (None, 0)
+    _checked_at = 0.0
+    _polled_by_worker = False
+
+    @classmethod
+    def invalidate(cls):
+        """Signale une modification des utilisateurs (rechargement à la prochaine lecture)"""
+        cls._dirty = True
+
+    @classmethod
+    def _install(cls, by_id: Dict[int, UserRecord], signature: Tuple[Optional[datetime], int]):
+        by_email, by_search_name = {}, {}
+        for record in by_id.values():
+            by_email[record.email.lower()] = record.id
+            by_search_name.setdefault(record.search_name, []).append(record.id)
+        cls._by_id = by_id
+        cls._by_email = by_email
+        cls._by_search_name = {key: tuple(ids) for key, ids in by_search_name.items()}
+        cls._signature = signature
+        cls._loaded = True
+        cls.version += 1
+
+    @classmethod
+    def refresh(cls, db: Session, full: bool = False) -> bool:
+        """
+        Recharge l'annuaire si les utilisateurs ont changé
+
+        Args:
+            db: Session de base de données
+            full: Recharger tout l'annuaire sans comparer les signatures
+
+        Returns:
+            True si l'annuaire a été modifié
+        """
+        with cls._lock:
+            cls._dirty = False
+            cls._checked_at = time.monotonic()
+            signature = tuple(db.query(func.max(User.updated_at), func.count(User.id)).one())
+            if cls._loaded and not full and signature == cls._signature:
+                return False
+
+            last_seen = cls._signature[0]
+            if cls._loaded and not full and last_seen is not None and signature[1] >= len(cls._by_id):
+                # Seules les lignes modifiées depuis le dernier chargement sont relues
+                by_id = dict(cls._by_id)
+                for row in db.query(User.id, User.first_name, User.last_name, User.email).filter(
+                    User.updated_at >= last_seen
+                ):
+                    by_id[row[0]] = _record(*row)
+                if len(by_id) == signature[1]:
+                    cls._install(by_id, signature)
+                    return True
+
+            started = time.perf_counter()
+            by_id = {
+                row[0]: _record(*row)
+                for row in db.query(User.id, User.first_name, User.last_name, User.email)
+            }
+            cls._install(by_id, signature)
+            logger.info(
+                "Annuaire des utilisateurs chargé",
+                extra={"stage": "user_directory", "users": len(by_id),
+                       "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+            )
+            return True
+
+    @classmethod
+    def ensure(cls, db: Session):
+        """Charge l'annuaire au premier accès et le rafraîchit si nécessaire"""
+        stale = not cls._polled_by_worker and time.monotonic() - cls._checked_at >= Config.USER_DIRECTORY_POLL_SECONDS
+        if not cls._loaded or cls._dirty or stale:
+            cls.refresh(db)
+
+    @classmethod
+    def get(cls, db: Session, user_id: int) -> Optional[UserRecord]:
+        cls.ensure(db)
+        return cls._by_id.get(user_id)
+
+    @classmethod
+    def get_many(cls, db: Session, user_ids: Iterable[int]) -> List[UserRecord]:
+        """Utilisateurs existants parmi user_ids, dans l'ordre demandé"""
+        cls.ensure(db)
+        by_id = cls._by_id
+        return [by_id[user_id] for user_id in user_ids if user_id in by_id]
+
+    @classmethod
+    def get_by_email(cls, db: Session, email: str) -> Optional[UserRecord]:
+        cls.ensure(db)
+        user_id = cls._by_email.get((email or "").lower())
+        return cls._by_id.get(user_id) if user_id is not None else None
+
+    @classmethod
+    def find_by_name(cls, db: Session, name: str) -> List[UserRecord]:
+        """Utilisateurs dont le nom normalisé est exactement `name` normalisé"""
+        cls.ensure(db)
+        return [cls._by_id[user_id] for user_id in cls._by_search_name.get(normalize_name(name), ())]
+
+    @classmethod
+    def records(cls, db: Session) -> List[UserRecord]:
+        cls.ensure(db)
+        return list(cls._by_id.values())
+
+    @classmethod
+    def memory_report(cls) -> Dict:
+        """Empreinte mémoire de l'annuaire (octets, mesurée avec sys.getsizeof récursif)"""
+        seen = set()
+        records = _deep_sizeof(cls._by_id, seen)
+        by_email = _deep_sizeof(cls._by_email, seen)
+        by_search_name = _deep_sizeof(cls._by_search_name, seen)
+        total = records + by_email + by_search_name
+        return {
+            "users": len(cls._by_id),
+            "version": cls.version,
+            "records_bytes": records,
+            "email_index_bytes": by_email,
+            "name_index_bytes": by_search_name,
+            "total_bytes": total,
+            "bytes_per_user": round(total / len(cls._by_id), 1) if cls._by_id else 0,
+        }
+
+
+def _invalidate_on_change(mapper, connection, target):
+    UserDirectory.invalidate()
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(User, _event_name, _invalidate_on_change)
+
+
+class UserDirectoryWorker:
+    """Thread de fond qui détecte les modifications des utilisateurs faites par d'autres processus"""
+
+    _instance: Optional["UserDirectoryWorker"] = None
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="user-directory-worker", daemon=True)
+
+    @classmethod
+    def start(cls):
+        """Charge l'annuaire et démarre le worker du processus (sans effet s'il tourne déjà)"""
+        if cls._instance is None:
+            db = SessionLocal()
+            try:
+                UserDirectory.refresh(db, full=True)
+            finally:
+                db.close()
+            UserDirectory._polled_by_worker = True
+            cls._instance = cls()
+            cls._instance._thread.start()
+            logger.info(
+                "Worker de l'annuaire des utilisateurs démarré",
+                extra=dict(UserDirectory.memory_report(), stage="user_directory")
+            )
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0):
+        """Arrête le worker"""
+        if cls._instance is not None:
+            cls._instance._stop.set()
+            cls._instance._thread.join(timeout)
+            cls._instance = None
+            UserDirectory._polled_by_worker = False
+
+    def _run(self):
+        while not self._stop.wait(Config.USER_DIRECTORY_POLL_SECONDS):
+            db = SessionLocal()
+            try:
+                UserDirectory.refresh(db)
+            except Exception:
+                logger.exception("Erreur du worker de l'annuaire", extra={"stage": "user_directory"})
+            finally:
+                db.close()
+
+
+if __name__ == '__main__':
+    session = SessionLocal()
+    try:
+        UserDirectory.refresh(session, full=True)
+        for key, value in UserDirectory.memory_report().items():
+            print(f"{key}: {value}")
+    finally:
+        session.close()
@@ -1,5 +1,9 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.user import User
+from models.user import User, normalize_name
+from services.name_index import NameIndex
+from typing import Dict, Iterable, List
 
 class UserService:
     @staticmethod
@@ -8,16 +12,77 @@ class UserService:
 
     @staticmethod
     def get_user_by_name(db: Session, name: str):
-        # Recherche par nom complet ou partiel
-        full_name = name.strip()
-        # Essayer d'abord une correspondance exacte
-        user = db.query(User).filter(
-            (User.first_name + " " + User.last_name) == full_name
-        ).first()
+        # Correspondance exacte sur le nom normalisé (colonne indexée, sans accents ni casse)
+        user = db.query(User).filter(User.search_name == normalize_name(name)).first()
         if user:
             return user
-        # Sinon, rechercher par prénom ou nom
-        user = db.query(User).filter(
-            (User.first_name == full_name) | (User.last_name == full_name)
-        ).first()
-        return user
+        # Sinon, meilleure correspondance approchée (prénom seul, nom seul, faute de frappe...)
+        matches = NameIndex.resolve(db, [name], limit=1)[name]
+        return UserService.get_user_by_id(db, matches[0]["user_id"]) if matches else None
+
+    @staticmethod
+    def resolve_participants(db: Session, names: List[str], limit: int = 5) -> Dict[str, List[Dict]]:
+        """
+        Résout tous les noms de participants d'une demande en un appel
+
+        Args:
+            db: Session de base de données
+            names: Noms extraits de la demande
+            limit: Nombre maximum de correspondances par nom
+
+        Returns:
+            Dictionnaire nom -> correspondances classées {"user_id", "name", "score"}
+        """
+        return NameIndex.resolve(db, names, limit=limit)
+
+    @staticmethod
+    def get_user_ids_by_emails(db: Session, emails: Iterable[str], chunk_size: int = 1000) -> Dict[str, int]:
+        """
+        Résout des emails en IDs d'utilisateurs, une requête par lot de `chunk_size` emails
+
+        Args:
+            db: Session de base de données
+            emails: Emails à résoudre (casse indifférente)
+            chunk_size: Nombre d'emails par requête IN
+
+        Returns:
+            Dictionnaire email en minuscules -> ID (les emails inconnus sont absents)
+        """
+        # Emails tels qu'écrits et en minuscules (comparaison sensible à la casse hors MySQL)
+        wanted = list({
+            variant for email in emails if email and email.strip()
+            for variant in (email.strip(), email.strip().lower())
+        })
+        found = {}
+        for start in range(0, len(wanted), chunk_size):
+            for user_id, email in db.query(User.id, User.email).filter(
+                User.email.in_(wanted[start:start + chunk_size])
+            ):
+                found[email.lower()] = user_id
+        return found
+
+
+class AsyncUserService:
+    """Versions asynchrones (AsyncSession) des lectures de UserService"""
+
+    @staticmethod
+    async def get_user_by_id(session: AsyncSession, user_id: int):
+        return await session.get(User, user_id)
+
+    @staticmethod
+    async def get_users_by_ids(session: AsyncSession, user_ids: List[int]) -> List[User]:
+        """Utilisateurs existants parmi user_ids (une requête), dans l'ordre demandé"""
+        result = await session.execute(select(User).where(User.id.in_(user_ids)))
+        users = {user.id: user for user in result.scalars()}
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    @staticmethod
+    async def get_user_by_name(session: AsyncSession, name: str):
+        # Même résolution que UserService.get_user_by_name : nom normalisé exact (colonne indexée),
+        # sinon meilleure correspondance approchée de NameIndex (sans requête si l'annuaire est à jour)
+        result = await session.execute(select(User).where(User.search_name == normalize_name(name)).limit(1))
+        user = result.scalars().first()
+        if user:
+            return user
+        matches = await session.run_sync(lambda sync_session: NameIndex.resolve(sync_session, [name], limit=1)[name])
+        return await session.get(User, matches[0]["user_id"]) if matches else None
@@ -0,0 +1,81 @@
+"""
+Record/replay des appels audio Groq (s2t / t2s)
+"""
+import hashlib
+import os
+import uuid
+import wave
+from typing import Callable
+from config import Config
+from simulation.faults import FaultInjector
+from simulation.replay_store import ReplayStore
+
+
+def _file_key(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def transcribe(filename: str, real_transcribe: Callable[[str], str]) -> str:
+    """
+    Transcription en mode record ou replay
+
+    En replay, le texte enregistré pour le même fichier est rejoué ; à défaut,
+    la dernière transcription enregistrée, puis SIMULATION_DEFAULT_TRANSCRIPT.
+
+    Args:
+        filename: Fichier audio à transcrire
+        real_transcribe: Fonction de transcription réelle (utilisée en mode record)
+
+    Returns:
+        Texte transcrit
+    """
+    store = ReplayStore.get("s2t")
+    key = _file_key(filename)
+
+    if Config.SIMULATION_MODE == "record":
+        text = real_transcribe(filename)
+        store.record(key, text)
+        return text
+
+    FaultInjector.inject("groq_audio")
+    text = store.lookup(key)
+    if text is None:
+        text = store.any() or Config.SIMULATION_DEFAULT_TRANSCRIPT
+    return text
+
+
+def synthesize(text: str, output_dir: str, real_synthesize: Callable[[str, str], str]) -> str:
+    """
+    Synthèse vocale en mode record ou replay
+
+    En replay, un court fichier WAV silencieux est écrit à la place de l'audio Groq.
+
+    Args:
+        text: Texte à convertir
+        output_dir: Répertoire de sortie
+        real_synthesize: Fonction de synthèse réelle (utilisée en mode record)
+
+    Returns:
+        Chemin du fichier audio créé
+    """
+    if Config.SIMULATION_MODE == "record":
+        return real_synthesize(text, output_dir)
+
+    FaultInjector.inject("groq_audio")
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"response_{uuid.uuid4()}.wav")
+    write_silence(path)
+    return path
+
+
+def write_silence(path: str, seconds: float = 0.5, samplerate: int = 16000):
+    """Écrit un fichier WAV mono 16 bits silencieux"""
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(samplerate)
+        f.writeframes(b'\0\0' * int(seconds * samplerate))
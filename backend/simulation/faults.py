@@ -0,0 +1,54 @@
+"""
+Injection de latence et d'erreurs pour les doublures des APIs externes
+"""
+import random
+import time
+from typing import Dict
+from config import Config
+
+
+class SimulatedFailure(Exception):
+    """Erreur injectée volontairement par le mode simulation"""
+
+
+def _parse_mapping(raw: str) -> Dict[str, float]:
+    """Parse une configuration du type "gmail=120,groq_llm=300" """
+    mapping = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            mapping[name.strip()] = float(value)
+    return mapping
+
+
+class FaultInjector:
+    """Applique la latence et le taux d'erreur configurés pour chaque service simulé"""
+
+    latencies_ms = _parse_mapping(Config.SIMULATION_LATENCY_MS)
+    error_rates = _parse_mapping(Config.SIMULATION_ERROR_RATE)
+
+    @classmethod
+    def should_fail(cls, service: str) -> bool:
+        """Tire au sort l'échec d'un élément selon le taux d'erreur du service"""
+        return random.random() < cls.error_rates.get(service, 0.0)
+
+    @classmethod
+    def inject(cls, service: str):
+        """
+        Attend la latence simulée du service puis lève éventuellement une erreur
+
+        La latence suit une distribution log-normale autour de la valeur configurée
+        (quelques appels sont nettement plus lents, comme pour une vraie API).
+
+        Args:
+            service: Nom du service ("groq_llm", "groq_audio", "google_calendar", "gmail")
+
+        Raises:
+            SimulatedFailure: Selon le taux d'erreur configuré
+        """
+        latency_ms = cls.latencies_ms.get(service, 0.0)
+        if latency_ms > 0:
+            time.sleep(latency_ms * random.lognormvariate(0, Config.SIMULATION_LATENCY_JITTER) / 1000)
+
+        if cls.should_fail(service):
+            raise SimulatedFailure(f"Erreur simulée pour {service}")
@@ -0,0 +1,69 @@
+"""
+Record/replay des chaînes LangChain (ChatGroq)
+"""
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from simulation.faults import FaultInjector, SimulatedFailure
+from simulation.replay_store import ReplayStore, fingerprint
+
+
+def _keys(prompt_value):
+    """Clé exacte (tous les messages) et clé de repli (message système seul)"""
+    messages = prompt_value.to_messages()
+    contents = [str(message.content) for message in messages]
+    return fingerprint(*contents), fingerprint(contents[0]) if contents else None
+
+
+def recording_model(llm, model_name: str):
+    """
+    Enveloppe un vrai modèle de chat et enregistre chaque réponse
+
+    Args:
+        llm: Modèle LangChain réel (ChatGroq)
+        model_name: Nom du modèle (sépare les enregistrements par modèle)
+
+    Returns:
+        Runnable utilisable à la place du modèle dans une chaîne
+    """
+    store = ReplayStore.get("llm")
+
+    def invoke(prompt_value):
+        response = llm.invoke(prompt_value)
+        key, fallback_key = _keys(prompt_value)
+        store.record(
+            fingerprint(model_name, key),
+            {"content": response.content},
+            fallback_key=fingerprint(model_name, fallback_key) if fallback_key else None
+        )
+        return response
+
+    return RunnableLambda(invoke, name=f"record:{model_name}")
+
+
+def replay_model(model_name: str):
+    """
+    Modèle de chat qui rejoue les réponses enregistrées, sans appel à Groq
+
+    Si le prompt exact n'a pas été enregistré, la dernière réponse obtenue pour le même
+    prompt système est rejouée. La latence et le taux d'erreur de "groq_llm" sont appliqués.
+
+    Args:
+        model_name: Nom du modèle dont on rejoue les réponses
+
+    Returns:
+        Runnable utilisable à la place du modèle dans une chaîne
+    """
+    store = ReplayStore.get("llm")
+
+    def invoke(prompt_value):
+        FaultInjector.inject("groq_llm")
+        key, fallback_key = _keys(prompt_value)
+        recorded = store.lookup(
+            fingerprint(model_name, key),
+            fingerprint(model_name, fallback_key) if fallback_key else None
+        )
+        if recorded is None:
+            raise SimulatedFailure("Aucune réponse LLM enregistrée pour ce prompt")
+        return AIMessage(content=recorded["content"])
+
+    return RunnableLambda(invoke, name=f"replay:{model_name}")
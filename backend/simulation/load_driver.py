@@ -0,0 +1,149 @@
+"""
+Générateur de charge pour les routes /meeting/text et /meeting/audio
+
+À lancer contre un serveur démarré avec SIMULATION_MODE=replay pour ne consommer
+ni quota Groq ni envoyer de vrais emails.
+
+Usage (depuis backend/) :
+    SIMULATION_MODE=replay uvicorn main:app --workers 4
+    python -m simulation.load_driver --requests 200 --concurrency 20 --audio-ratio 0.2
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import requests
+from simulation.audio import write_silence
+
+DEFAULT_TEXTS = [
+    "Je voudrais une réunion avec Jean Dupont la semaine prochaine",
+    "Organise un point d'une heure avec Marie Martin et Karim Benali demain après-midi",
+    "Planifie une revue de projet de 30 minutes avec Sophie Petit cette semaine",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentile par interpolation linéaire (values doit être trié)"""
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def summarize(durations: List[float], errors: int, elapsed: float) -> Dict:
+    ordered = sorted(durations)
+    return {
+        "requests": len(durations) + errors,
+        "ok": len(durations),
+        "errors": errors,
+        "throughput_per_s": round(len(durations) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+    }
+
+
+class LoadDriver:
+    """Envoie des requêtes concurrentes et collecte les latences par route"""
+
+    def __init__(self, base_url: str, audio_path: str, texts: List[str], timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.audio_path = audio_path
+        self.texts = texts
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = {"text": [], "audio": []}
+        self.errors: Dict[str, int] = {"text": 0, "audio": 0}
+        self.sessions = threading.local()
+
+    def _session(self) -> requests.Session:
+        # Une session (pool de connexions keep-alive) par thread
+        if not hasattr(self.sessions, "value"):
+            self.sessions.value = requests.Session()
+        return self.sessions.value
+
+    def _send(self, kind: str):
+        session = self._session()
+        start = time.perf_counter()
+        try:
+            if kind == "audio":
+                with open(self.audio_path, 'rb') as f:
+                    response = session.post(
+                        f"{self.base_url}/api/orchestrator/meeting/audio",
+                        files={"audio": ("request.wav", f, "audio/wav")},
+                        timeout=self.timeout
+                    )
+            else:
+                response = session.post(
+                    f"{self.base_url}/api/orchestrator/meeting/text",
+                    json={"text": random.choice(self.texts)},
+                    timeout=self.timeout
+                )
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            if ok:
+                self.durations[kind].append(elapsed)
+            else:
+                self.errors[kind] += 1
+
+    def run(self, total: int, concurrency: int, audio_ratio: float) -> Dict:
+        kinds = ["audio" if random.random() < audio_ratio else "text" for _ in range(total)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(self._send, kinds))
+        elapsed = time.perf_counter() - start
+
+        all_durations = self.durations["text"] + self.durations["audio"]
+        return {
+            "total_seconds": round(elapsed, 2),
+            "concurrency": concurrency,
+            "overall": summarize(all_durations, sum(self.errors.values()), elapsed),
+            "text": summarize(self.durations["text"], self.errors["text"], elapsed),
+            "audio": summarize(self.durations["audio"], self.errors["audio"], elapsed),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge des routes de planification")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=100, help="Nombre total de requêtes")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requêtes simultanées")
+    parser.add_argument("--audio-ratio", type=float, default=0.2, help="Part des requêtes audio (0-1)")
+    parser.add_argument("--audio-file", default=None, help="Fichier WAV à envoyer (silence par défaut)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    audio_path = args.audio_file
+    if audio_path is None:
+        audio_path = os.path.join(tempfile.gettempdir(), "load_driver_request.wav")
+        write_silence(audio_path, seconds=2.0)
+
+    driver = LoadDriver(args.base_url, audio_path, DEFAULT_TEXTS, args.timeout)
+    report = driver.run(args.requests, args.concurrency, args.audio_ratio)
+
+    for name in ("overall", "text", "audio"):
+        stats = report[name]
+        print(f"{name:<8} {stats['ok']}/{stats['requests']} ok  "
+              f"{stats['throughput_per_s']} req/s  "
+              f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
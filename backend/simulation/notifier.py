@@ -0,0 +1,102 @@
+"""
+Doublure locale des notifications Google Calendar (events.watch)
+
+En mode replay, ReplayGoogleCalendarService enregistre ici les canaux ouverts et signale
+chaque modification d'événement : le notificateur envoie alors au webhook la même requête
+que Google (POST sans corps, en-têtes X-Goog-*).
+
+Envoi manuel d'une notification (depuis backend/) :
+    python -m simulation.notifier --url http://127.0.0.1:8000/api/google/notifications \\
+        --channel-id <id> --token <jeton> --state exists
+"""
+import argparse
+import itertools
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class LocalNotifier:
+    """Canaux simulés et envoi des notifications au webhook"""
+
+    # calendar_id -> canaux {"channel_id", "resource_id", "address", "token"}
+    _channels: Dict[str, List[Dict]] = {}
+    _lock = threading.Lock()
+    _message_numbers = itertools.count(1)
+    # True : envoi dans le thread appelant (tests) ; False : envoi dans un thread séparé
+    synchronous = False
+
+    @classmethod
+    def register(cls, calendar_id: str, channel_id: str, resource_id: str, address: str, token: str):
+        """Enregistre un canal et envoie le message "sync" initial, comme Google"""
+        channel = {"channel_id": channel_id, "resource_id": resource_id, "address": address, "token": token}
+        with cls._lock:
+            cls._channels.setdefault(calendar_id, []).append(channel)
+        cls._dispatch(channel, "sync")
+
+    @classmethod
+    def unregister(cls, channel_id: str):
+        """Ferme un canal"""
+        with cls._lock:
+            for calendar_id, channels in cls._channels.items():
+                cls._channels[calendar_id] = [c for c in channels if c["channel_id"] != channel_id]
+
+    @classmethod
+    def notify(cls, calendar_ids: Iterable[str]):
+        """Signale une modification des calendriers donnés à tous leurs canaux"""
+        with cls._lock:
+            targets = [dict(channel) for calendar_id in set(calendar_ids) for channel in cls._channels.get(calendar_id, [])]
+        for channel in targets:
+            cls._dispatch(channel, "exists")
+
+    @classmethod
+    def _dispatch(cls, channel: Dict, state: str):
+        if cls.synchronous:
+            cls.deliver(channel, state)
+        else:
+            threading.Thread(target=cls.deliver, args=(channel, state), daemon=True).start()
+
+    @classmethod
+    def deliver(cls, channel: Dict, state: str) -> Optional[int]:
+        """
+        Envoie une notification au webhook du canal
+
+        Returns:
+            Code HTTP de la réponse, ou None si le webhook est injoignable
+        """
+        headers = {
+            "X-Goog-Channel-ID": channel["channel_id"],
+            "X-Goog-Channel-Token": channel["token"],
+            "X-Goog-Resource-ID": channel["resource_id"],
+            "X-Goog-Resource-State": state,
+            "X-Goog-Message-Number": str(next(cls._message_numbers)),
+        }
+        try:
+            response = requests.post(channel["address"], headers=headers, timeout=10)
+            return response.status_code
+        except requests.RequestException as e:
+            logger.warning("Notification simulée non délivrée: %s", str(e), extra={"stage": "calendar_watch"})
+            return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envoie une notification Google Calendar simulée")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/google/notifications")
+    parser.add_argument("--channel-id", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--resource-id", default="")
+    parser.add_argument("--state", default="exists", choices=["sync", "exists", "not_exists"])
+    args = parser.parse_args()
+
+    status = LocalNotifier.deliver(
+        {"channel_id": args.channel_id, "resource_id": args.resource_id, "address": args.url, "token": args.token},
+        args.state
+    )
+    print(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Stockage des enregistrements pour le mode record/replay
+Chaque canal (llm, s2t, google_calendar, gmail...) est un fichier JSON lines
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+from config import Config
+
+
+def fingerprint(*parts: str) -> str:
+    """Calcule une clé stable à partir de chaînes (prompt, contenu audio...)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ReplayStore:
+    """
+    Enregistrements d'un canal, indexés par clé exacte et par clé de repli
+
+    La clé exacte identifie un appel précis (prompt complet) ; la clé de repli
+    regroupe les appels de même nature (même prompt système) pour pouvoir
+    rejouer une réponse plausible quand l'appel exact n'a pas été enregistré.
+    """
+
+    _stores: Dict[str, "ReplayStore"] = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.path = os.path.join(Config.SIMULATION_DIR, f"{channel}.jsonl")
+        self._lock = threading.Lock()
+        self._exact: Dict[str, Any] = {}
+        self._fallback: Dict[str, Any] = {}
+        self._load()
+
+    @classmethod
+    def get(cls, channel: str) -> "ReplayStore":
+        """Retourne le store partagé d'un canal"""
+        with cls._stores_lock:
+            if channel not in cls._stores:
+                cls._stores[channel] = cls(channel)
+            return cls._stores[channel]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self._exact[entry["key"]] = entry["value"]
+                if entry.get("fallback_key"):
+                    self._fallback[entry["fallback_key"]] = entry["value"]
+
+    def record(self, key: str, value: Any, fallback_key: Optional[str] = None):
+        """
+        Enregistre une réponse
+
+        Args:
+            key: Clé exacte de l'appel
+            value: Valeur sérialisable en JSON
+            fallback_key: Clé de repli optionnelle
+        """
+        with self._lock:
+            self._exact[key] = value
+            if fallback_key:
+                self._fallback[fallback_key] = value
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(
+                    {"key": key, "fallback_key": fallback_key, "value": value},
+                    ensure_ascii=False, default=str
+                ) + "\n")
+
+    def lookup(self, key: str, fallback_key: Optional[str] = None) -> Optional[Any]:
+        """
+        Retrouve une réponse enregistrée
+
+        Args:
+            key: Clé exacte de l'appel
+            fallback_key: Clé de repli utilisée si la clé exacte est absente
+
+        Returns:
+            La valeur enregistrée ou None
+        """
+        if key in self._exact:
+            return self._exact[key]
+        if fallback_key is not None:
+            return self._fallback.get(fallback_key)
+        return None
+
+    def any(self) -> Optional[Any]:
+        """Retourne un enregistrement quelconque du canal (le plus récent)"""
+        if not self._exact:
+            return None
+        return next(reversed(self._exact.values()))
@@ -0,0 +1,300 @@
+"""
+Doublures locales de GoogleCalendarService et GmailAPIService
+
+En mode record, les appels passent par les vrais services et leurs résultats sont
+enregistrés ; en mode replay, aucun appel réseau n'est fait : les résultats enregistrés
+sont rejoués (ou synthétisés) avec la latence et le taux d'erreur configurés.
+
+Les services ne les importent pas : services/google_client_factory.py choisit le client
+selon SIMULATION_MODE.
+"""
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from services.gmail_api_service import GmailAPIService
+from services.google_calendar_service import GoogleCalendarService
+from simulation.faults import FaultInjector, SimulatedFailure
+from simulation.notifier import LocalNotifier
+from simulation.replay_store import ReplayStore, fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def _call_key(method: str, **arguments) -> str:
+    return fingerprint(method, json.dumps(arguments, default=str, sort_keys=True))
+
+
+def _record(channel: str, method: str, result, **arguments):
+    ReplayStore.get(channel).record(_call_key(method, **arguments), result, fallback_key=method)
+
+
+def _replay(channel: str, method: str, synthesize: Callable, **arguments):
+    recorded = ReplayStore.get(channel).lookup(_call_key(method, **arguments))
+    return recorded if recorded is not None else synthesize()
+
+
+class RecordingGoogleCalendarService(GoogleCalendarService):
+    """Vrai service Google Calendar dont les résultats sont enregistrés"""
+
+    def create_event(self, summary: str, start_datetime: datetime, end_datetime: datetime,
+                     description: str = "", attendees: List[str] = None, location: str = "",
+                     calendar_id: str = 'primary') -> Optional[Dict]:
+        result = super().create_event(summary, start_datetime, end_datetime, description,
+                                      attendees, location, calendar_id)
+        _record("google_calendar", "create_event", result, summary=summary,
+                start=start_datetime, end=end_datetime, attendees=attendees)
+        return result
+
+    def delete_event(self, event_id: str, calendar_id: str = 'primary') -> bool:
+        result = super().delete_event(event_id, calendar_id)
+        _record("google_calendar", "delete_event", result, event_id=event_id)
+        return result
+
+
+class ReplayGoogleCalendarService(GoogleCalendarService):
+    """Google Calendar simulé en mémoire (partagé par toutes les instances du processus)"""
+
+    _events: Dict[str, Dict] = {}
+    # Version de la dernière modification de chaque événement (simule les syncToken)
+    _versions: Dict[str, int] = {}
+    _version = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def _touch(cls, event_id: str, event: Optional[Dict] = None):
+        ReplayGoogleCalendarService._version += 1
+        cls._versions[event_id] = ReplayGoogleCalendarService._version
+        if event_id in cls._events:
+            cls._events[event_id]['etag'] = f'"{ReplayGoogleCalendarService._version}"'
+        # Notifications simulées vers les canaux ouverts sur les calendriers concernés
+        event = event or cls._events.get(event_id) or {}
+        LocalNotifier.notify(['primary'] + [attendee['email'] for attendee in event.get('attendees', [])])
+
+    def _get_service(self):
+        raise SimulatedFailure("Aucun accès à Google Calendar en mode replay")
+
+    def create_event(self, summary: str, start_datetime: datetime, end_datetime: datetime,
+                     description: str = "", attendees: List[str] = None, location: str = "",
+                     calendar_id: str = 'primary') -> Optional[Dict]:
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure as e:
+            logger.error("Erreur simulée lors de la création de l'événement: %s", e, extra={"stage": "calendar_create"})
+            return None
+
+        def synthesize():
+            event_id = uuid.uuid4().hex
+            return {
+                'id': event_id,
+                'htmlLink': f"https://calendar.google.com/calendar/event?eid={event_id}",
+                'summary': summary,
+                'start': {'dateTime': start_datetime.isoformat(), 'timeZone': 'Europe/Paris'},
+                'end': {'dateTime': end_datetime.isoformat(), 'timeZone': 'Europe/Paris'}
+            }
+
+        event = _replay("google_calendar", "create_event", synthesize, summary=summary,
+                        start=start_datetime, end=end_datetime, attendees=attendees)
+        with self._lock:
+            self._events[event['id']] = dict(event, description=description, location=location,
+                                             attendees=[{'email': email} for email in attendees or []])
+            self._touch(event['id'])
+        return event
+
+    def update_event(self, event_id: str, summary: str = None, start_datetime: datetime = None,
+                     end_datetime: datetime = None, description: str = None, attendees: List[str] = None,
+                     location: str = None, calendar_id: str = 'primary', etag: str = None) -> Optional[Dict]:
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure:
+            return None
+        with self._lock:
+            event = self._events.get(event_id)
+            if not event or (etag and etag != event.get('etag')):
+                return None
+            if summary is not None:
+                event['summary'] = summary
+            if start_datetime is not None:
+                event['start'] = {'dateTime': start_datetime.isoformat(), 'timeZone': 'Europe/Paris'}
+            if end_datetime is not None:
+                event['end'] = {'dateTime': end_datetime.isoformat(), 'timeZone': 'Europe/Paris'}
+            if description is not None:
+                event['description'] = description
+            if location is not None:
+                event['location'] = location
+            if attendees is not None:
+                event['attendees'] = [{'email': email} for email in attendees]
+            self._touch(event_id)
+            return {key: event[key] for key in ('id', 'etag', 'htmlLink', 'summary', 'start', 'end')}
+
+    def delete_event(self, event_id: str, calendar_id: str = 'primary') -> bool:
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure:
+            return False
+        with self._lock:
+            event = self._events.pop(event_id, None)
+            if event is None:
+                return False
+            self._touch(event_id, event)
+            return True
+
+    def get_event(self, event_id: str, calendar_id: str = 'primary') -> Optional[Dict]:
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure:
+            return None
+        with self._lock:
+            event = self._events.get(event_id)
+            return dict(event) if event else None
+
+    def iter_events(self, calendar_id: str = 'primary', time_min: Optional[datetime] = None,
+                    time_max: Optional[datetime] = None, fields: str = GoogleCalendarService.LIST_FIELDS,
+                    page_size: int = 250, max_results: Optional[int] = None,
+                    order_by_start: bool = True) -> Iterator[Dict]:
+        # Même découpage en pages que l'API : une latence simulée par page consommée
+        with self._lock:
+            events = [
+                dict(e) for e in self._events.values()
+                if (time_min is None or e['end']['dateTime'] > time_min.isoformat())
+                and (time_max is None or e['start']['dateTime'] < time_max.isoformat())
+            ]
+        if order_by_start:
+            events.sort(key=lambda e: e['start']['dateTime'])
+        if max_results is not None:
+            events = events[:max_results]
+        for start in range(0, len(events), max(1, page_size)):
+            FaultInjector.inject("google_calendar")
+            yield from events[start:start + page_size]
+
+    def watch_events(self, calendar_id: str, channel_id: str, address: str, token: str,
+                     ttl_seconds: int) -> Optional[Dict]:
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure:
+            return None
+        resource_id = uuid.uuid4().hex
+        LocalNotifier.register(calendar_id, channel_id, resource_id, address, token)
+        return {'resource_id': resource_id, 'expiration': datetime.now() + timedelta(seconds=ttl_seconds)}
+
+    def stop_channel(self, channel_id: str, resource_id: str) -> bool:
+        LocalNotifier.unregister(channel_id)
+        return True
+
+    def batch_get_events(self, event_ids: List[str], calendar_id: str = 'primary',
+                         fields: str = GoogleCalendarService.RECONCILE_FIELDS) -> Dict[str, Optional[Dict]]:
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure:
+            return {}
+        with self._lock:
+            return {event_id: dict(self._events[event_id]) if event_id in self._events else None
+                    for event_id in event_ids}
+
+    def batch_patch_events(self, patches: Dict[str, Dict], calendar_id: str = 'primary',
+                           etags: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure:
+            return {event_id: False for event_id in patches}
+        results = {}
+        with self._lock:
+            for event_id, body in patches.items():
+                expected = (etags or {}).get(event_id)
+                if event_id not in self._events or (expected and expected != self._events[event_id].get('etag')):
+                    results[event_id] = False
+                    continue
+                if body.get('status') == 'cancelled':
+                    self._touch(event_id, self._events.pop(event_id))
+                    results[event_id] = True
+                    continue
+                self._events[event_id].update(body)
+                self._touch(event_id)
+                results[event_id] = True
+        return results
+
+    def query_freebusy(self, calendar_ids: List[str], time_min: datetime,
+                       time_max: datetime) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        # Plages occupées : événements simulés dont le calendrier est participant
+        try:
+            FaultInjector.inject("google_calendar")
+        except SimulatedFailure:
+            return {}
+        busy = {calendar_id: [] for calendar_id in calendar_ids}
+        with self._lock:
+            for event in self._events.values():
+                start = datetime.fromisoformat(event['start']['dateTime'])
+                end = datetime.fromisoformat(event['end']['dateTime'])
+                if start >= time_max or end <= time_min:
+                    continue
+                for attendee in event.get('attendees', []):
+                    if attendee['email'] in busy:
+                        busy[attendee['email']].append((start, end))
+        return busy
+
+    def iter_event_changes(self, calendar_id: str = 'primary', sync_token: Optional[str] = None,
+                           time_min: Optional[datetime] = None) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+        # Import complet : tous les événements simulés ; ensuite, ceux modifiés depuis le jeton
+        # (une seule page)
+        FaultInjector.inject("google_calendar")
+        since = int(sync_token) if sync_token else 0
+        with self._lock:
+            items = [
+                dict(self._events[event_id], status='confirmed') if event_id in self._events
+                else {'id': event_id, 'status': 'cancelled'}
+                for event_id, version in self._versions.items() if version > since
+            ]
+            token = str(self._version)
+        yield items, token
+
+
+class RecordingGmailAPIService(GmailAPIService):
+    """Vrai service Gmail dont les résultats d'envoi sont enregistrés"""
+
+    def send_email(self, to_email: str, subject: str, message: str) -> bool:
+        result = super().send_email(to_email, subject, message)
+        _record("gmail", "send_email", result, to=to_email, subject=subject)
+        return result
+
+
+    def send_batch(self, messages: List[Dict]) -> Dict[str, Dict]:
+        results = super().send_batch(messages)
+        for item in messages:
+            _record("gmail", "send_batch", results[str(item["key"])]["sent"],
+                    to=item["to"], subject=item["subject"])
+        return results
+
+
+class ReplayGmailAPIService(GmailAPIService):
+    """Gmail simulé : aucun email n'est réellement envoyé"""
+
+    def _authenticate(self):
+        return True
+
+    def send_email(self, to_email: str, subject: str, message: str) -> bool:
+        try:
+            FaultInjector.inject("gmail")
+        except SimulatedFailure as e:
+            logger.error("Erreur simulée lors de l'envoi de l'email: %s", e, extra={"stage": "gmail_send", "to": to_email})
+            return False
+        logger.info("Email simulé", extra={"stage": "gmail_send", "to": to_email, "sampled": True})
+        return _replay("gmail", "send_email", lambda: True, to=to_email, subject=subject)
+
+    def send_batch(self, messages: List[Dict]) -> Dict[str, Dict]:
+        # Un seul aller-retour simulé pour tout le lot, échecs tirés au sort par destinataire
+        results = {}
+        try:
+            FaultInjector.inject("gmail")
+            batch_failed = None
+        except SimulatedFailure as e:
+            batch_failed = str(e)
+        for item in messages:
+            if batch_failed or FaultInjector.should_fail("gmail"):
+                results[str(item["key"])] = {"sent": False, "error": batch_failed or "Erreur simulée", "attempts": 1}
+            else:
+                sent = _replay("gmail", "send_batch", lambda: True, to=item["to"], subject=item["subject"])
+                results[str(item["key"])] = {"sent": sent, "message_id": uuid.uuid4().hex, "attempts": 1}
+        logger.info("Lot d'emails simulé", extra={"stage": "gmail_batch", "total": len(messages), "sampled": True})
+        return results
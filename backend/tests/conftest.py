@@ -0,0 +1,36 @@
+"""
+Configuration commune des tests (depuis backend/ : python -m pytest)
+
+La base et les fichiers de quotas sont choisis avant l'import des modèles (le moteur est
+créé à l'import) : SQLite dans un répertoire temporaire, sans serveur MySQL.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix="meeting-planner-tests-")
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(TMP_DIR, "tests.db")
+os.environ["DATABASE_READ_URL"] = ""
+os.environ["QUOTA_DB_PATH"] = os.path.join(TMP_DIR, "quotas.sqlite")
+os.environ["QUOTA_ENABLED"] = "False"
+os.environ["DEBUG"] = "False"
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def db():
+    """Session sur un schéma vide, recréé pour chaque test"""
+    from models.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,44 @@
+from services.calendar_export_service import CalendarExportService, _escape, _fold
+
+
+def test_escape_special_characters():
+    assert _escape("a\\b;c,d\ne\r\nf") == "a\\\\b\\;c\\,d\\ne\\nf"
+    assert _escape(None) == ""
+
+
+def test_fold_short_line_is_unchanged():
+    assert _fold("SUMMARY:Point") == "SUMMARY:Point\r\n"
+
+
+def test_fold_splits_at_75_octets():
+    line = "SUMMARY:" + "x" * 200
+
+    folded = _fold(line)
+    parts = folded[:-2].split("\r\n ")
+
+    assert folded.endswith("\r\n")
+    assert "".join(parts) == line
+    assert len(parts[0].encode("utf-8")) == 75
+    # Continuation : espace initial + 74 octets au plus
+    assert all(len(part.encode("utf-8")) <= 74 for part in parts[1:])
+
+
+def test_fold_does_not_split_multibyte_characters():
+    line = "SUMMARY:" + "é" * 100
+
+    parts = _fold(line)[:-2].split("\r\n ")
+
+    assert "".join(parts) == line
+    assert all(len(part.encode("utf-8")) <= 75 for part in parts)
+
+
+def test_etag_matches():
+    etag = '"cal-1-3-abcdef"'
+
+    assert CalendarExportService.etag_matches(etag, etag)
+    assert CalendarExportService.etag_matches(f'W/{etag}', etag)
+    assert CalendarExportService.etag_matches(f'"autre", {etag}', etag)
+    assert CalendarExportService.etag_matches("*", etag)
+    assert not CalendarExportService.etag_matches('"cal-1-2-abcdef"', etag)
+    assert not CalendarExportService.etag_matches(None, etag)
+    assert not CalendarExportService.etag_matches("", etag)
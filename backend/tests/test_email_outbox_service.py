@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import Config
+from models.email_outbox import EmailOutbox
+from services.email_outbox_service import EmailOutboxService
+
+
+@pytest.fixture
+def outbox(db):
+    entries = EmailOutboxService.enqueue_many(db, [
+        {"idempotency_key": f"invitation-{i}", "to_email": f"p{i}@example.com", "subject": "Invitation", "body": "..."}
+        for i in range(3)
+    ])
+    db.commit()
+    return entries
+
+
+def test_enqueue_many_skips_existing_keys(db, outbox):
+    added = EmailOutboxService.enqueue_many(db, [
+        {"idempotency_key": "invitation-0", "to_email": "p0@example.com", "subject": "Invitation", "body": "..."},
+        {"idempotency_key": "invitation-9", "to_email": "p9@example.com", "subject": "Invitation", "body": "..."},
+    ])
+    db.commit()
+
+    assert [entry.idempotency_key for entry in added] == ["invitation-9"]
+    assert db.query(EmailOutbox).count() == 4
+
+
+def test_claim_batch_leases_pending_entries(db, outbox):
+    claimed = EmailOutboxService.claim_batch(db, limit=2)
+
+    assert [entry.id for entry in claimed] == [outbox[0].id, outbox[1].id]
+    assert all(entry.status == "sending" and entry.attempts == 1 for entry in claimed)
+    assert all(entry.locked_until > datetime.now() for entry in claimed)
+    # Les emails réservés ne sont pas repris par un autre worker
+    assert [entry.id for entry in EmailOutboxService.claim_batch(db, limit=10)] == [outbox[2].id]
+    assert EmailOutboxService.claim_batch(db, limit=10) == []
+
+
+def test_claim_batch_skips_entries_not_due(db, outbox):
+    outbox[0].next_attempt_at = datetime.now() + timedelta(minutes=5)
+    db.commit()
+
+    assert outbox[0].id not in [entry.id for entry in EmailOutboxService.claim_batch(db, limit=10)]
+
+
+def test_expired_lease_becomes_unknown_and_is_not_resent(db, outbox):
+    claimed = EmailOutboxService.claim_batch(db, limit=1)
+    later = datetime.now() + timedelta(seconds=Config.EMAIL_OUTBOX_LEASE_SECONDS + 1)
+
+    assert EmailOutboxService.expire_leases(db, later) == 1
+    db.commit()
+    db.refresh(claimed[0])
+
+    assert claimed[0].status == "unknown"
+    assert claimed[0].locked_until is None
+    assert claimed[0].id not in [entry.id for entry in EmailOutboxService.claim_batch(db, limit=10)]
+
+
+def test_active_lease_is_kept(db, outbox):
+    EmailOutboxService.claim_batch(db, limit=1)
+
+    assert EmailOutboxService.expire_leases(db) == 0
+
+
+def test_requeue_unknown_entries(db, outbox):
+    first, second, _ = outbox
+    EmailOutboxService.mark_unknown(db, first, "Résultat du lot inconnu")
+    EmailOutboxService.mark_unknown(db, second, "Résultat du lot inconnu")
+    first.attempts = second.attempts = 3
+    db.commit()
+
+    assert EmailOutboxService.requeue(db, [first.id]) == 1
+    db.refresh(first)
+    db.refresh(second)
+    assert (first.status, first.attempts) == ("pending", 0)
+    assert second.status == "unknown"
+
+    assert EmailOutboxService.requeue(db) == 1
+    assert EmailOutboxService.get_status_counts(db) == {"pending": 3}
+
+
+def test_requeue_failed_entries_only_when_asked(db, outbox):
+    outbox[0].status = "failed"
+    db.commit()
+
+    assert EmailOutboxService.requeue(db) == 0
+    assert EmailOutboxService.requeue(db, status="failed") == 1
+
+
+def test_mark_failed_backs_off_then_gives_up(db, outbox, monkeypatch):
+    monkeypatch.setattr(Config, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2)
+    entry = EmailOutboxService.claim_batch(db, limit=1)[0]
+
+    EmailOutboxService.mark_failed(db, entry, "503")
+    assert entry.status == "pending"
+    assert entry.next_attempt_at > datetime.now()
+
+    entry.attempts = 2
+    EmailOutboxService.mark_failed(db, entry, "503")
+    assert entry.status == "failed"
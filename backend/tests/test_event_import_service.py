@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.event_import_service import (
+    _external_uid,
+    _ics_datetime,
+    _parse_duration,
+    _split_property,
+    _unfold,
+    iter_csv_events,
+    iter_ics_events,
+)
+
+
+def test_unfold_joins_continuation_lines():
+    lines = ["BEGIN:VEVENT\r\n", "SUMMARY:Réunion \r\n", " d'équipe\r\n", "\tsuite\r\n", "END:VEVENT\r\n"]
+
+    assert list(_unfold(lines)) == [
+        (1, "BEGIN:VEVENT"),
+        (2, "SUMMARY:Réunion d'équipesuite"),
+        (5, "END:VEVENT"),
+    ]
+
+
+def test_unfold_skips_empty_lines():
+    assert list(_unfold(["A:1\n", "\n", "B:2\n"])) == [(1, "A:1"), (3, "B:2")]
+
+
+def test_split_property_reads_parameters():
+    name, params, value = _split_property('dtstart;tzid="Europe/Paris";value=DATE-TIME:20250115T100000')
+
+    assert name == "DTSTART"
+    assert params == {"TZID": "Europe/Paris", "VALUE": "DATE-TIME"}
+    assert value == "20250115T100000"
+
+
+def test_split_property_ignores_colon_in_quoted_parameter():
+    name, params, value = _split_property('ATTENDEE;CN="Dupont: Jean";PARTSTAT=ACCEPTED:mailto:jean@example.com')
+
+    assert name == "ATTENDEE"
+    assert params == {"CN": "Dupont: Jean", "PARTSTAT": "ACCEPTED"}
+    assert value == "mailto:jean@example.com"
+
+
+def test_split_property_without_value():
+    assert _split_property("end") == ("END", {}, "")
+
+
+def test_ics_datetime_date_is_all_day():
+    assert _ics_datetime("20250115", {"VALUE": "DATE"}) == (datetime(2025, 1, 15), True)
+
+
+def test_ics_datetime_utc_is_converted_to_calendar_timezone():
+    # Europe/Paris en hiver : UTC+1
+    assert _ics_datetime("20250115T090000Z", {}) == (datetime(2025, 1, 15, 10, 0), False)
+
+
+def test_ics_datetime_with_tzid():
+    assert _ics_datetime("20250115T100000", {"TZID": "America/New_York"}) == (datetime(2025, 1, 15, 16, 0), False)
+
+
+def test_ics_datetime_unknown_tzid_keeps_wall_time():
+    assert _ics_datetime("20250115T100000", {"TZID": "Romance Standard Time"}) == (datetime(2025, 1, 15, 10, 0), False)
+
+
+def test_ics_datetime_floating_time_is_kept():
+    assert _ics_datetime("20250115T100000", {}) == (datetime(2025, 1, 15, 10, 0), False)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("PT1H30M", timedelta(hours=1, minutes=30)),
+    ("P1D", timedelta(days=1)),
+    ("P2W", timedelta(weeks=2)),
+    ("P1DT2H3M4S", timedelta(days=1, hours=2, minutes=3, seconds=4)),
+    ("-PT15M", -timedelta(minutes=15)),
+])
+def test_parse_duration(value, expected):
+    assert _parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["1H", "P1Y", "PT1.5H", ""])
+def test_parse_duration_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        _parse_duration(value)
+
+
+def _event(**values):
+    return {"uid": None, "title": "Réunion", "start_datetime": datetime(2025, 1, 15, 10),
+            "end_datetime": datetime(2025, 1, 15, 11), **values}
+
+
+def test_external_uid_uses_uid():
+    assert _external_uid(_event(uid="abc@example.com")) == "abc@example.com"
+
+
+def test_external_uid_hashes_title_and_dates_without_uid():
+    uid = _external_uid(_event())
+
+    assert uid.startswith("sha1:")
+    assert uid == _external_uid(_event())
+    assert uid != _external_uid(_event(title="Autre"))
+    assert uid != _external_uid(_event(end_datetime=datetime(2025, 1, 15, 12)))
+
+
+def test_external_uid_hashes_long_uid():
+    uid = _external_uid(_event(uid="x" * 300))
+
+    assert uid.startswith("sha1:")
+    assert len(uid) <= 255
+
+
+def test_iter_ics_events():
+    ics = [
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT",
+        "UID:serie@example.com",
+        "RECURRENCE-ID:20250115T100000",
+        "SUMMARY:Point\\, hebdo",
+        "DTSTART;VALUE=DATE:20250115",
+        "ORGANIZER:mailto:Jean@Example.com",
+        "ATTENDEE;PARTSTAT=DECLINED:mailto:refus@example.com",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "STATUS:CANCELLED",
+        "DTSTART:20250116T100000",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "DTSTART:20250117T100000",
+        "DURATION:PT45M",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "SUMMARY:Sans début",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+
+    first, cancelled, with_duration, invalid = iter_ics_events(ics, type_id=1)
+
+    assert first["uid"] == "serie@example.com#20250115T100000"
+    assert first["title"] == "Point, hebdo"
+    assert first["emails"] == ["jean@example.com"]
+    assert first["is_all_day"] is True
+    assert first["end_datetime"] == datetime(2025, 1, 16)
+    assert cancelled == {"line": 10, "skipped": True}
+    assert with_duration["end_datetime"] == datetime(2025, 1, 17, 10, 45)
+    assert with_duration["title"] == "Occupé"
+    assert invalid == {"line": 18, "error": "DTSTART manquant"}
+
+
+def test_iter_csv_events():
+    rows = [
+        "Email,Title,Start,End,is_all_day,type_id,uid\n",
+        "Jean@Example.com,Point,2025-01-15T10:00,2025-01-15T11:00,,,u-1\n",
+        "marie@example.com,,15/01/2025 14:00,15/01/2025 15:00,oui,3,\n",
+        "marie@example.com,Cassé,pas une date,2025-01-15T11:00,,,\n",
+    ]
+
+    first, second, invalid = iter_csv_events(rows, type_id=1)
+
+    assert first["emails"] == ["jean@example.com"]
+    assert first["uid"] == "u-1"
+    assert first["start_datetime"] == datetime(2025, 1, 15, 10)
+    assert first["type_id"] == 1
+    assert second["title"] == "Occupé"
+    assert second["start_datetime"] == datetime(2025, 1, 15, 14)
+    assert second["is_all_day"] is True
+    assert second["type_id"] == 3
+    assert second["uid"] is None
+    assert invalid["line"] == 4
+    assert "error" in invalid
+
+
+def test_iter_csv_events_requires_dates():
+    with pytest.raises(ValueError, match="start"):
+        list(iter_csv_events(["email,title,end\n"], type_id=1))
+
+
+def test_import_is_idempotent(db, monkeypatch):
+    from config import Config
+    from models.event_type import EventType
+    from models.user import User
+    from services.event_import_service import EventImportService
+
+    monkeypatch.setattr(Config, "EVENT_ARCHIVE_ENABLED", False)
+    db.add_all([EventType(id=1, name="Réunion"), User(first_name="Jean", last_name="Dupont", email="jean@example.com")])
+    db.commit()
+    rows = [
+        "email,title,start,end,uid\n",
+        "jean@example.com,Point,2025-01-15T10:00,2025-01-15T11:00,u-1\n",
+        "jean@example.com,Point,2025-01-15T10:00,2025-01-15T11:00,u-1\n",
+        "jean@example.com,Sans uid,2025-01-16T10:00,2025-01-16T11:00,\n",
+        "inconnu@example.com,Point,2025-01-15T10:00,2025-01-15T11:00,u-2\n",
+    ]
+
+    first = EventImportService.import_events(db, rows, "csv")
+    second = EventImportService.import_events(db, rows, "csv")
+
+    assert (first["inserted"], first["duplicates"], first["unknown_email"]) == (2, 1, 1)
+    assert (second["inserted"], second["duplicates"]) == (0, 3)
@@ -0,0 +1,108 @@
+import socket
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from services.gmail_api_service import GmailAPIService
+
+
+def _http_error(status: int, content: bytes = b"{}") -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_temporary_http_errors_are_retryable(status):
+    assert GmailAPIService._is_retryable(_http_error(status))
+
+
+def test_rate_limit_403_is_retryable():
+    content = b'{"error": {"errors": [{"reason": "userRateLimitExceeded"}]}}'
+
+    assert GmailAPIService._is_retryable(_http_error(403, content))
+
+
+@pytest.mark.parametrize("error", [
+    _http_error(400),
+    _http_error(403, b'{"error": {"errors": [{"reason": "insufficientPermissions"}]}}'),
+    socket.timeout("timed out"),
+    ConnectionResetError(),
+])
+def test_other_errors_are_not_retryable(error):
+    assert not GmailAPIService._is_retryable(error)
+
+
+class FakeBatch:
+    """Requête batch : répond aux `answered` premiers messages puis lève `error`"""
+
+    def __init__(self, callback, answered: int, error: Exception):
+        self.callback = callback
+        self.answered = answered
+        self.error = error
+        self.keys = []
+
+    def add(self, request, request_id):
+        self.keys.append(request_id)
+
+    def execute(self, http=None):
+        for key in self.keys[:self.answered]:
+            self.callback(key, {"id": f"msg-{key}"}, None)
+        if self.error:
+            raise self.error
+
+
+class FakeService:
+    def __init__(self, outcomes):
+        # Un (answered, error) par exécution de lot
+        self.outcomes = list(outcomes)
+        self.executions = 0
+
+    def new_batch_http_request(self, callback):
+        answered, error = self.outcomes[min(self.executions, len(self.outcomes) - 1)]
+        self.executions += 1
+        return FakeBatch(callback, answered, error)
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return None
+
+
+def _send(monkeypatch, outcomes, count=3):
+    service = FakeService(outcomes)
+    monkeypatch.setattr(GmailAPIService, "_get_service", lambda self: service)
+    monkeypatch.setattr(GmailAPIService, "_get_http", lambda self: None)
+    monkeypatch.setattr("services.gmail_api_service.time.sleep", lambda seconds: None)
+    messages = [{"key": i, "to": f"p{i}@example.com", "subject": "Invitation", "message": "..."} for i in range(count)]
+    return GmailAPIService().send_batch(messages), service
+
+
+def test_send_batch_marks_unanswered_messages_unknown_after_timeout(monkeypatch):
+    results, service = _send(monkeypatch, [(1, socket.timeout("timed out"))])
+
+    assert results["0"]["sent"] is True
+    assert not results["0"].get("unknown")
+    for key in ("1", "2"):
+        assert results[key]["sent"] is False
+        assert results[key]["unknown"] is True
+    # Résultat inconnu : pas de nouvel essai (risque de doublon)
+    assert service.executions == 1
+
+
+def test_send_batch_retries_when_batch_was_never_sent(monkeypatch):
+    results, service = _send(monkeypatch, [(0, httplib2.ServerNotFoundError("dns")), (3, None)])
+
+    assert all(result["sent"] for result in results.values())
+    assert not any(result.get("unknown") for result in results.values())
+    assert service.executions == 2
+
+
+def test_send_batch_does_not_retry_permanent_batch_error(monkeypatch):
+    results, service = _send(monkeypatch, [(0, _http_error(400))])
+
+    assert not any(result["sent"] or result.get("unknown") for result in results.values())
+    assert service.executions == 1